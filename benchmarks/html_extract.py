@@ -0,0 +1,77 @@
+"""Micro-benchmark: streaming link/form extractor vs BeautifulSoup.
+
+Run with `python -m benchmarks.html_extract [--links N] [--forms N] [--repeat N]`.
+BeautifulSoup is only needed for the comparison column.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from security.html_extract import extract_links_and_forms
+
+
+def synthetic_page(links: int, forms: int, inputs_per_form: int = 6) -> str:
+    parts = ["<html><head><title>bench</title><script>var x = '<a href=/nope>';</script></head><body>"]
+    for i in range(links):
+        parts.append(f'<div class="row"><p>Item {i} with <b>some</b> text &amp; entities</p><a href="/item/{i}?ref={i % 7}#frag">link {i}</a></div>')
+    for i in range(forms):
+        fields = "".join(f'<label>f{j}</label><input type="text" name="field_{i}_{j}" value="v{j}">' for j in range(inputs_per_form))
+        parts.append(f'<form action="/submit/{i}" method="post"><fieldset>{fields}<input type="submit"></fieldset></form>')
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def _bs4_extract(html: str):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    links = [a["href"] for a in soup.find_all("a", href=True)]
+    forms = [[i.get("name") for i in form.find_all("input") if i.get("name")] for form in soup.find_all("form")]
+    return links, forms
+
+
+def _best_of(func, html: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(html)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(links: int, forms: int, repeat: int) -> dict:
+    html = synthetic_page(links, forms)
+    result = {
+        "page_bytes": len(html.encode("utf-8")),
+        "links": links,
+        "forms": forms,
+        "streaming_seconds": round(_best_of(extract_links_and_forms, html, repeat), 4),
+    }
+
+    try:
+        import bs4  # noqa: F401
+    except ModuleNotFoundError:
+        result["bs4_seconds"] = None
+        return result
+
+    streamed_links, streamed_forms = extract_links_and_forms(html)
+    soup_links, soup_forms = _bs4_extract(html)
+    if streamed_links != soup_links or [f.inputs for f in streamed_forms] != soup_forms:
+        raise SystemExit("extractor output differs from BeautifulSoup")
+
+    result["bs4_seconds"] = round(_best_of(_bs4_extract, html, repeat), 4)
+    result["speedup"] = round(result["bs4_seconds"] / result["streaming_seconds"], 2)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--links", type=int, default=5000)
+    parser.add_argument("--forms", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.links, args.forms, args.repeat), indent=2))
@@ -0,0 +1,88 @@
+"""Benchmark: compiled signature registry vs per-marker substring searches.
+
+Run with `python -m benchmarks.signatures [--signatures N] [--body-mb N]`.
+The baseline mirrors the old scanner code: lower-case the whole decoded
+body, then run one `in` search per marker.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import string
+import time
+
+from security.signatures import SignatureRegistry
+
+
+def _markers(count: int) -> list[str]:
+    rng = random.Random(7)
+    return [
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(6)) + " error " + str(index)
+        for index in range(count)
+    ]
+
+
+def synthetic_body(megabytes: float, planted: list[str]) -> bytes:
+    rng = random.Random(11)
+    words = ["<div>", "</div>", "lorem", "ipsum", "dolor", "sit", "amet", "<p class=x>", "</p>", "\n"]
+    target = int(megabytes * 1024 * 1024)
+    chunks: list[str] = []
+    size = 0
+    while size < target:
+        word = rng.choice(words)
+        chunks.append(word + " ")
+        size += len(word) + 1
+    for marker in planted:
+        chunks.insert(rng.randrange(len(chunks)), marker.upper() + " ")
+    return "".join(chunks).encode("utf-8")
+
+
+def _naive(body: bytes, markers: list[str]) -> list[str]:
+    text = body.decode("utf-8").lower()
+    return [marker for marker in markers if marker in text]
+
+
+def _best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(signatures: int, body_mb: float, repeat: int) -> dict:
+    markers = _markers(signatures)
+    planted = markers[:: max(1, signatures // 5)]
+    body = synthetic_body(body_mb, planted)
+
+    registry = SignatureRegistry(max_body_bytes=len(body))
+    for index, marker in enumerate(markers):
+        registry.register("bench", f"m{index}", marker, ignore_case=True)
+
+    found = {s.pattern for s in registry.scan(body)}
+    if found != set(_naive(body, markers)):
+        raise SystemExit("registry results differ from substring search")
+
+    compiled = _best_of(lambda: registry.scan(body), repeat)
+    naive = _best_of(lambda: _naive(body, markers), repeat)
+    return {
+        "signatures": signatures,
+        "body_bytes": len(body),
+        "matched": len(found),
+        "registry_seconds": round(compiled, 4),
+        "substring_seconds": round(naive, 4),
+        "speedup": round(naive / compiled, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--signatures", type=int, default=300)
+    parser.add_argument("--body-mb", type=float, default=4.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.signatures, args.body_mb, args.repeat), indent=2))
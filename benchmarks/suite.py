@@ -0,0 +1,217 @@
+"""Benchmark: crawl and scan a local synthetic target end to end.
+
+Run with `python -m benchmarks.suite [--pages N] [--latency-ms N] [--rate-limit N]`.
+The target (`benchmarks.target_app`) runs in a child process so its threads
+do not compete with the scanner for the GIL, and nothing leaves localhost.
+Reports crawl pages/s, scan requests/s, p50/p95 request latency per check,
+peak RSS and how many planted vulnerabilities were found. `--check`
+compares against `benchmarks/baseline.json` and exits 1 on a regression,
+or when the run's scenario differs from the baseline's and nothing could
+be compared; `--update-baseline` rewrites that file from this run.
+
+Only machine-independent metrics (requests sent, peak RSS, detections)
+can fail `--check`. Throughput and latency depend on the runner and on
+loopback and thread scheduling, and vary from run to run, so their
+regressions are printed as warnings only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import asdict
+from pathlib import Path
+from urllib.parse import urlparse
+
+from benchmarks.target_app import TargetSpec
+from security.client import HttpClient
+from security.crawler import discover_targets
+from security.executor import run_security_tests
+from security.metrics import peak_rss_mb
+from security.throttle import HostScheduler
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+DEFAULT_TOLERANCE = 0.25
+# Metrics where a larger value is better; every other compared metric should not grow.
+HIGHER_IS_BETTER = {"crawl_pages_per_second", "scan_requests_per_second", "detected"}
+# Deterministic for a given scenario; a regression fails `--check`.
+GATED = ("scan_requests", "peak_rss_mb", "detected")
+# Wall-clock metrics; a regression is only reported.
+TIMED = ("crawl_pages_per_second", "scan_requests_per_second", "check_latency_p50_ms", "check_latency_p95_ms")
+COMPARED = GATED + TIMED
+
+
+class TimedClient(HttpClient):
+    """HttpClient that records the wall time of every request under its check label."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+
+    def get(self, url, params=None, allow_redirects=True, check=None, use_cache=True, content_types=None, headers=None):
+        start = time.perf_counter()
+        try:
+            return super().get(
+                url,
+                params=params,
+                allow_redirects=allow_redirects,
+                check=check,
+                use_cache=use_cache,
+                content_types=content_types,
+                headers=headers,
+            )
+        finally:
+            self.latencies[check or "unlabelled"].append(time.perf_counter() - start)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+class TargetProcess:
+    def __init__(self, spec: TargetSpec):
+        self.spec = spec
+        self.url = ""
+        self._proc: subprocess.Popen | None = None
+
+    def __enter__(self) -> TargetProcess:
+        command = [sys.executable, "-m", "benchmarks.target_app"]
+        for name, value in asdict(self.spec).items():
+            command += ["--" + name.replace("_", "-"), str(value)]
+        self._proc = subprocess.Popen(command, cwd=Path(__file__).resolve().parents[1], stdout=subprocess.PIPE, text=True)
+        self.url = self._proc.stdout.readline().strip()
+        if not self.url:
+            raise RuntimeError("benchmark target failed to start")
+        return self
+
+    def fetch(self, path: str) -> dict:
+        import requests
+
+        return requests.get(self.url + path, timeout=10).json()
+
+    def __exit__(self, *exc) -> None:
+        self._proc.terminate()
+        self._proc.wait(timeout=10)
+
+
+def _detected(findings: list[dict], planted: dict[str, list[str]]) -> tuple[int, int]:
+    found = {(f["test"], urlparse(f["url"]).path or "/") for f in findings if f.get("severity") in {"high", "medium"}}
+    expected = {(kind, path) for kind, paths in planted.items() for path in paths}
+    return len(expected & found), len(expected)
+
+
+def run(
+    spec: TargetSpec,
+    crawl_mode: str = "async",
+    crawl_workers: int = 8,
+    scan_workers: int = 8,
+    rate: float = 0.0,
+) -> dict:
+    scheduler = HostScheduler(rate=rate, max_rate=max(rate, 50)) if rate > 0 else None
+    with TargetProcess(spec) as target:
+        planted = target.fetch("/__planted")
+        with TimedClient(timeout=10, pool_maxsize=max(crawl_workers, scan_workers), scheduler=scheduler) as client:
+            start = time.perf_counter()
+            targets = discover_targets(target.url, mode=crawl_mode, workers=crawl_workers, client=client)
+            crawl_seconds = time.perf_counter() - start
+            crawl_requests = target.fetch("/__stats")["requests"]
+
+            start = time.perf_counter()
+            findings = run_security_tests(targets, client=client, workers=scan_workers)
+            scan_seconds = time.perf_counter() - start
+        stats = target.fetch("/__stats")
+
+    checks = {name: values for name, values in client.latencies.items() if name != "crawl"}
+    every_check = [value for values in checks.values() for value in values]
+    detected, expected = _detected(findings, planted)
+    return {
+        "scenario": {**asdict(spec), "crawl_mode": crawl_mode, "crawl_workers": crawl_workers, "scan_workers": scan_workers, "rate": rate},
+        "pages": len(targets["pages"]),
+        "crawl_seconds": round(crawl_seconds, 3),
+        "crawl_pages_per_second": round(len(targets["pages"]) / crawl_seconds, 1),
+        "scan_seconds": round(scan_seconds, 3),
+        "scan_requests": stats["requests"] - crawl_requests,
+        "scan_requests_per_second": round((stats["requests"] - crawl_requests) / scan_seconds, 1),
+        "throttled": stats["throttled"],
+        "check_latency_p50_ms": round(percentile(every_check, 0.50) * 1000, 2),
+        "check_latency_p95_ms": round(percentile(every_check, 0.95) * 1000, 2),
+        "check_latency_ms": {
+            name: {"p50": round(percentile(values, 0.50) * 1000, 2), "p95": round(percentile(values, 0.95) * 1000, 2)}
+            for name, values in sorted(checks.items())
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "detected": detected,
+        "planted": expected,
+    }
+
+
+def scenario_mismatch(result: dict, baseline: dict) -> list[str]:
+    """Scenario settings in which the run differs from the baseline."""
+
+    recorded = baseline.get("scenario") or {}
+    return sorted(key for key in set(recorded) | set(result["scenario"]) if recorded.get(key) != result["scenario"].get(key))
+
+
+def regressions(result: dict, baseline: dict, metrics: tuple[str, ...] = GATED) -> list[str]:
+    """Compare `metrics` against a baseline recorded for the same scenario; return one line per regression."""
+
+    tolerance = baseline.get("tolerance", DEFAULT_TOLERANCE)
+    problems = []
+    for metric in metrics:
+        expected, actual = baseline["metrics"].get(metric), result[metric]
+        if expected is None:
+            continue
+        if metric in HIGHER_IS_BETTER:
+            limit = expected * (1 - tolerance) if metric != "detected" else expected
+            if actual < limit:
+                problems.append(f"{metric}: {actual} < {round(limit, 2)} (baseline {expected})")
+        elif actual > expected * (1 + tolerance):
+            problems.append(f"{metric}: {actual} > {round(expected * (1 + tolerance), 2)} (baseline {expected})")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    defaults = TargetSpec()
+    for name, value in asdict(defaults).items():
+        parser.add_argument("--" + name.replace("_", "-"), type=type(value), default=value)
+    parser.add_argument("--crawl-mode", choices=("sync", "async"), default="async")
+    parser.add_argument("--crawl-workers", type=int, default=8)
+    parser.add_argument("--scan-workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=0.0, help="Client-side starting rate per host; 0 disables throttling")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if a metric regressed against the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the baseline")
+    args = parser.parse_args()
+
+    spec = TargetSpec(**{name: getattr(args, name) for name in asdict(defaults)})
+    result = run(spec, args.crawl_mode, args.crawl_workers, args.scan_workers, args.rate)
+    print(json.dumps(result, indent=2))
+
+    if args.update_baseline:
+        baseline = {
+            "tolerance": DEFAULT_TOLERANCE,
+            "scenario": result["scenario"],
+            "metrics": {metric: result[metric] for metric in COMPARED},
+        }
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+    elif BASELINE_PATH.exists():
+        baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+        mismatch = scenario_mismatch(result, baseline)
+        if mismatch:
+            print(f"baseline scenario mismatch ({', '.join(mismatch)}); nothing compared", file=sys.stderr)
+            problems = mismatch
+        else:
+            for warning in regressions(result, baseline, TIMED):
+                print(f"WARNING {warning} (timing, not gated)", file=sys.stderr)
+            problems = regressions(result, baseline)
+            for problem in problems:
+                print(f"REGRESSION {problem}", file=sys.stderr)
+        if problems and args.check:
+            raise SystemExit(1)
@@ -0,0 +1,206 @@
+"""Synthetic vulnerable web app for offline crawl and scan benchmarks.
+
+Run with `python -m benchmarks.target_app [--pages N] [--latency-ms N] [--rate-limit N]`;
+it prints its base URL on the first line of stdout and serves until killed.
+
+Pages form a tree with a fan-out chosen so every page is reachable within
+the crawler's MAX_DEPTH. Some pages carry GET forms and query links, and
+planted pages answer the scanner's payloads with SQL errors, reflected
+input, `/etc/passwd` content or external redirects. `--latency-ms` delays
+every response and `--rate-limit` answers 429 once a token bucket of that
+many requests/second is empty. `/__stats` and `/__planted` return request
+counters and the planted vulnerabilities as JSON.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from security.crawler import MAX_DEPTH
+
+PARAM_POOL = ("q", "id", "file", "next", "name", "page", "sort", "path")
+VULNERABILITIES = ("sql_injection", "xss", "directory_traversal", "open_redirect")
+
+
+@dataclass
+class TargetSpec:
+    pages: int = 200
+    forms_every: int = 4
+    params_per_form: int = 3
+    planted_per_kind: int = 5
+    latency_ms: float = 0.0
+    rate_limit: float = 0.0
+    seed: int = 3
+
+
+def fanout(pages: int, depth: int = MAX_DEPTH) -> int:
+    """Smallest branching factor that fits `pages` into a tree of `depth` levels below the root."""
+
+    width = 1
+    while sum(width**level for level in range(depth + 1)) < pages:
+        width += 1
+    return width
+
+
+class TokenBucket:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class TargetApp:
+    """Page layout, planted vulnerabilities and counters for one synthetic site."""
+
+    def __init__(self, spec: TargetSpec):
+        self.spec = spec
+        self.width = fanout(spec.pages)
+        rng = random.Random(spec.seed)
+        candidates = list(range(1, spec.pages))
+        self.planted = {
+            kind: sorted(rng.sample(candidates, min(spec.planted_per_kind, len(candidates))))
+            for kind in VULNERABILITIES
+        }
+        self._vulnerable = {kind: set(pages) for kind, pages in self.planted.items()}
+        self.form_params = {
+            page: rng.sample(PARAM_POOL, spec.params_per_form)
+            for page in range(spec.pages)
+            if spec.forms_every and page % spec.forms_every == 0
+        }
+        self.bucket = TokenBucket(spec.rate_limit) if spec.rate_limit > 0 else None
+        self.requests = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def path(page: int) -> str:
+        return "/" if page == 0 else f"/p/{page}"
+
+    def page_number(self, path: str) -> int | None:
+        if path == "/":
+            return 0
+        if path.startswith("/p/") and path[3:].isdigit() and int(path[3:]) < self.spec.pages:
+            return int(path[3:])
+        return None
+
+    def render(self, page: int, query: dict[str, list[str]]) -> tuple[int, dict[str, str], str]:
+        values = [value for values in query.values() for value in values]
+        if page in self._vulnerable["open_redirect"]:
+            target = next((v for v in query.get("next", []) if v.startswith("http")), None)
+            if target:
+                return 302, {"Location": target}, ""
+
+        body = [f"<html><head><title>Page {page}</title></head><body><h1>Page {page}</h1>"]
+        first = page * self.width + 1
+        for child in range(first, min(first + self.width, self.spec.pages)):
+            suffix = f"?id={child}" if child % 3 == 0 else ""
+            body.append(f'<a href="{self.path(child)}{suffix}">child {child}</a>')
+        if page in self.form_params:
+            inputs = "".join(f'<input name="{name}">' for name in self.form_params[page])
+            body.append(f'<form action="{self.path(page)}" method="get">{inputs}<button>Go</button></form>')
+        if page in self._vulnerable["xss"]:
+            body.extend(f"<p>You searched for {value}</p>" for value in values)
+        if page in self._vulnerable["sql_injection"] and any("'" in value for value in values):
+            body.append("<p>You have an error in your SQL syntax near ''1'='1'</p>")
+        if page in self._vulnerable["directory_traversal"] and any("../" in value for value in values):
+            body.append("<pre>root:x:0:0:root:/root:/bin/bash</pre>")
+        body.append("<p>" + "lorem ipsum dolor sit amet " * 40 + "</p></body></html>")
+        return 200, {"Content-Type": "text/html; charset=utf-8"}, "".join(body)
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "throttled": self.throttled}
+
+
+def make_handler(app: TargetApp) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without TCP_NODELAY keep-alive
+        # requests stall on delayed ACKs and latency measures the kernel, not the scanner.
+        disable_nagle_algorithm = True
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+        def _send(self, status: int, headers: dict[str, str], body: str) -> None:
+            payload = body.encode("utf-8")
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(payload)))
+            self.send_header("X-Frame-Options", "DENY")
+            self.send_header("X-Content-Type-Options", "nosniff")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self) -> None:
+            parsed = urlparse(self.path)
+            if parsed.path == "/__stats":
+                self._send(200, {"Content-Type": "application/json"}, json.dumps(app.stats()))
+                return
+            if parsed.path == "/__planted":
+                planted = {kind: [app.path(page) for page in pages] for kind, pages in app.planted.items()}
+                self._send(200, {"Content-Type": "application/json"}, json.dumps(planted))
+                return
+
+            with app.lock:
+                app.requests += 1
+            if app.spec.latency_ms:
+                time.sleep(app.spec.latency_ms / 1000)
+            if app.bucket is not None and not app.bucket.take():
+                with app.lock:
+                    app.throttled += 1
+                self._send(429, {"Retry-After": "1", "Content-Type": "text/plain"}, "slow down")
+                return
+
+            page = app.page_number(parsed.path)
+            if page is None:
+                self._send(404, {"Content-Type": "text/plain"}, "not found")
+                return
+            self._send(*app.render(page, parse_qs(parsed.query)))
+
+    return Handler
+
+
+def serve(spec: TargetSpec, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), make_handler(TargetApp(spec)))
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    defaults = TargetSpec()
+    for name, value in asdict(defaults).items():
+        parser.add_argument("--" + name.replace("_", "-"), type=type(value), default=value)
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+
+    spec = TargetSpec(**{name: getattr(args, name) for name in asdict(defaults)})
+    server = serve(spec, port=args.port)
+    print(f"http://127.0.0.1:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        sys.stdout.flush()
@@ -4,6 +4,10 @@ import argparse
 import json
 from collections import Counter
 from pathlib import Path
+from typing import Iterable, Iterator
+
+from security.fingerprint import DEFAULT_BASELINE_PATH, fingerprint, load_baseline, write_baseline
+from security.waivers import DEFAULT_EXCEPTIONS_PATH, WaiverIndex, load_waivers
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -11,21 +15,111 @@ REPORTS_DIR = ROOT / "security" / "reports"
 CONFIG = ROOT / "security" / "config.json"
 
 
+def stage_report_paths() -> list[Path]:
+    # Raw tool output is already parsed into its stage report; counting it again would double findings.
+    return [
+        file
+        for file in sorted(REPORTS_DIR.glob("*.json"))
+        if not file.name.endswith(".raw.json") and file.name != "aggregate.json"
+    ]
+
+
 def load_stage_reports() -> list[dict]:
-    reports = []
-    for file in sorted(REPORTS_DIR.glob("*.json")):
-        reports.append(json.loads(file.read_text(encoding="utf-8")))
-    return reports
+    return [json.loads(file.read_text(encoding="utf-8")) for file in stage_report_paths()]
+
+
+def store_summary(
+    store_path: str,
+    run_label: str | None,
+    scan_report: str | None,
+    new_since: str | None,
+    baseline: set[str] | None = None,
+    baseline_out: str | None = None,
+    waivers: WaiverIndex | None = None,
+) -> tuple[Counter, dict]:
+    """Load this run's reports into the findings store and summarize them with SQL.
+
+    With a `baseline` or active `waivers`, the summary is computed by
+    `gate_summary` over the stored findings instead. With `baseline_out`, every fingerprint
+    of the run is written there.
+    """
+
+    from security.findings_store import FindingsStore
+
+    paths = stage_report_paths()
+    with FindingsStore(store_path) as store:
+        run_id = store.start_run(run_label)
+        store.ingest_stage_reports(run_id, paths)
+        if scan_report and Path(scan_report).exists():
+            store.ingest_scan_report(run_id, scan_report)
+
+        details: dict = {"report_count": len(paths), "stage_summary": store.stage_summary(run_id)}
+        if new_since:
+            previous = store.run_id(new_since)
+            if previous is None:
+                raise SystemExit(f"unknown run label: {new_since!r}")
+            new = Counter(finding["severity"] for finding in store.new_since(run_id, previous))
+            details["new_since"] = {"run": new_since, "severity_summary": dict(new)}
+
+        if baseline is not None or waivers:
+            summary, filtered = gate_summary(store.iter_findings(run_id), baseline, waivers)
+            details.update(filtered)
+        else:
+            summary = store.severity_summary(run_id)
+            if waivers is not None:
+                details["waivers"] = waivers.summary()
+        if baseline_out:
+            details["baseline_written"] = write_baseline(baseline_out, (f["fingerprint"] for f in store.iter_findings(run_id)))
+        return summary, details
+
+
+def iter_findings(reports: list[dict]) -> Iterator[dict]:
+    for report in reports:
+        yield from report.get("findings", [])
 
 
 def summarize_findings(reports: list[dict]) -> Counter:
     counter: Counter = Counter()
-    for report in reports:
-        for finding in report.get("findings", []):
-            counter[finding.get("severity", "unknown").lower()] += 1
+    for finding in iter_findings(reports):
+        counter[finding.get("severity", "unknown").lower()] += 1
     return counter
 
 
+def gate_summary(
+    findings: Iterable[dict],
+    baseline: set[str] | None = None,
+    waivers: WaiverIndex | None = None,
+) -> tuple[Counter, dict]:
+    """Count the severities the gate acts on, setting aside waived and baseline findings.
+
+    Returns the counted summary and report sections with the waived and
+    known (baseline) counts, present only for the filters that were given.
+    """
+
+    counted: Counter = Counter()
+    known: Counter = Counter()
+    waived: Counter = Counter()
+    waived_by: Counter = Counter()
+    for finding in findings:
+        severity = (finding.get("severity") or "unknown").lower()
+        finding_fingerprint = finding.get("fingerprint") or (fingerprint(finding) if baseline is not None else None)
+        waiver = waivers.match(finding, finding_fingerprint) if waivers else None
+        if waiver is not None:
+            waived[severity] += 1
+            waived_by[waiver.id] += 1
+        elif baseline is not None and finding_fingerprint in baseline:
+            known[severity] += 1
+        else:
+            counted[severity] += 1
+
+    sections: dict = {}
+    if waivers is not None:
+        sections["waivers"] = waivers.summary(waived, waived_by)
+    if baseline is not None:
+        sections["baseline"] = {"entries": len(baseline), "known_severity_summary": dict(known)}
+    return counted, sections
+
+
 def gate_decision(summary: Counter, fail_on_high: bool, fail_on_critical: bool) -> tuple[bool, str]:
     if fail_on_critical and summary.get("critical", 0) > 0:
         return False, "critical findings present"
@@ -38,6 +132,14 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--fail-on-high", action="store_true")
     parser.add_argument("--fail-on-critical", action="store_true")
+    parser.add_argument("--store", help="Record findings in this SQLite store and summarize from it")
+    parser.add_argument("--run-label", help="Label for this run in the store (default: timestamp)")
+    parser.add_argument("--scan-report", help="Scanner report (security-report.json) to include in the store")
+    parser.add_argument("--new-since", help="Also count findings not present in this earlier run label")
+    parser.add_argument("--new-only", action="store_true", help="Gate only on findings missing from the baseline file")
+    parser.add_argument("--baseline", help=f"Baseline fingerprint file (default: gates.baseline or {DEFAULT_BASELINE_PATH})")
+    parser.add_argument("--write-baseline", action="store_true", help="Write this run's fingerprints to the baseline file")
+    parser.add_argument("--exceptions", help=f"Waiver file (default: gates.exceptions or {DEFAULT_EXCEPTIONS_PATH})")
     args = parser.parse_args()
 
     config = json.loads(CONFIG.read_text(encoding="utf-8"))
@@ -45,14 +147,31 @@ if __name__ == "__main__":
     fail_on_high = args.fail_on_high or bool(gate_cfg.get("fail_on_high", False))
     fail_on_critical = args.fail_on_critical or bool(gate_cfg.get("fail_on_critical", True))
 
-    reports = load_stage_reports()
-    summary = summarize_findings(reports)
+    new_only = args.new_only or bool(gate_cfg.get("new_findings_only", False))
+    baseline_path = str(ROOT / (args.baseline or gate_cfg.get("baseline", DEFAULT_BASELINE_PATH)))
+    baseline = load_baseline(baseline_path) if new_only else None
+    baseline_out = baseline_path if args.write_baseline else None
+    waivers = load_waivers(ROOT / (args.exceptions or gate_cfg.get("exceptions", DEFAULT_EXCEPTIONS_PATH)))
+
+    if args.store:
+        summary, details = store_summary(
+            args.store, args.run_label, args.scan_report, args.new_since, baseline, baseline_out, waivers
+        )
+    else:
+        reports = load_stage_reports()
+        summary, filtered = gate_summary(iter_findings(reports), baseline, waivers)
+        details = {"report_count": len(reports), **filtered}
+        if baseline_out:
+            details["baseline_written"] = write_baseline(baseline_out, (fingerprint(f) for f in iter_findings(reports)))
     passed, reason = gate_decision(summary, fail_on_high, fail_on_critical)
+    if new_only:
+        reason = reason.replace("findings present", "findings not in baseline")
 
     result = {
-        "report_count": len(reports),
+        "report_count": details.pop("report_count"),
         "severity_summary": dict(summary),
         "gate": {"passed": passed, "reason": reason},
+        **details,
     }
 
     out_path = REPORTS_DIR / "aggregate.json"
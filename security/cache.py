@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import threading
+from collections import Counter, OrderedDict
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _response_size(response) -> int:
+    content = getattr(response, "content", None)
+    if isinstance(content, (bytes, bytearray)):
+        body = len(content)
+    else:
+        body = len(getattr(response, "text", "") or "")
+    headers = getattr(response, "headers", None) or {}
+    return body + sum(len(k) + len(v) for k, v in headers.items())
+
+
+class ResponseCache:
+    """Per-scan LRU cache of GET responses bounded by total body size.
+
+    Entries are keyed by method, URL, params and the redirect setting, so a
+    probe only hits when it would have sent exactly the same request. Hits
+    and misses are counted per check name for the report.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self._entries: OrderedDict[tuple, tuple[object, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(method: str, url: str, params: dict | None, allow_redirects: bool) -> tuple:
+        items = tuple(sorted((str(k), str(v)) for k, v in params.items())) if params else ()
+        return (method.upper(), url, items, bool(allow_redirects))
+
+    def get(self, key: tuple, check: str | None = None):
+        label = check or "unlabelled"
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses[label] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits[label] += 1
+            return entry[0]
+
+    def put(self, key: tuple, response) -> None:
+        size = _response_size(response)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (response, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "hits": dict(sorted(self.hits.items())),
+                "misses": dict(sorted(self.misses.items())),
+                "requests_saved": sum(self.hits.values()),
+            }
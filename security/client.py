@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Iterator
+
+from security.throttle import UNPACED_CHECKS
+
+if TYPE_CHECKING:
+    from security.cache import ResponseCache
+    from security.metrics import ScanMetrics
+    from security.throttle import HostScheduler
+
+TIMEOUT_SECONDS = 10
+DEFAULT_POOL_CONNECTIONS = 16
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_MAX_BODY_BYTES = 2 * 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+
+
+def media_type(headers) -> str:
+    """Lower-cased media type of a Content-Type header, without parameters."""
+
+    return (headers.get("Content-Type") or "").split(";", 1)[0].strip().lower()
+
+
+class FetchedResponse:
+    """Response whose body was streamed and capped by `HttpClient`.
+
+    `truncated` is set when the body was cut at the client's
+    `max_body_bytes`, and `skipped` when its content type was not accepted
+    and the body was never downloaded.
+    """
+
+    __slots__ = ("url", "status_code", "headers", "content", "encoding", "truncated", "skipped")
+
+    def __init__(self, url: str, status_code: int, headers, content: bytes, encoding: str | None, truncated: bool = False, skipped: bool = False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.truncated = truncated
+        self.skipped = skipped
+
+    @property
+    def text(self) -> str:
+        try:
+            return self.content.decode(self.encoding or "utf-8", errors="replace")
+        except LookupError:
+            return self.content.decode("utf-8", errors="replace")
+
+
+class HttpClient:
+    """Keep-alive HTTP client shared by the crawler and every scanner check.
+
+    Wraps a single `requests.Session` whose adapters keep up to
+    `pool_maxsize` open connections per host across `pool_connections`
+    hosts, so repeated probes reuse TCP/TLS connections instead of
+    handshaking for each request. `retries` only applies to connection
+    errors; responses are never re-requested.
+
+    With a `cache`, plain GETs are answered from responses already fetched
+    in this scan (by the crawler or an earlier check); pass
+    `use_cache=False` for probes that must reach the server. With a
+    `scheduler`, every request that does reach the network first waits for
+    the host's politeness budget and then reports its status back, except
+    for the checks in `UNPACED_CHECKS`. With
+    `metrics`, every network request's latency, size, status, retries or
+    error is recorded under its `check` label.
+
+    Bodies are streamed and cut at `max_body_bytes` (None reads them
+    whole), so huge or endless responses cannot exhaust memory or pin a
+    worker. Callers that only use some media types pass `content_types`;
+    other responses are returned with headers only and their body is never
+    downloaded. Requests with extra `headers`, such as conditional
+    validators, always reach the network; their full responses are still
+    cached for later plain GETs.
+    """
+
+    def __init__(
+        self,
+        timeout: float = TIMEOUT_SECONDS,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        retries: int = 0,
+        session=None,
+        cache: ResponseCache | None = None,
+        scheduler: HostScheduler | None = None,
+        metrics: ScanMetrics | None = None,
+        max_body_bytes: int | None = DEFAULT_MAX_BODY_BYTES,
+    ):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.timeout = timeout
+        self.cache = cache
+        self.scheduler = scheduler
+        self.metrics = metrics
+        self.max_body_bytes = max_body_bytes
+        self.session = session if session is not None else requests.Session()
+
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(
+        self,
+        url: str,
+        params: dict | None = None,
+        allow_redirects: bool = True,
+        check: str | None = None,
+        use_cache: bool = True,
+        content_types: tuple[str, ...] | None = None,
+        headers: dict[str, str] | None = None,
+    ):
+        """Send a GET request; `check` names the caller for bookkeeping."""
+
+        if self.cache is None or not use_cache:
+            return self._send(url, params, allow_redirects, check, content_types, headers)
+
+        key = self.cache.key("GET", url, params, allow_redirects)
+        response = None if headers else self.cache.get(key, check)
+        if response is None:
+            response = self._send(url, params, allow_redirects, check, content_types, headers)
+            # A body skipped for this caller may be needed by the next one, and a 304 has none.
+            if not getattr(response, "skipped", False) and response.status_code != 304:
+                self.cache.put(key, response)
+        return response
+
+    def _send(
+        self,
+        url: str,
+        params: dict | None,
+        allow_redirects: bool,
+        check: str | None = None,
+        content_types: tuple[str, ...] | None = None,
+        headers: dict[str, str] | None = None,
+    ):
+        scheduler = self.scheduler if check not in UNPACED_CHECKS else None
+        if scheduler is not None:
+            scheduler.acquire(url)
+        start = time.perf_counter()
+        try:
+            response = self.session.get(
+                url, params=params, headers=headers, timeout=self.timeout, allow_redirects=allow_redirects, stream=True
+            )
+            retries = getattr(getattr(getattr(response, "raw", None), "retries", None), "history", None) or ()
+            response = self._read_body(response, content_types)
+        except Exception as exc:
+            if self.metrics is not None:
+                self.metrics.observe(url, check, time.perf_counter() - start, error=type(exc).__name__)
+            raise
+        if self.metrics is not None:
+            content = getattr(response, "content", None)
+            self.metrics.observe(
+                url,
+                check,
+                time.perf_counter() - start,
+                status=response.status_code,
+                size=len(content) if isinstance(content, (bytes, str)) else 0,
+                retries=len(retries),
+            )
+        if scheduler is not None:
+            scheduler.observe(url, response.status_code, response.headers)
+        return response
+
+    def _read_body(self, response, content_types: tuple[str, ...] | None):
+        """Read a streamed response into a FetchedResponse, honouring the size cap and `content_types`."""
+
+        if not hasattr(response, "iter_content"):
+            # Sessions injected by callers may return ready-made responses.
+            return response
+
+        skipped = content_types is not None and media_type(response.headers) not in content_types
+        truncated = False
+        body = bytearray()
+        try:
+            if not skipped:
+                for chunk in response.iter_content(READ_CHUNK_BYTES):
+                    body += chunk
+                    if self.max_body_bytes is not None and len(body) > self.max_body_bytes:
+                        del body[self.max_body_bytes :]
+                        truncated = True
+                        break
+        finally:
+            # Fully read bodies release the connection to the pool; cut ones drop it.
+            response.close()
+        return FetchedResponse(response.url, response.status_code, response.headers, bytes(body), response.encoding, truncated, skipped)
+
+    def iter_content(self, url: str, check: str | None = None, chunk_size: int = READ_CHUNK_BYTES) -> Iterator[bytes]:
+        """Yield a GET response body chunk by chunk, without the size cap or the cache.
+
+        For large documents such as sitemaps that are parsed as they arrive.
+        Raises requests.HTTPError for 4xx and 5xx responses.
+        """
+
+        import requests
+
+        if self.scheduler is not None:
+            self.scheduler.acquire(url)
+        start = time.perf_counter()
+        response = None
+        size = 0
+        error = None
+        try:
+            response = self.session.get(url, timeout=self.timeout, stream=True)
+            if self.scheduler is not None:
+                self.scheduler.observe(url, response.status_code, response.headers)
+            if response.status_code >= 400:
+                raise requests.HTTPError(f"{response.status_code} for {url}", response=response)
+            chunks = response.iter_content(chunk_size) if hasattr(response, "iter_content") else [response.content]
+            for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+        except Exception as exc:
+            error = type(exc).__name__
+            raise
+        finally:
+            if response is not None and hasattr(response, "close"):
+                response.close()
+            if self.metrics is not None:
+                status = getattr(response, "status_code", None)
+                self.metrics.observe(url, check, time.perf_counter() - start, status=status, size=size, error=error)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> HttpClient:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
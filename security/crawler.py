@@ -1,10 +1,21 @@
 from __future__ import annotations
 
-from collections import deque
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
 from urllib.parse import parse_qs, urljoin, urlparse
 
+from security.client import HttpClient, media_type
+from security.frontier import FormRecord, MemoryFrontier, SqliteFrontier
+from security.html_extract import extract_links_and_forms
+from security.page_state import Document, PageStateStore
+
 MAX_DEPTH = 2
 TIMEOUT_SECONDS = 10
+CRAWL_MODES = ("sync", "async")
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 4
+HTML_CONTENT_TYPES = ("text/html",)
 
 
 def _is_internal_link(base_netloc: str, candidate_url: str) -> bool:
@@ -16,87 +27,198 @@ def _normalize_url(base_url: str, href: str) -> str:
     return urljoin(base_url, href.split("#", 1)[0])
 
 
-def discover_targets(base_url: str) -> dict:
-    """Crawl a target website and discover pages, forms, params, and endpoints."""
+def _fetch_page(client: HttpClient, url: str, headers: dict[str, str] | None = None) -> tuple[str | None, object]:
+    """Fetch `url`, returning its body for HTML pages and "" for other content, with the response.
+
+    Bodies of non-HTML responses are never downloaded, and a 304 to a
+    conditional request has none. The body is None when the request fails
+    so the URL is not recorded as a page.
+    """
 
     import requests
-    from bs4 import BeautifulSoup
 
-    parsed_base = urlparse(base_url)
-    if not parsed_base.scheme:
-        raise ValueError("Base URL must include a scheme, e.g. https://example.com")
+    try:
+        response = client.get(url, check="crawl", content_types=HTML_CONTENT_TYPES, headers=headers or None)
+    except requests.RequestException:
+        return None, None
+    if response.status_code == 304 or media_type(response.headers) not in HTML_CONTENT_TYPES:
+        return "", response
+    return response.text, response
 
-    base_netloc = parsed_base.netloc
-    visited: set[str] = set()
-    queue: deque[tuple[str, int]] = deque([(base_url, 0)])
 
-    pages: set[str] = set()
-    params: set[str] = set()
-    endpoints: set[str] = set()
-    forms: list[dict] = []
+def _parse_page(url: str, html: str) -> Document:
+    """Absolute link targets and (action URL, method, input names) forms of a page, in document order."""
 
-    session = requests.Session()
+    hrefs, html_forms = extract_links_and_forms(html)
+    forms = [(_normalize_url(url, form.action or url), (form.method or "GET").upper(), form.inputs) for form in html_forms]
+    return [_normalize_url(url, href) for href in hrefs], forms
 
-    while queue:
-        url, depth = queue.popleft()
-        if depth > MAX_DEPTH or url in visited:
-            continue
 
-        visited.add(url)
+def _record_page(frontier: MemoryFrontier | SqliteFrontier, base_netloc: str, url: str, document: Document) -> list[str]:
+    """Record forms, params and endpoints found on a page; return internal links to follow.
+
+    Each parameter is also indexed under the URL it was seen on: the page
+    itself, a form's action, or a link's target.
+    """
+
+    links, forms = document
+    page_params = parse_qs(urlparse(url).query)
+    frontier.add_params(page_params.keys())
+    frontier.add_endpoint_params(url, page_params.keys())
 
-        try:
-            response = session.get(url, timeout=TIMEOUT_SECONDS)
-            content_type = response.headers.get("Content-Type", "")
-            if "text/html" not in content_type:
-                pages.add(url)
-                continue
-        except requests.RequestException:
+    for action_url, method, input_names in forms:
+        frontier.add_params(input_names)
+        frontier.add_endpoint_params(action_url, list(input_names) + list(parse_qs(urlparse(action_url).query)))
+
+        frontier.add_form(FormRecord(url, action_url, method, input_names))
+        frontier.add_endpoint(action_url)
+
+    followed: list[str] = []
+    for normalized in links:
+        if not _is_internal_link(base_netloc, normalized):
             continue
 
-        pages.add(url)
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        page_params = parse_qs(urlparse(url).query)
-        params.update(page_params.keys())
-
-        for form in soup.find_all("form"):
-            action = form.get("action") or url
-            method = (form.get("method") or "GET").upper()
-            action_url = _normalize_url(url, action)
-            input_names = [inp.get("name") for inp in form.find_all("input") if inp.get("name")]
-            params.update(input_names)
-
-            forms.append(
-                {
-                    "page": url,
-                    "action": action_url,
-                    "method": method,
-                    "inputs": input_names,
-                }
-            )
-            endpoints.add(action_url)
-
-        for anchor in soup.find_all("a", href=True):
-            normalized = _normalize_url(url, anchor["href"])
-            if not _is_internal_link(base_netloc, normalized):
-                continue
-
-            parsed = urlparse(normalized)
-            clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}" if parsed.scheme else normalized
-            endpoints.add(clean_url)
-            params.update(parse_qs(parsed.query).keys())
-
-            if clean_url not in visited and depth < MAX_DEPTH:
-                queue.append((clean_url, depth + 1))
-
-    for candidate in list(endpoints) + list(pages):
-        path = urlparse(candidate).path.lower()
-        if "/api" in path or path.endswith(".json"):
-            endpoints.add(candidate)
-
-    return {
-        "pages": sorted(pages),
-        "forms": forms,
-        "params": sorted(params),
-        "endpoints": sorted(endpoints),
-    }
+        parsed = urlparse(normalized)
+        clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}" if parsed.scheme else normalized
+        link_params = parse_qs(parsed.query).keys()
+        frontier.add_endpoint(clean_url)
+        frontier.add_params(link_params)
+        frontier.add_endpoint_params(clean_url, link_params)
+        followed.append(clean_url)
+
+    return followed
+
+
+def _visit(
+    frontier: MemoryFrontier | SqliteFrontier,
+    base_netloc: str,
+    url: str,
+    depth: int,
+    fetched: tuple[str | None, object],
+    state: PageStateStore | None = None,
+) -> None:
+    html, response = fetched
+    if html is None:
+        return
+
+    frontier.add_page(url)
+    changed = state is None or not state.is_unchanged(url, response)
+    if not changed:
+        document = state.document(url)
+    else:
+        document = _parse_page(url, html) if html else None
+        if state is not None:
+            state.record(url, response, document)
+    if document is None:
+        return
+
+    followed = _record_page(frontier, base_netloc, url, document)
+    if changed and state is not None:
+        state.touch(followed + [action_url for action_url, _, _ in document[1]])
+    for link in followed:
+        if depth < MAX_DEPTH:
+            frontier.push(link, depth + 1)
+
+
+def _validators(state: PageStateStore | None, url: str) -> dict[str, str] | None:
+    return state.validators(url) if state is not None else None
+
+
+def _crawl_sync(client: HttpClient, frontier: MemoryFrontier | SqliteFrontier, base_netloc: str, state: PageStateStore | None = None) -> None:
+    while batch := frontier.pop_batch(1):
+        url, depth = batch[0]
+        _visit(frontier, base_netloc, url, depth, _fetch_page(client, url, _validators(state, url)), state)
+        frontier.maybe_checkpoint()
+
+
+async def _crawl_async(
+    client: HttpClient,
+    frontier: MemoryFrontier | SqliteFrontier,
+    base_netloc: str,
+    workers: int,
+    per_host: int,
+    state: PageStateStore | None = None,
+) -> None:
+    """Breadth-first crawl that fetches each depth level concurrently.
+
+    Fetches run on a thread pool of `workers` threads with at most `per_host`
+    requests in flight per host. Pages are parsed in the order they were
+    queued, so the result matches the sequential crawl.
+    """
+
+    loop = asyncio.get_running_loop()
+    host_limits: dict[str, asyncio.Semaphore] = {}
+
+    async def fetch(url: str) -> tuple[str | None, object]:
+        host = urlparse(url).netloc
+        limit = host_limits.setdefault(host, asyncio.Semaphore(per_host))
+        # Read on the loop thread: the state store's connection belongs to it.
+        headers = _validators(state, url)
+        async with limit:
+            return await loop.run_in_executor(pool, _fetch_page, client, url, headers)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while batch := frontier.pop_batch(workers * 4):
+            pages = await asyncio.gather(*(fetch(url) for url, _ in batch))
+            for (url, depth), fetched in zip(batch, pages):
+                _visit(frontier, base_netloc, url, depth, fetched, state)
+            frontier.maybe_checkpoint()
+
+
+def discover_targets(
+    base_url: str,
+    mode: str = "sync",
+    workers: int = DEFAULT_WORKERS,
+    per_host: int = DEFAULT_PER_HOST,
+    client: HttpClient | None = None,
+    frontier: MemoryFrontier | SqliteFrontier | None = None,
+    state: PageStateStore | None = None,
+    seeds: Iterable[str] = (),
+) -> dict:
+    """Crawl a target website and discover pages, forms, params, and endpoints.
+
+    `mode="async"` fetches each BFS level concurrently with `workers` threads
+    and at most `per_host` in-flight requests per host. Pass `client` to
+    reuse its connection pool for the scan phase afterwards. Pass a
+    SqliteFrontier to persist crawl progress; a resumed frontier continues
+    from its saved queue instead of starting at `base_url`.
+
+    With a PageStateStore, pages are requested conditionally and unchanged
+    ones replay their stored links and forms instead of being parsed; the
+    store records which URLs changed for an incremental scan.
+
+    `seeds`, such as the pages listed in a sitemap, are crawled alongside
+    `base_url` as additional starting points; other hosts are ignored.
+    """
+
+    if mode not in CRAWL_MODES:
+        raise ValueError(f"Unknown crawl mode: {mode!r} (expected one of {', '.join(CRAWL_MODES)})")
+
+    parsed_base = urlparse(base_url)
+    if not parsed_base.scheme:
+        raise ValueError("Base URL must include a scheme, e.g. https://example.com")
+
+    base_netloc = parsed_base.netloc
+    if frontier is None:
+        frontier = MemoryFrontier()
+    if not frontier.resumed:
+        frontier.push(base_url, 0)
+        for seed in seeds:
+            if urlparse(seed).netloc == base_netloc:
+                frontier.push(seed, 0)
+
+    owns_client = client is None
+    if client is None:
+        client = HttpClient(timeout=TIMEOUT_SECONDS, pool_maxsize=max(workers, per_host))
+
+    try:
+        if mode == "async":
+            asyncio.run(_crawl_async(client, frontier, base_netloc, max(1, workers), max(1, per_host), state))
+        else:
+            _crawl_sync(client, frontier, base_netloc, state)
+        frontier.checkpoint()
+    finally:
+        if owns_client:
+            client.close()
+
+    return frontier.as_targets()
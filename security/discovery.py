@@ -0,0 +1,344 @@
+"""Target discovery from robots.txt, sitemaps and OpenAPI documents.
+
+Crawling finds only what `<a>` and `<form>` tags link to, and it is the
+slowest phase on large sites. `discover_sources` reads what the site
+already publishes about itself:
+
+- `robots.txt`: `Sitemap:` entries, and literal `Allow`/`Disallow` paths,
+  which often name the very areas worth probing.
+- Sitemaps: `/sitemap.xml` unless robots.txt lists others. Sitemap indexes
+  are followed, and documents (gzip-compressed or not) are parsed
+  incrementally as they download, so a 50k-URL sitemap never sits in
+  memory.
+- An OpenAPI 3 or Swagger 2 document, from a local file or a URL, in JSON
+  or YAML. It supplies every operation's path and its query, form and body
+  field names.
+
+The pages found can seed the crawl frontier (`discover_targets(seeds=...)`)
+or replace the crawl entirely (`DiscoveredTargets.as_targets()`).
+`merge_targets` then adds the spec's endpoints and exact parameter lists to
+the targets the executor scans. The checks only send GET requests, so the
+operations' HTTP methods are not recorded; probing endpoints with their
+declared methods is left for when the checks support it.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import re
+import xml.etree.ElementTree as ET
+import zlib
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator
+from urllib.parse import parse_qs, quote, urljoin, urlparse
+
+from security.client import READ_CHUNK_BYTES, HttpClient
+from security.frontier import MemoryFrontier
+
+DEFAULT_MAX_URLS = 50_000
+DEFAULT_MAX_SITEMAPS = 1_000
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+# Parameter locations the scanner can place a payload in.
+PARAM_LOCATIONS = frozenset({"query", "formData"})
+BODY_MEDIA_TYPES = ("application/x-www-form-urlencoded", "multipart/form-data", "application/json")
+_PATH_PARAM = re.compile(r"\{([^{}/]+)\}")
+
+
+@dataclass
+class DiscoveredTargets:
+    """Pages and API endpoints found without crawling, with where each came from."""
+
+    pages: list[str] = field(default_factory=list)
+    endpoints: dict[str, set[str]] = field(default_factory=dict)
+    sources: Counter = field(default_factory=Counter)
+    _seen_pages: set[str] = field(default_factory=set, repr=False)
+
+    def add_page(self, url: str, source: str) -> None:
+        if url not in self._seen_pages:
+            self._seen_pages.add(url)
+            self.pages.append(url)
+            self.sources[source] += 1
+
+    def add_endpoint(self, url: str, params: Iterable[str]) -> None:
+        if url not in self.endpoints:
+            self.sources["openapi"] += 1
+        self.endpoints.setdefault(url, set()).update(params)
+
+    def as_targets(self) -> dict:
+        """Targets in `discover_targets` format, for scanning without a crawl."""
+
+        frontier = MemoryFrontier()
+        for url in self.pages:
+            names = parse_qs(urlparse(url).query).keys()
+            frontier.add_page(url)
+            frontier.add_params(names)
+            frontier.add_endpoint_params(url, names)
+        return merge_targets(frontier.as_targets(), self)
+
+    def stats(self) -> dict:
+        return {"pages": len(self.pages), "endpoints": len(self.endpoints), "sources": dict(sorted(self.sources.items()))}
+
+
+def merge_targets(targets: dict, discovered: DiscoveredTargets) -> dict:
+    """Add discovered API endpoints and their parameters to crawled `targets`."""
+
+    endpoint_params = {url: set(names) for url, names in targets.get("endpoint_params", {}).items()}
+    for url, names in discovered.endpoints.items():
+        endpoint_params.setdefault(url, set()).update(names)
+
+    endpoints = sorted(set(targets.get("endpoints", [])) | set(discovered.endpoints))
+
+    return {
+        **targets,
+        "endpoints": endpoints,
+        "params": sorted(set(targets.get("params", [])).union(*discovered.endpoints.values())),
+        "endpoint_params": {url: sorted(endpoint_params.get(url, ())) for url in sorted(set(endpoints) | set(targets.get("pages", [])))},
+    }
+
+
+def _same_host(base_netloc: str, url: str) -> bool:
+    parsed = urlparse(url)
+    return parsed.scheme in ("http", "https") and parsed.netloc == base_netloc
+
+
+def read_robots(client: HttpClient, base_url: str) -> tuple[list[str], list[str]]:
+    """Return the sitemap URLs and the literal Allow/Disallow paths (as URLs) of `robots.txt`."""
+
+    import requests
+
+    try:
+        response = client.get(urljoin(base_url, "/robots.txt"), check="discovery")
+    except requests.RequestException:
+        return [], []
+    if response.status_code != 200:
+        return [], []
+
+    sitemaps: list[str] = []
+    paths: list[str] = []
+    for line in response.text.splitlines():
+        directive, _, value = line.split("#", 1)[0].partition(":")
+        directive, value = directive.strip().lower(), value.strip()
+        if directive == "sitemap" and value:
+            sitemaps.append(urljoin(base_url, value))
+        elif directive in ("allow", "disallow") and value.startswith("/") and value != "/" and not any(c in value for c in "*$"):
+            paths.append(urljoin(base_url, value))
+    return sitemaps, paths
+
+
+def _gunzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Decompress gzip chunks, never producing more than READ_CHUNK_BYTES at a time."""
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk, READ_CHUNK_BYTES)
+        while data:
+            yield data
+            data = decompressor.decompress(decompressor.unconsumed_tail, READ_CHUNK_BYTES) if decompressor.unconsumed_tail else b""
+
+
+def parse_sitemap(chunks: Iterable[bytes]) -> Iterator[tuple[str, str]]:
+    """Yield `("url", loc)` and `("sitemap", loc)` entries from a sitemap or sitemap index as it is fed."""
+
+    chunks = iter(chunks)
+    first = next(chunks, b"")
+    chunks = itertools.chain([first], chunks)
+    if first[:2] == b"\x1f\x8b":
+        chunks = _gunzip(chunks)
+
+    parser = ET.XMLPullParser(events=("start", "end"))
+    stack: list[str] = []
+    root = None
+
+    def entries() -> Iterator[tuple[str, str]]:
+        nonlocal root
+        for event, element in parser.read_events():
+            name = element.tag.rsplit("}", 1)[-1]
+            if event == "start":
+                root = element if root is None else root
+                stack.append(name)
+                continue
+            stack.pop()
+            if name == "loc" and stack and stack[-1] in ("url", "sitemap") and element.text:
+                yield stack[-1], element.text.strip()
+            elif name in ("url", "sitemap"):
+                # Finished entries are not needed again; drop them so the tree stays empty.
+                root.clear()
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from entries()
+    parser.close()
+    yield from entries()
+
+
+def iter_sitemap_urls(
+    client: HttpClient,
+    sitemap_urls: Iterable[str],
+    base_netloc: str,
+    max_urls: int = DEFAULT_MAX_URLS,
+    max_sitemaps: int = DEFAULT_MAX_SITEMAPS,
+) -> Iterator[str]:
+    """Yield same-host page URLs from sitemaps, following sitemap indexes breadth-first.
+
+    Unreachable, malformed or corrupt gzip sitemaps are skipped; URLs read
+    before the error are kept.
+    """
+
+    import requests
+
+    queue = deque(sitemap_urls)
+    seen = set(queue)
+    count = 0
+    while queue and count < max_urls:
+        sitemap_url = queue.popleft()
+        try:
+            for kind, loc in parse_sitemap(client.iter_content(sitemap_url, check="discovery")):
+                if kind == "sitemap":
+                    if loc not in seen and len(seen) < max_sitemaps:
+                        seen.add(loc)
+                        queue.append(loc)
+                elif _same_host(base_netloc, loc):
+                    yield loc
+                    count += 1
+                    if count >= max_urls:
+                        return
+        except (requests.RequestException, ET.ParseError, zlib.error):
+            continue
+
+
+def _resolve(document: dict, node, depth: int = 0):
+    """Follow a local `$ref` (`#/components/...`) to the node it points at."""
+
+    while isinstance(node, dict) and isinstance(node.get("$ref"), str) and node["$ref"].startswith("#/") and depth < 32:
+        target = document
+        for part in node["$ref"][2:].split("/"):
+            target = target.get(part.replace("~1", "/").replace("~0", "~"), {}) if isinstance(target, dict) else {}
+        node = target
+        depth += 1
+    return node
+
+
+def _example_value(document: dict, parameter: dict) -> str:
+    schema = _resolve(document, parameter.get("schema") or parameter)
+    for candidate in (parameter.get("example"), schema.get("example"), schema.get("default"), (schema.get("enum") or [None])[0]):
+        if candidate is not None:
+            return str(candidate)
+    return "1" if schema.get("type") in ("integer", "number") else "test"
+
+
+def _body_fields(document: dict, operation: dict) -> list[str]:
+    content = _resolve(document, operation.get("requestBody") or {}).get("content") or {}
+    names: list[str] = []
+    for media_type in BODY_MEDIA_TYPES:
+        schema = _resolve(document, (content.get(media_type) or {}).get("schema") or {})
+        names.extend(_resolve(document, schema).get("properties") or {})
+    return names
+
+
+def _server_base(document: dict, base_url: str) -> str:
+    """The spec's base path, rebased onto the scan target so only the target is ever probed."""
+
+    if document.get("swagger"):
+        path = document.get("basePath") or "/"
+    else:
+        server = (document.get("servers") or [{}])[0]
+        url = server.get("url") or "/"
+        for name, variable in (server.get("variables") or {}).items():
+            url = url.replace("{" + name + "}", str(variable.get("default", "")))
+        path = urlparse(url).path or "/"
+    target = urlparse(base_url)
+    return f"{target.scheme}://{target.netloc}/{path.strip('/')}".rstrip("/")
+
+
+def _fetch_capped(client: HttpClient, url: str) -> bytes:
+    """GET `url` in full, failing once it exceeds the client's `max_body_bytes`."""
+
+    body = bytearray()
+    chunks = client.iter_content(url, check="discovery")
+    try:
+        for chunk in chunks:
+            body += chunk
+            if client.max_body_bytes is not None and len(body) > client.max_body_bytes:
+                raise ValueError(f"{url} is larger than the {client.max_body_bytes}-byte body limit")
+    finally:
+        chunks.close()
+    return bytes(body)
+
+
+def _load_document(source: str, client: HttpClient | None) -> dict:
+    if urlparse(source).scheme in ("http", "https"):
+        if client is None:
+            raise ValueError("an HttpClient is needed to fetch a served OpenAPI document")
+        text = _fetch_capped(client, source).decode("utf-8")
+    else:
+        text = Path(source).read_text(encoding="utf-8")
+
+    try:
+        document = json.loads(text)
+    except ValueError:
+        import yaml
+
+        document = yaml.safe_load(text)
+    if not isinstance(document, dict) or not isinstance(document.get("paths"), dict):
+        raise ValueError(f"{source} is not an OpenAPI or Swagger document")
+    return document
+
+
+def load_openapi(source: str, base_url: str, client: HttpClient | None = None, discovered: DiscoveredTargets | None = None) -> DiscoveredTargets:
+    """Add every operation of an OpenAPI 3 or Swagger 2 document to `discovered`.
+
+    Path parameters are filled from their example, default or first enum
+    value, else `1` for numbers and `test` otherwise. Query and form
+    parameters and top-level request body fields become the endpoint's
+    parameters.
+    """
+
+    document = _load_document(source, client)
+    discovered = discovered if discovered is not None else DiscoveredTargets()
+    server = _server_base(document, base_url)
+
+    for path, item in document["paths"].items():
+        item = _resolve(document, item)
+        if not isinstance(item, dict):
+            continue
+        shared = [_resolve(document, p) for p in item.get("parameters") or []]
+        for method in HTTP_METHODS:
+            operation = item.get(method)
+            if not isinstance(operation, dict):
+                continue
+            # Operation parameters override path-level ones with the same name and location.
+            parameters = {}
+            for parameter in shared + [_resolve(document, p) for p in operation.get("parameters") or []]:
+                parameters[(parameter.get("name"), parameter.get("in"))] = parameter
+
+            path_values = {name: _example_value(document, p) for (name, location), p in parameters.items() if location == "path"}
+            concrete = _PATH_PARAM.sub(lambda m: quote(path_values.get(m.group(1), "1"), safe=""), path)
+            names = [name for (name, location) in parameters if location in PARAM_LOCATIONS and name]
+            discovered.add_endpoint(server + "/" + concrete.lstrip("/"), names + _body_fields(document, operation))
+    return discovered
+
+
+def discover_sources(
+    base_url: str,
+    client: HttpClient,
+    sitemaps: bool = True,
+    openapi: str | None = None,
+    max_urls: int = DEFAULT_MAX_URLS,
+) -> DiscoveredTargets:
+    """Collect pages from robots.txt and sitemaps, and endpoints from an OpenAPI document."""
+
+    discovered = DiscoveredTargets()
+    base_netloc = urlparse(base_url).netloc
+    if sitemaps:
+        sitemap_urls, robots_paths = read_robots(client, base_url)
+        for url in robots_paths:
+            if _same_host(base_netloc, url):
+                discovered.add_page(url, "robots")
+        for url in iter_sitemap_urls(client, sitemap_urls or [urljoin(base_url, "/sitemap.xml")], base_netloc, max_urls):
+            discovered.add_page(url, "sitemap")
+    if openapi:
+        load_openapi(openapi, base_url, client, discovered)
+    return discovered
@@ -1,5 +1,13 @@
 from __future__ import annotations
 
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable
+from urllib.parse import urlparse
+
+from security.cache import ResponseCache
+from security.client import HttpClient
+from security.routes import cluster_targets
 from security.scanner import (
     test_auth_required_endpoint,
     test_directory_traversal,
@@ -9,25 +17,186 @@ from security.scanner import (
     test_sql_injection,
     test_xss,
 )
+from security.stream import FindingStream
 
+DEFAULT_WORKERS = 1
+DEFAULT_PER_HOST = 4
 
-def run_security_tests(targets: dict) -> list[dict]:
-    """Iterate discovered targets and run all security tests."""
 
-    endpoints = targets.get("endpoints", [])
-    pages = targets.get("pages", [])
-    params = targets.get("params", [])
+class ScanInterrupted(KeyboardInterrupt):
+    """Raised on Ctrl-C with the findings of every check that completed."""
 
-    scan_targets = sorted(set(endpoints + pages))
-    findings: list[dict] = []
+    def __init__(self, findings: list[dict], completed: int, total: int):
+        super().__init__(f"scan interrupted after {completed} of {total} checks")
+        self.findings = findings
+        self.completed = completed
+        self.total = total
+
+
+def _checks() -> list[tuple[str, Callable[..., list[dict]], bool]]:
+    """Checks in report order as (name, function, takes_params)."""
+
+    return [
+        ("sql_injection", test_sql_injection, True),
+        ("xss", test_xss, True),
+        ("open_redirect", test_open_redirect, True),
+        ("security_headers", test_security_headers, False),
+        ("directory_traversal", test_directory_traversal, True),
+        ("auth_required_endpoint", test_auth_required_endpoint, False),
+        ("rate_limit", test_rate_limit, False),
+    ]
+
+
+def check_names() -> list[str]:
+    return [name for name, _, _ in _checks()]
+
+
+def _run_check(check: tuple[str, Callable[..., list[dict]], bool], url: str, params: list[str], client: HttpClient) -> list[dict]:
+    _, func, takes_params = check
+    if takes_params:
+        return func(url, params, client=client)
+    return func(url, client=client)
+
+
+def _run_serial(jobs: list[tuple[str, tuple, list[str]]], client: HttpClient, on_result: Callable[[int, list[dict]], None]) -> None:
+    for index, (url, check, params) in enumerate(jobs):
+        try:
+            on_result(index, _run_check(check, url, params, client))
+        except KeyboardInterrupt:
+            break
+
+
+def _run_parallel(
+    jobs: list[tuple[str, tuple, list[str]]],
+    client: HttpClient,
+    workers: int,
+    per_host: int,
+    on_result: Callable[[int, list[dict]], None],
+) -> None:
+    """Run jobs on a thread pool with at most `per_host` checks in flight per host.
+
+    Jobs are queued per host and dispatched round-robin, so one slow host
+    cannot occupy every worker. Each result is handed to `on_result` with
+    its job index on the calling thread.
+    """
+
+    host_queues: dict[str, deque[int]] = {}
+    for index, (url, _, _) in enumerate(jobs):
+        host_queues.setdefault(urlparse(url).netloc, deque()).append(index)
+
+    host_load: Counter = Counter()
+    in_flight: dict[Future, tuple[int, str]] = {}
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        while host_queues or in_flight:
+            for host in list(host_queues):
+                queue = host_queues[host]
+                while queue and len(in_flight) < workers and host_load[host] < per_host:
+                    index = queue.popleft()
+                    url, check, params = jobs[index]
+                    in_flight[pool.submit(_run_check, check, url, params, client)] = (index, host)
+                    host_load[host] += 1
+                if not queue:
+                    del host_queues[host]
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, host = in_flight.pop(future)
+                host_load[host] -= 1
+                on_result(index, future.result())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
-    for url in scan_targets:
-        findings.extend(test_sql_injection(url, params))
-        findings.extend(test_xss(url, params))
-        findings.extend(test_open_redirect(url, params))
-        findings.extend(test_security_headers(url))
-        findings.extend(test_directory_traversal(url, params))
-        findings.extend(test_auth_required_endpoint(url))
-        findings.extend(test_rate_limit(url))
 
+def select_scan_targets(targets: dict, samples_per_template: int | None = None) -> list[str]:
+    """Return the URLs to scan: every endpoint and page, or samples per route template."""
+
+    urls = set(targets.get("endpoints", []) + targets.get("pages", []))
+    if not samples_per_template:
+        return sorted(urls)
+
+    clusters = cluster_targets(urls, samples_per_template)
+    return sorted(url for cluster in clusters.values() for url in cluster["sampled"])
+
+
+def params_for(targets: dict, url: str) -> list[str]:
+    """Parameters to probe on `url`: its own when the crawler indexed it, else every known one."""
+
+    endpoint_params = targets.get("endpoint_params") or {}
+    if url in endpoint_params:
+        return endpoint_params[url]
+    return targets.get("params", [])
+
+
+def run_security_tests(
+    targets: dict,
+    client: HttpClient | None = None,
+    workers: int = DEFAULT_WORKERS,
+    per_host: int = DEFAULT_PER_HOST,
+    stream: FindingStream | None = None,
+    samples_per_template: int | None = None,
+) -> list[dict]:
+    """Iterate discovered targets and run all security tests.
+
+    Every check shares `client`; when none is given a pooled client with a
+    fresh response cache is created for this run and closed afterwards.
+    With `workers > 1` checks run concurrently, at most `per_host` at a time
+    against any one host. Findings are always returned in target then check
+    order. On Ctrl-C, ScanInterrupted carries the findings gathered so far.
+
+    With a `stream`, each check's findings are appended to it as soon as the
+    check finishes instead of being returned, and (URL, check) pairs the
+    stream already holds are skipped.
+
+    With `samples_per_template`, URLs are grouped into route templates such
+    as `/users/{id}` and only that many samples of each are scanned.
+
+    Each URL is probed with the parameters indexed for it in
+    `targets["endpoint_params"]`; URLs missing from that index fall back to
+    the global `targets["params"]`.
+    """
+
+    scan_targets = select_scan_targets(targets, samples_per_template)
+    checks = _checks()
+    done = stream.completed if stream is not None else set()
+    jobs = [
+        (url, check, params_for(targets, url))
+        for url in scan_targets
+        for check in checks
+        if (url, check[0]) not in done
+    ]
+    results: list[list[dict] | None] = [None] * len(jobs)
+
+    def on_result(index: int, result: list[dict]) -> None:
+        if stream is not None:
+            url, (name, _, _), _ = jobs[index]
+            stream.record(url, name, result)
+            result = []
+        results[index] = result
+
+    owns_client = client is None
+    if client is None:
+        client = HttpClient(cache=ResponseCache())
+
+    try:
+        if workers > 1:
+            _run_parallel(jobs, client, workers, max(1, per_host), on_result)
+        else:
+            _run_serial(jobs, client, on_result)
+    finally:
+        if owns_client:
+            client.close()
+
+    findings: list[dict] = []
+    completed = 0
+    for result in results:
+        if result is not None:
+            completed += 1
+            findings.extend(result)
+
+    if completed < len(jobs):
+        raise ScanInterrupted(findings, completed, len(jobs))
     return findings
@@ -0,0 +1,196 @@
+"""SQLite store of findings across gate runs.
+
+Each run of the aggregator can load the stage reports and the scanner's
+`security-report.json` into one file, tagged with a run label. Reports are
+read with the streaming JSON reader and inserted in batches, and summaries
+and cross-run questions ("what is new for stage X since release Y") are
+answered with indexed SQL instead of re-parsing every report.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import sqlite3
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from security.fingerprint import fingerprint
+from security.runners.parsers import iter_json_array
+
+DEFAULT_STORE_PATH = "security-findings.db"
+INSERT_BATCH_SIZE = 1000
+SCAN_STAGE = "scan"
+
+_COLUMNS = ("stage", "severity", "test", "url", "title", "details", "fingerprint")
+
+
+def _row(run_id: int, finding: dict) -> tuple:
+    values = {
+        "stage": finding.get("stage", ""),
+        "severity": (finding.get("severity") or "unknown").lower(),
+        "test": finding.get("test", ""),
+        "url": finding.get("url", ""),
+        "title": finding.get("title", ""),
+        "details": finding.get("details", ""),
+    }
+    values["fingerprint"] = finding.get("fingerprint") or fingerprint(values)
+    return (run_id, *(values[column] for column in _COLUMNS))
+
+
+class FindingsStore:
+    """Findings of many runs in one SQLite file, indexed for per-run and cross-run queries."""
+
+    _SCHEMA = """
+        PRAGMA journal_mode = WAL;
+        CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, label TEXT NOT NULL UNIQUE, created_at REAL NOT NULL);
+        CREATE TABLE IF NOT EXISTS findings (
+            id INTEGER PRIMARY KEY,
+            run_id INTEGER NOT NULL REFERENCES runs (id),
+            stage TEXT NOT NULL,
+            severity TEXT NOT NULL,
+            test TEXT NOT NULL,
+            url TEXT NOT NULL,
+            title TEXT NOT NULL,
+            details TEXT NOT NULL,
+            fingerprint TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS findings_run_stage_severity ON findings (run_id, stage, severity);
+        CREATE INDEX IF NOT EXISTS findings_run_severity ON findings (run_id, severity);
+        CREATE INDEX IF NOT EXISTS findings_test ON findings (test, run_id);
+        CREATE INDEX IF NOT EXISTS findings_url ON findings (url, run_id);
+        CREATE INDEX IF NOT EXISTS findings_fingerprint ON findings (fingerprint, run_id);
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.executescript(self._SCHEMA)
+
+    def start_run(self, label: str | None = None) -> int:
+        """Create the run `label` (a timestamp by default); re-using a label replaces its findings."""
+
+        label = label or time.strftime("%Y%m%dT%H%M%S")
+        self._conn.execute("INSERT OR IGNORE INTO runs (label, created_at) VALUES (?, ?)", (label, time.time()))
+        run_id = self.run_id(label)
+        self._conn.execute("DELETE FROM findings WHERE run_id = ?", (run_id,))
+        self._conn.commit()
+        return run_id
+
+    def run_id(self, label: str) -> int | None:
+        row = self._conn.execute("SELECT id FROM runs WHERE label = ?", (label,)).fetchone()
+        return row[0] if row else None
+
+    def insert_findings(self, run_id: int, findings: Iterable[dict], batch_size: int = INSERT_BATCH_SIZE) -> int:
+        """Insert findings in batches of `batch_size`, committing once at the end."""
+
+        placeholders = ", ".join("?" * (len(_COLUMNS) + 1))
+        sql = f"INSERT INTO findings (run_id, {', '.join(_COLUMNS)}) VALUES ({placeholders})"
+        rows = (_row(run_id, finding) for finding in findings)
+        count = 0
+        while batch := list(itertools.islice(rows, batch_size)):
+            self._conn.executemany(sql, batch)
+            count += len(batch)
+        self._conn.commit()
+        return count
+
+    def ingest_stage_reports(self, run_id: int, paths: Iterable[Path]) -> int:
+        """Load `findings` from each stage report without reading whole files into memory."""
+
+        return self.insert_findings(run_id, itertools.chain.from_iterable(iter_json_array(path, "findings") for path in paths))
+
+    def ingest_scan_report(self, run_id: int, path: str | Path) -> int:
+        """Load `issues` from a scanner report; evidence becomes the finding details."""
+
+        def issues() -> Iterator[dict]:
+            for issue in iter_json_array(path, "issues"):
+                yield {
+                    "stage": SCAN_STAGE,
+                    "severity": issue.get("severity"),
+                    "test": issue.get("test", ""),
+                    "url": issue.get("url", ""),
+                    "title": issue.get("test", ""),
+                    "details": issue.get("evidence", ""),
+                    "fingerprint": issue.get("fingerprint"),
+                }
+
+        return self.insert_findings(run_id, issues())
+
+    def severity_summary(self, run_id: int, stage: str | None = None) -> Counter:
+        sql = "SELECT severity, COUNT(*) FROM findings WHERE run_id = ?"
+        args: list = [run_id]
+        if stage is not None:
+            sql += " AND stage = ?"
+            args.append(stage)
+        return Counter(dict(self._conn.execute(sql + " GROUP BY severity", args).fetchall()))
+
+    def stage_summary(self, run_id: int) -> dict[str, dict[str, int]]:
+        summary: dict[str, dict[str, int]] = {}
+        rows = self._conn.execute(
+            "SELECT stage, severity, COUNT(*) FROM findings WHERE run_id = ? GROUP BY stage, severity ORDER BY stage, severity",
+            (run_id,),
+        )
+        for stage, severity, count in rows:
+            summary.setdefault(stage, {})[severity] = count
+        return summary
+
+    def iter_findings(self, run_id: int) -> Iterator[dict]:
+        for row in self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM findings WHERE run_id = ? ORDER BY id", (run_id,)):
+            yield dict(zip(_COLUMNS, row))
+
+    def new_since(self, run_id: int, baseline_run_id: int, stage: str | None = None) -> Iterator[dict]:
+        """Yield findings of `run_id` whose fingerprint does not occur in `baseline_run_id`."""
+
+        sql = f"""
+            SELECT {', '.join(_COLUMNS)} FROM findings AS f
+            WHERE f.run_id = ? AND NOT EXISTS (
+                SELECT 1 FROM findings AS b WHERE b.fingerprint = f.fingerprint AND b.run_id = ?
+            )
+        """
+        args: list = [run_id, baseline_run_id]
+        if stage is not None:
+            sql += " AND f.stage = ?"
+            args.append(stage)
+        for row in self._conn.execute(sql + " ORDER BY f.id", args):
+            yield dict(zip(_COLUMNS, row))
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> FindingsStore:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _require_run(store: FindingsStore, label: str) -> int:
+    run_id = store.run_id(label)
+    if run_id is None:
+        raise SystemExit(f"unknown run label: {label!r}")
+    return run_id
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the findings store")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="SQLite findings store path")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summary_parser = subparsers.add_parser("summary", help="Severity counts per stage for one run")
+    summary_parser.add_argument("run", help="Run label")
+    new_parser = subparsers.add_parser("new", help="Findings of a run that were not present in an earlier run")
+    new_parser.add_argument("run", help="Run label")
+    new_parser.add_argument("--since", required=True, help="Baseline run label")
+    new_parser.add_argument("--stage", help="Only findings of this stage")
+    args = parser.parse_args()
+
+    with FindingsStore(args.store) as store:
+        run_id = _require_run(store, args.run)
+        if args.command == "summary":
+            print(json.dumps(store.stage_summary(run_id), indent=2))
+        else:
+            for finding in store.new_since(run_id, _require_run(store, args.since), stage=args.stage):
+                print(json.dumps(finding))
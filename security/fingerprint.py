@@ -0,0 +1,93 @@
+"""Stable finding fingerprints and baseline files.
+
+A fingerprint identifies a finding across runs from its stage, normalized
+test name, URL route template and normalized evidence, so the same issue
+keeps its fingerprint when an ID in the URL, a line number or a timestamp
+in the evidence changes. A baseline is a text file with one fingerprint
+per line; it is loaded into a set, so checking a finding against hundreds
+of thousands of known ones is a single hash lookup.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Iterable
+from urllib.parse import parse_qs, urlparse
+
+from security.routes import route_template
+
+DEFAULT_BASELINE_PATH = "security/findings-baseline.txt"
+EVIDENCE_CHARS = 500
+
+_UUID = re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b")
+_HEX = re.compile(r"\b(?=[0-9a-f]*\d)[0-9a-f]{8,}\b")
+_TIMESTAMP = re.compile(r"\b\d{4}-\d{2}-\d{2}(?:[t ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:z|[+-]\d{2}:?\d{2})?)?\b")
+# Only standalone numbers such as line numbers, counts and numeric path
+# segments; digits inside names (`file1.py`), identifiers (`CVE-2023-1234`)
+# and versions (`2.0.1`) tell findings apart.
+_NUMBER = re.compile(r"(?<![\w.-])\d+(?![\w-]|\.\d)")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_test(finding: dict) -> str:
+    return _SPACE.sub(" ", str(finding.get("test") or finding.get("title") or "")).strip().lower()
+
+
+def url_template(url: str) -> str:
+    """Route template of `url` plus its sorted query parameter names (values are dropped).
+
+    Only ID, UUID and hash segments are templated. Hyphenated segments are
+    kept, since `/admin/audit-log-export` and `/admin/delete-all-users` are
+    different handlers and a finding on one must not mark the other known.
+    """
+
+    if not url:
+        return ""
+    names = sorted(parse_qs(urlparse(url).query, keep_blank_values=True))
+    return route_template(url, slugs=False) + ("?" + "&".join(names) if names else "")
+
+
+def normalize_evidence(evidence: str) -> str:
+    text = str(evidence or "").lower()
+    text = _UUID.sub("{uuid}", text)
+    text = _HEX.sub("{hash}", text)
+    text = _TIMESTAMP.sub("{timestamp}", text)
+    text = _NUMBER.sub("#", text)
+    return _SPACE.sub(" ", text).strip()[:EVIDENCE_CHARS]
+
+
+def fingerprint(finding: dict) -> str:
+    """Return a 32-hex-digit fingerprint for a stage finding or a scanner issue."""
+
+    parts = (
+        str(finding.get("stage") or ""),
+        normalize_test(finding),
+        url_template(str(finding.get("url") or "")),
+        normalize_evidence(finding.get("details") or finding.get("evidence") or ""),
+    )
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:32]
+
+
+def load_baseline(path: str | Path) -> set[str]:
+    """Read a baseline file into a set; a missing file is an empty baseline."""
+
+    path = Path(path)
+    if not path.exists():
+        return set()
+    with path.open("r", encoding="utf-8") as handle:
+        return {line.strip() for line in handle if line.strip() and not line.startswith("#")}
+
+
+def write_baseline(path: str | Path, fingerprints: Iterable[str]) -> int:
+    """Write fingerprints sorted, one per line, so baseline updates diff cleanly."""
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    unique = sorted(set(fingerprints))
+    with path.open("w", encoding="utf-8") as handle:
+        handle.write("# Known finding fingerprints; regenerate with `python -m security.aggregate_report --write-baseline`.\n")
+        for value in unique:
+            handle.write(value + "\n")
+    return len(unique)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import sys
+from collections import deque
+from pathlib import Path
+from urllib.parse import urlparse
+
+DEFAULT_CHECKPOINT_EVERY = 50
+
+
+class FormRecord:
+    """A discovered form, readable as `form["action"]` like the dicts it replaced.
+
+    Uses `__slots__` and interned strings: large crawls record many forms
+    whose page, action, method and input names repeat across pages.
+    """
+
+    __slots__ = ("page", "action", "method", "inputs")
+
+    def __init__(self, page: str, action: str, method: str, inputs):
+        self.page = sys.intern(page)
+        self.action = sys.intern(action)
+        self.method = sys.intern(method)
+        self.inputs = tuple(sys.intern(name) for name in inputs)
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def keys(self) -> tuple[str, ...]:
+        return self.__slots__
+
+    def as_dict(self) -> dict:
+        return {"page": self.page, "action": self.action, "method": self.method, "inputs": list(self.inputs)}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, FormRecord):
+            other = other.as_dict()
+        return self.as_dict() == other
+
+    def __repr__(self) -> str:
+        return f"FormRecord({self.as_dict()!r})"
+
+
+def _targets(pages, forms: list[FormRecord], params, endpoints, endpoint_params: dict[str, set[str]]) -> dict:
+    endpoints = set(endpoints)
+    pages = set(pages)
+    for candidate in list(endpoints) + list(pages):
+        path = urlparse(candidate).path.lower()
+        if "/api" in path or path.endswith(".json"):
+            endpoints.add(candidate)
+
+    return {
+        "pages": sorted(pages),
+        "forms": forms,
+        "params": sorted(set(params)),
+        "endpoints": sorted(endpoints),
+        "endpoint_params": {url: sorted(endpoint_params.get(url, ())) for url in sorted(endpoints | pages)},
+    }
+
+
+class MemoryFrontier:
+    """In-memory crawl queue, visited set and discovered targets.
+
+    URLs and parameter names are interned, so the copies shared by the
+    visited set, pages, endpoints and the per-endpoint parameter index cost
+    one string each.
+    """
+
+    resumed = False
+
+    def __init__(self):
+        self._queue: deque[tuple[str, int]] = deque()
+        self._queued: set[str] = set()
+        self._visited: set[str] = set()
+        self.pages: set[str] = set()
+        self.params: set[str] = set()
+        self.endpoints: set[str] = set()
+        self.forms: list[FormRecord] = []
+        self.endpoint_params: dict[str, set[str]] = {}
+
+    def push(self, url: str, depth: int) -> None:
+        if url in self._visited or url in self._queued:
+            return
+        url = sys.intern(url)
+        self._queued.add(url)
+        self._queue.append((url, depth))
+
+    def pop_batch(self, limit: int) -> list[tuple[str, int]]:
+        """Mark and return up to `limit` queued URLs that share the lowest depth."""
+
+        batch: list[tuple[str, int]] = []
+        while self._queue and len(batch) < limit:
+            if batch and self._queue[0][1] != batch[0][1]:
+                break
+            url, depth = self._queue.popleft()
+            self._queued.discard(url)
+            self._visited.add(url)
+            batch.append((url, depth))
+        return batch
+
+    def add_page(self, url: str) -> None:
+        self.pages.add(sys.intern(url))
+
+    def add_params(self, names) -> None:
+        self.params.update(sys.intern(name) for name in names)
+
+    def add_endpoint(self, url: str) -> None:
+        self.endpoints.add(sys.intern(url))
+
+    def add_endpoint_params(self, url: str, names) -> None:
+        self.endpoint_params.setdefault(sys.intern(url), set()).update(sys.intern(name) for name in names)
+
+    def add_form(self, form: FormRecord) -> None:
+        self.forms.append(form)
+
+    def maybe_checkpoint(self) -> None:
+        pass
+
+    def checkpoint(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def as_targets(self) -> dict:
+        return _targets(self.pages, self.forms, self.params, self.endpoints, self.endpoint_params)
+
+
+class SqliteFrontier:
+    """Disk-backed crawl state that survives restarts and exceeds RAM.
+
+    The queue, visited URLs with their depths, and the pages, forms, params
+    and endpoints found so far live in a SQLite file. Changes are committed
+    once at least `checkpoint_every` pages were recorded and the current
+    batch is fully processed; a crash rolls back to the previous checkpoint,
+    which returns any pages popped since then to the queue.
+    Reopening with `resume=True` for the same base URL continues the crawl.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS queue (seq INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL UNIQUE, depth INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS visited (url TEXT PRIMARY KEY, depth INTEGER NOT NULL) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS params (name TEXT PRIMARY KEY) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS endpoints (url TEXT PRIMARY KEY) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS forms (id INTEGER PRIMARY KEY, page TEXT, action TEXT, method TEXT, inputs TEXT);
+        CREATE TABLE IF NOT EXISTS endpoint_params (url TEXT NOT NULL, name TEXT NOT NULL, PRIMARY KEY (url, name)) WITHOUT ROWID;
+    """
+    _TABLES = ("meta", "queue", "visited", "pages", "params", "endpoints", "forms", "endpoint_params")
+
+    def __init__(
+        self,
+        path: str | Path,
+        base_url: str,
+        resume: bool = False,
+        checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.checkpoint_every = max(1, checkpoint_every)
+        self._since_checkpoint = 0
+
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.executescript(self._SCHEMA)
+
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'base_url'").fetchone()
+        self.resumed = bool(resume and row is not None and row[0] == base_url)
+        if not self.resumed:
+            for table in self._TABLES:
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('base_url', ?)", (base_url,))
+            self._conn.commit()
+
+    def push(self, url: str, depth: int) -> None:
+        if self._conn.execute("SELECT 1 FROM visited WHERE url = ?", (url,)).fetchone():
+            return
+        self._conn.execute("INSERT OR IGNORE INTO queue (url, depth) VALUES (?, ?)", (url, depth))
+
+    def pop_batch(self, limit: int) -> list[tuple[str, int]]:
+        """Mark and return up to `limit` queued URLs that share the lowest depth."""
+
+        rows = self._conn.execute(
+            "SELECT seq, url, depth FROM queue WHERE depth = (SELECT MIN(depth) FROM queue) ORDER BY seq LIMIT ?",
+            (limit,),
+        ).fetchall()
+        self._conn.executemany("DELETE FROM queue WHERE seq = ?", [(seq,) for seq, _, _ in rows])
+        self._conn.executemany("INSERT OR IGNORE INTO visited (url, depth) VALUES (?, ?)", [(url, depth) for _, url, depth in rows])
+        return [(url, depth) for _, url, depth in rows]
+
+    def add_page(self, url: str) -> None:
+        self._conn.execute("INSERT OR IGNORE INTO pages (url) VALUES (?)", (url,))
+        self._since_checkpoint += 1
+
+    def add_params(self, names) -> None:
+        self._conn.executemany("INSERT OR IGNORE INTO params (name) VALUES (?)", [(name,) for name in names])
+
+    def add_endpoint(self, url: str) -> None:
+        self._conn.execute("INSERT OR IGNORE INTO endpoints (url) VALUES (?)", (url,))
+
+    def add_endpoint_params(self, url: str, names) -> None:
+        self._conn.executemany("INSERT OR IGNORE INTO endpoint_params (url, name) VALUES (?, ?)", [(url, name) for name in names])
+
+    def add_form(self, form: FormRecord) -> None:
+        self._conn.execute(
+            "INSERT INTO forms (page, action, method, inputs) VALUES (?, ?, ?, ?)",
+            (form.page, form.action, form.method, json.dumps(list(form.inputs))),
+        )
+
+    def maybe_checkpoint(self) -> None:
+        """Commit if enough pages were recorded; call only between batches."""
+
+        if self._since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        self._conn.commit()
+        self._since_checkpoint = 0
+
+    def close(self) -> None:
+        """Close without committing, discarding work since the last checkpoint."""
+
+        self._conn.close()
+
+    def as_targets(self) -> dict:
+        forms = [
+            FormRecord(page, action, method, json.loads(inputs))
+            for page, action, method, inputs in self._conn.execute("SELECT page, action, method, inputs FROM forms ORDER BY id")
+        ]
+        endpoint_params: dict[str, set[str]] = {}
+        for url, name in self._conn.execute("SELECT url, name FROM endpoint_params"):
+            endpoint_params.setdefault(url, set()).add(name)
+        return _targets(
+            (url for (url,) in self._conn.execute("SELECT url FROM pages")),
+            forms,
+            (name for (name,) in self._conn.execute("SELECT name FROM params")),
+            (url for (url,) in self._conn.execute("SELECT url FROM endpoints")),
+            endpoint_params,
+        )
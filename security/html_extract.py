@@ -0,0 +1,79 @@
+"""Single-pass link and form extraction on top of `html.parser`.
+
+The crawler only needs `<a href>`, `<form>` and `<input name>`, so instead
+of building a document tree this parser keeps a stack of open tag names and
+emits links and forms as the tokenizer reports them. Open/close handling
+follows BeautifulSoup's `html.parser` builder, so results match
+`soup.find_all("a", href=True)` and `form.find_all("input")`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+
+# Tags BeautifulSoup treats as empty elements: they never enclose content.
+VOID_TAGS = frozenset(
+    {
+        "area", "base", "basefont", "bgsound", "br", "col", "command", "embed", "frame", "hr", "image",
+        "img", "input", "isindex", "keygen", "link", "menuitem", "meta", "nextid", "param", "source",
+        "spacer", "track", "wbr",
+    }
+)
+
+
+@dataclass
+class HtmlForm:
+    action: str
+    method: str
+    inputs: list[str] = field(default_factory=list)
+
+
+class _LinkFormParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links: list[str] = []
+        self.forms: list[HtmlForm] = []
+        self._stack: list[str] = []
+        self._open_forms: list[tuple[int, HtmlForm]] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag == "a":
+            values = dict(attrs)
+            if "href" in values:
+                self.links.append(values["href"] or "")
+        elif tag == "form":
+            values = dict(attrs)
+            form = HtmlForm(action=values.get("action") or "", method=values.get("method") or "")
+            self.forms.append(form)
+            self._open_forms.append((len(self._stack), form))
+        elif tag == "input" and self._open_forms:
+            name = dict(attrs).get("name")
+            if name:
+                for _, form in self._open_forms:
+                    form.inputs.append(name)
+
+        if tag not in VOID_TAGS:
+            self._stack.append(tag)
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth] == tag:
+                del self._stack[depth:]
+                while self._open_forms and self._open_forms[-1][0] >= depth:
+                    self._open_forms.pop()
+                return
+
+
+def extract_links_and_forms(html: str) -> tuple[list[str], list[HtmlForm]]:
+    """Return raw `href` values and forms in document order."""
+
+    parser = _LinkFormParser()
+    parser.feed(html)
+    parser.close()
+    return parser.links, parser.forms
@@ -0,0 +1,260 @@
+"""Per-request metrics for the crawl and scan phases.
+
+`HttpClient` reports every request that reaches the network to a
+`ScanMetrics`: latency into a fixed-bucket histogram, response bytes,
+status code, urllib3 retries and errors, all keyed by (check, host). The
+crawler's requests use the `crawl` label. `stats()` is the report's
+`metrics` section, together with the process's peak RSS;
+`write_openmetrics()` exports the same data as an OpenMetrics text file,
+and `ProgressLine` prints the live request rate.
+"""
+
+from __future__ import annotations
+
+import heapq
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, TextIO
+from urllib.parse import urlparse
+
+DEFAULT_METRICS_PATH = "security-metrics.txt"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RATE_WINDOW_SECONDS = 10.0
+SLOWEST_KEPT = 10
+METRIC_PREFIX = "security_scan"
+
+
+@dataclass
+class _Series:
+    buckets: list[int]
+    requests: int = 0
+    seconds: float = 0.0
+    bytes: int = 0
+    retries: int = 0
+    statuses: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+
+    def merge(self, other: _Series) -> None:
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.requests += other.requests
+        self.seconds += other.seconds
+        self.bytes += other.bytes
+        self.retries += other.retries
+        self.statuses.update(other.statuses)
+        self.errors.update(other.errors)
+
+
+def _quantile(bounds: tuple[float, ...], buckets: list[int], fraction: float) -> float:
+    """Estimate a quantile from bucket counts, interpolating within the bucket that holds it."""
+
+    total = sum(buckets)
+    if not total:
+        return 0.0
+    rank = fraction * total
+    seen = 0
+    lower = 0.0
+    for bound, count in zip(bounds + (float("inf"),), buckets):
+        if count and seen + count >= rank:
+            if bound == float("inf"):
+                return lower
+            return lower + (bound - lower) * (rank - seen) / count
+        seen += count
+        lower = bound
+    return lower
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process in MiB, or None where it is not available."""
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class ScanMetrics:
+    """Thread-safe request metrics keyed by (check, host)."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS, clock: Callable[[], float] = time.monotonic):
+        self.bounds = tuple(sorted(buckets))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._series: dict[tuple[str, str], _Series] = {}
+        self._recent: deque[float] = deque()
+        self._slowest: list[tuple[float, str, str]] = []
+        self.started = clock()
+        self.requests = 0
+        self.errors = 0
+
+    def _new_series(self) -> _Series:
+        return _Series(buckets=[0] * (len(self.bounds) + 1))
+
+    def observe(
+        self,
+        url: str,
+        check: str | None,
+        seconds: float,
+        status: int | None = None,
+        size: int = 0,
+        retries: int = 0,
+        error: str | None = None,
+    ) -> None:
+        parsed = urlparse(url)
+        key = (check or "unlabelled", parsed.netloc)
+        index = next((i for i, bound in enumerate(self.bounds) if seconds <= bound), len(self.bounds))
+        now = self._clock()
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = self._new_series()
+            series.buckets[index] += 1
+            series.requests += 1
+            series.seconds += seconds
+            series.bytes += size
+            series.retries += retries
+            if status is not None:
+                series.statuses[status] += 1
+            if error is not None:
+                series.errors[error] += 1
+                self.errors += 1
+            self.requests += 1
+
+            self._recent.append(now)
+            while self._recent and self._recent[0] < now - RATE_WINDOW_SECONDS:
+                self._recent.popleft()
+
+            entry = (seconds, key[0], f"{parsed.scheme}://{parsed.netloc}{parsed.path}")
+            if len(self._slowest) < SLOWEST_KEPT:
+                heapq.heappush(self._slowest, entry)
+            elif entry > self._slowest[0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def rate(self) -> float:
+        """Requests per second over the last RATE_WINDOW_SECONDS."""
+
+        now = self._clock()
+        with self._lock:
+            while self._recent and self._recent[0] < now - RATE_WINDOW_SECONDS:
+                self._recent.popleft()
+            recent = len(self._recent)
+        return recent / min(RATE_WINDOW_SECONDS, max(now - self.started, 1e-9))
+
+    def _grouped(self, position: int) -> dict[str, _Series]:
+        grouped: dict[str, _Series] = {}
+        for key, series in self._series.items():
+            grouped.setdefault(key[position], self._new_series()).merge(series)
+        return grouped
+
+    def _summary(self, series: _Series) -> dict:
+        return {
+            "requests": series.requests,
+            "errors": dict(series.errors),
+            "bytes": series.bytes,
+            "retries": series.retries,
+            "statuses": {str(status): count for status, count in sorted(series.statuses.items())},
+            "latency_seconds": {
+                "mean": round(series.seconds / series.requests, 4) if series.requests else 0.0,
+                "p50": round(_quantile(self.bounds, series.buckets, 0.50), 4),
+                "p95": round(_quantile(self.bounds, series.buckets, 0.95), 4),
+            },
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            elapsed = self._clock() - self.started
+            total = self._new_series()
+            for series in self._series.values():
+                total.merge(series)
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "bytes": total.bytes,
+                "retries": total.retries,
+                "elapsed_seconds": round(elapsed, 3),
+                "requests_per_second": round(self.requests / elapsed, 2) if elapsed > 0 else 0.0,
+                "peak_rss_mb": peak_rss_mb(),
+                "checks": {name: self._summary(s) for name, s in sorted(self._grouped(0).items())},
+                "hosts": {name: self._summary(s) for name, s in sorted(self._grouped(1).items())},
+                "slowest": [
+                    {"seconds": round(seconds, 4), "check": check, "url": url}
+                    for seconds, check, url in sorted(self._slowest, reverse=True)
+                ],
+            }
+
+    def write_openmetrics(self, path: str | Path) -> None:
+        name = f"{METRIC_PREFIX}_request_duration_seconds"
+        lines = [
+            f"# TYPE {name} histogram",
+            f"# UNIT {name} seconds",
+            f"# HELP {name} Latency of requests that reached the network.",
+        ]
+        counters: dict[str, list[str]] = {"responses": [], "response_bytes": [], "retries": [], "errors": []}
+        with self._lock:
+            for (check, host), series in sorted(self._series.items()):
+                labels = f'check="{_label_value(check)}",host="{_label_value(host)}"'
+                cumulative = 0
+                for bound, count in zip(self.bounds + (float("inf"),), series.buckets):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"{name}_count{{{labels}}} {series.requests}")
+                lines.append(f"{name}_sum{{{labels}}} {series.seconds!r}")
+                for status, count in sorted(series.statuses.items()):
+                    counters["responses"].append(f'{{{labels},status="{status}"}} {count}')
+                counters["response_bytes"].append(f"{{{labels}}} {series.bytes}")
+                counters["retries"].append(f"{{{labels}}} {series.retries}")
+                for error, count in sorted(series.errors.items()):
+                    counters["errors"].append(f'{{{labels},error="{_label_value(error)}"}} {count}')
+
+        help_text = {
+            "responses": "Responses by HTTP status.",
+            "response_bytes": "Response body bytes received.",
+            "retries": "Connection retries performed by urllib3.",
+            "errors": "Requests that failed without a response.",
+        }
+        for family, samples in counters.items():
+            metric = f"{METRIC_PREFIX}_{family}"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"# HELP {metric} {help_text[family]}")
+            lines.extend(f"{metric}_total{sample}" for sample in samples)
+        lines.append("# EOF")
+        Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+class ProgressLine:
+    """Rewrite one status line with the request count and rate every `interval` seconds."""
+
+    def __init__(self, metrics: ScanMetrics, interval: float = 1.0, stream: TextIO | None = None):
+        self.metrics = metrics
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="scan-progress", daemon=True)
+
+    def _line(self) -> str:
+        return f"\r  requests={self.metrics.requests} rate={self.metrics.rate():.1f}/s errors={self.metrics.errors}"
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.stream.write(self._line())
+            self.stream.flush()
+
+    def __enter__(self) -> ProgressLine:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.stream.write(self._line() + "\n")
+        self.stream.flush()
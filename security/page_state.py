@@ -0,0 +1,197 @@
+"""Per-URL state that lets nightly re-scans skip what did not change.
+
+A `PageStateStore` is a SQLite file holding, for every crawled page, its
+ETag, Last-Modified, a hash of the body and the links and forms extracted
+from it, plus the findings of the last scan for every (URL, check) pair.
+
+On the next crawl each page is requested with `If-None-Match` and
+`If-Modified-Since`. A 304, or a body whose hash is unchanged, replays the
+stored links and forms instead of parsing the page. Non-HTML bodies are
+not downloaded; they are compared by their Content-Length, ETag and
+Last-Modified headers instead. A page that changed
+or is new is parsed as usual. That page, and every URL it links to or
+submits forms to, is then marked dirty, because their parameters may have
+changed.
+
+Before the scan, `carry_forward` copies the stored findings of every clean
+URL into the findings journal, so `run_security_tests` only runs the checks
+for dirty or new URLs. Checks that judge response headers rather than the
+body are never carried forward: a deploy can change CSP or HSTS without
+touching a page's body or ETag, so they run on every URL each time. `save` replaces the stored findings with the journal
+and commits; a scan that does not finish commits nothing, so the next run
+sees the same changes again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Iterable
+
+from security.stream import FindingStream, iter_records
+
+DEFAULT_STATE_PATH = "security-page-state.db"
+# Checks whose findings depend on response headers, which neither a 304 nor a body hash vouches for.
+HEADER_CHECKS = frozenset({"security_headers"})
+
+# Links and forms extracted from a page: absolute link targets and (action URL, method, input names).
+Document = tuple[list[str], list[tuple[str, str, list[str]]]]
+
+
+# Headers that identify a body the client skipped (non-HTML content).
+ENTITY_HEADERS = ("Content-Type", "Content-Length", "ETag", "Last-Modified")
+
+
+def content_hash(response) -> str | None:
+    """Hash of the status code and body, or of its entity headers when the body was skipped.
+
+    A skipped body without Content-Length, ETag or Last-Modified cannot be
+    compared, so None is returned and the URL counts as changed every run.
+    """
+
+    if response is None:
+        return None
+    if getattr(response, "skipped", False):
+        headers = getattr(response, "headers", None) or {}
+        if not any(headers.get(name) for name in ENTITY_HEADERS[1:]):
+            return None
+        entity = "\x1f".join(["skipped", str(response.status_code)] + [str(headers.get(name) or "") for name in ENTITY_HEADERS])
+        return hashlib.sha256(entity.encode("utf-8")).hexdigest()
+    content = getattr(response, "content", None)
+    if not isinstance(content, (bytes, bytearray)):
+        content = (getattr(response, "text", "") or "").encode("utf-8")
+    return hashlib.sha256(f"{response.status_code}\x1f".encode("utf-8") + content).hexdigest()
+
+
+class PageStateStore:
+    """SQLite store of page validators, extracted documents and last findings."""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS pages (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            content_hash TEXT,
+            document TEXT
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS findings (
+            url TEXT NOT NULL,
+            check_name TEXT NOT NULL,
+            findings TEXT NOT NULL,
+            PRIMARY KEY (url, check_name)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_STATE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.executescript(self._SCHEMA)
+        self.unchanged: set[str] = set()
+        self.changed: set[str] = set()
+        self.touched: set[str] = set()
+
+    def validators(self, url: str) -> dict[str, str]:
+        """Conditional request headers for `url` from its last crawl."""
+
+        row = self._conn.execute("SELECT etag, last_modified FROM pages WHERE url = ?", (url,)).fetchone()
+        headers = {}
+        if row is not None and row[0]:
+            headers["If-None-Match"] = row[0]
+        if row is not None and row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def is_unchanged(self, url: str, response) -> bool:
+        """True for a 304 or an identical body; the stored `document(url)` is then current."""
+
+        row = self._conn.execute("SELECT content_hash FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None or response is None:
+            return False
+        if response.status_code != 304 and (row[0] is None or row[0] != content_hash(response)):
+            return False
+
+        if response.status_code != 304:
+            self._update_validators(url, response)
+        self.unchanged.add(url)
+        return True
+
+    def document(self, url: str) -> Document | None:
+        row = self._conn.execute("SELECT document FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        stored = json.loads(row[0])
+        return stored["links"], [tuple(form) for form in stored["forms"]]
+
+    def _update_validators(self, url: str, response) -> None:
+        self._conn.execute(
+            "UPDATE pages SET etag = ?, last_modified = ? WHERE url = ?",
+            (response.headers.get("ETag"), response.headers.get("Last-Modified"), url),
+        )
+
+    def record(self, url: str, response, document: Document | None) -> None:
+        """Store a new or changed page; `document` is None for non-HTML content."""
+
+        headers = getattr(response, "headers", None) or {}
+        stored = None if document is None else json.dumps({"links": document[0], "forms": document[1]})
+        self._conn.execute(
+            "INSERT OR REPLACE INTO pages (url, etag, last_modified, content_hash, document) VALUES (?, ?, ?, ?, ?)",
+            (url, headers.get("ETag"), headers.get("Last-Modified"), content_hash(response), stored),
+        )
+        self.changed.add(url)
+
+    def touch(self, urls: Iterable[str]) -> None:
+        """Mark URLs referenced by a changed page as dirty."""
+
+        self.touched.update(urls)
+
+    def is_dirty(self, url: str) -> bool:
+        return url in self.changed or url in self.touched
+
+    def carry_forward(self, stream: FindingStream, urls: Iterable[str], checks: list[str]) -> int:
+        """Journal the stored findings of clean URLs; return how many (URL, check) pairs were carried.
+
+        Checks in HEADER_CHECKS are never carried, so they re-run on every URL.
+        """
+
+        wanted = set(checks) - HEADER_CHECKS
+        carried = 0
+        for url in urls:
+            if self.is_dirty(url):
+                continue
+            for check, findings in self._conn.execute("SELECT check_name, findings FROM findings WHERE url = ?", (url,)):
+                if check in wanted and (url, check) not in stream.completed:
+                    stream.record(url, check, json.loads(findings))
+                    carried += 1
+        return carried
+
+    def save(self, journal_path: str | Path) -> None:
+        """Replace the stored findings with the journal's and commit the crawl state."""
+
+        # Later journal lines for the same pair replace earlier ones, as in the report.
+        self._conn.execute("DELETE FROM findings")
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO findings (url, check_name, findings) VALUES (?, ?, ?)",
+            ((record["url"], record["check"], json.dumps(record["findings"])) for _, record in iter_records(journal_path)),
+        )
+        self._conn.commit()
+
+    def stats(self) -> dict:
+        return {
+            "unchanged_pages": len(self.unchanged),
+            "changed_pages": len(self.changed),
+            "dirty_urls": len(self.changed | self.touched),
+        }
+
+    def close(self) -> None:
+        """Close without committing, discarding state recorded since the last `save`."""
+
+        self._conn.close()
+
+    def __enter__(self) -> PageStateStore:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,230 @@
+"""Run the security gate stages as a dependency graph with parallel commands.
+
+Stages and their dependencies come from the `pipeline` section of
+`security/config.json`. A stage with a `runner` takes its commands from the
+top-level `commands` map and writes `security/reports/<stage>.json` exactly
+like `python -m <runner>`; other stages run their own `commands`. Every
+command of every ready stage shares one worker pool, so independent stages
+overlap and total time approaches that of the slowest dependency chain.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from security.runners import common
+from security.runners.common import ensure_reports_dir, finish_stage, load_config, run_command
+from security.runners.stage_cache import CachePlan, apply_incremental, plan_stage, restore_report, save_stage
+
+DEFAULT_MAX_WORKERS = 4
+
+
+@dataclass
+class Stage:
+    name: str
+    commands: list[str]
+    depends_on: list[str] = field(default_factory=list)
+    runner: str | None = None
+    gate: bool = False
+    raw_outputs: list[dict] = field(default_factory=list)
+    cache: dict | None = None
+    # Set for runner stages, which write `<stage>.json` with this title for failed commands.
+    failure_title: str | None = None
+
+
+def validate_stages(stages: list[Stage]) -> None:
+    """Raise ValueError for unknown dependencies or a dependency cycle."""
+
+    names = {stage.name for stage in stages}
+    for stage in stages:
+        unknown = sorted(set(stage.depends_on) - names)
+        if unknown:
+            raise ValueError(f"stage {stage.name!r} depends on unknown stages: {', '.join(unknown)}")
+
+    resolved: set[str] = set()
+    remaining = list(stages)
+    while remaining:
+        ready = [stage for stage in remaining if set(stage.depends_on) <= resolved]
+        if not ready:
+            raise ValueError("pipeline stages contain a dependency cycle: " + ", ".join(s.name for s in remaining))
+        resolved.update(stage.name for stage in ready)
+        remaining = [stage for stage in remaining if stage.name not in resolved]
+
+
+def load_stages(config: dict) -> list[Stage]:
+    """Build stages from config, rejecting unknown dependencies and cycles."""
+
+    stage_configs = config.get("pipeline", {}).get("stages", {})
+    commands = config.get("commands", {})
+    raw_outputs = config.get("raw_outputs", {})
+    cache_settings = config.get("stage_cache", {}).get("stages", {})
+
+    stages = []
+    for name, spec in stage_configs.items():
+        runner = spec.get("runner")
+        stages.append(
+            Stage(
+                name=name,
+                commands=list(spec.get("commands", commands.get(name, []) if runner else [])),
+                depends_on=list(spec.get("depends_on", [])),
+                runner=runner,
+                gate=bool(spec.get("gate", False)),
+                raw_outputs=list(raw_outputs.get(name, [])) if runner else [],
+                cache=cache_settings.get(name) if runner else None,
+                failure_title=importlib.import_module(runner).FAILURE_TITLE if runner else None,
+            )
+        )
+
+    validate_stages(stages)
+    return stages
+
+
+def _finish(stage: Stage, execution: list[dict], started_at: float, plan: CachePlan | None) -> None:
+    if stage.failure_title is not None:
+        if plan is not None:
+            apply_incremental(plan, execution)
+        path = finish_stage(stage.name, stage.failure_title, execution, raw_outputs=stage.raw_outputs, started_at=started_at)
+        if plan is not None:
+            save_stage(plan, path, execution)
+        print(f"[{stage.name}] wrote {path}")
+
+
+def run_pipeline(stages: list[Stage], max_workers: int = DEFAULT_MAX_WORKERS, timeout: float | None = None) -> dict:
+    """Run every stage once its dependencies finished; return per-stage results.
+
+    Commands of all ready stages are submitted to one pool of `max_workers`
+    threads. A stage's entries keep the order of its configured commands.
+    Stages with `cache` settings are restored or run incrementally through
+    `security.runners.stage_cache` when their inputs allow it. Raises
+    ValueError for unknown dependencies or a cycle.
+
+    Commands run in their own sessions on worker threads, so a Ctrl-C only
+    reaches this thread; it cancels queued commands, kills running ones and
+    re-raises once their workers have exited.
+    """
+
+    validate_stages(stages)
+    ensure_reports_dir()
+    by_name = {stage.name: stage for stage in stages}
+    done: set[str] = set()
+    started: set[str] = set()
+    execution: dict[str, list[dict | None]] = {}
+    remaining: dict[str, int] = {}
+    started_at: dict[str, float] = {}
+    started_wall: dict[str, float] = {}
+    plans: dict[str, CachePlan] = {}
+    results: dict[str, dict] = {}
+    in_flight: dict[Future, tuple[str, int]] = {}
+    stop = threading.Event()
+
+    def complete(name: str) -> None:
+        stage = by_name[name]
+        entries = [entry for entry in execution[name] if entry is not None]
+        _finish(stage, entries, started_wall[name], plans.get(name))
+        done.add(name)
+        failed = any(entry.get("status") == "failed" for entry in entries)
+        results[name] = {
+            "status": "failed" if failed else "passed",
+            "gate": stage.gate,
+            "seconds": round(time.monotonic() - started_at[name], 3),
+            "execution": entries,
+        }
+        print(f"[{name}] {results[name]['status']} in {results[name]['seconds']}s")
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        try:
+            while len(done) < len(stages):
+                for stage in stages:
+                    if stage.name in started or not set(stage.depends_on) <= done:
+                        continue
+                    started.add(stage.name)
+                    started_at[stage.name] = time.monotonic()
+                    started_wall[stage.name] = time.time()
+                    commands = stage.commands
+                    if stage.cache is not None:
+                        plan = plans[stage.name] = plan_stage(stage.name, stage.commands, stage.raw_outputs, stage.cache)
+                        if plan.hit:
+                            print(f"[{stage.name}] inputs unchanged; restored {restore_report(plan)}")
+                            done.add(stage.name)
+                            results[stage.name] = {"status": "passed", "gate": stage.gate, "seconds": 0.0, "cached": True, "execution": []}
+                            continue
+                        commands = plan.commands
+                    execution[stage.name] = [None] * len(commands)
+                    remaining[stage.name] = len(commands)
+                    print(f"[{stage.name}] started ({len(commands)} commands)")
+                    for index, command in enumerate(commands):
+                        in_flight[pool.submit(run_command, stage.name, command, timeout, index, stop)] = (stage.name, index)
+                    if not commands:
+                        complete(stage.name)
+
+                if not in_flight:
+                    continue
+
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, index = in_flight.pop(future)
+                    execution[name][index] = future.result()
+                    remaining[name] -= 1
+                    if remaining[name] == 0:
+                        complete(name)
+        except BaseException:
+            stop.set()
+            for future in in_flight:
+                future.cancel()
+            raise
+
+    return {stage.name: results[stage.name] for stage in stages}
+
+
+def run_stage(name: str, title: str, config: dict | None = None, timeout: float | None = None, use_cache: bool = True) -> Path:
+    """Run a single runner stage through `run_pipeline` and return its report path."""
+
+    config = config if config is not None else load_config()
+    stage = Stage(
+        name=name,
+        commands=list(config.get("commands", {}).get(name, [])),
+        raw_outputs=list(config.get("raw_outputs", {}).get(name, [])),
+        cache=config.get("stage_cache", {}).get("stages", {}).get(name) if use_cache else None,
+        failure_title=title,
+    )
+    run_pipeline([stage], max_workers=1, timeout=timeout)
+    return common.REPORTS_DIR / f"{name}.json"
+
+
+def runner_main(name: str, title: str, argv: list[str] | None = None) -> Path:
+    """Command line of the `security.runners.run_*` modules."""
+
+    parser = argparse.ArgumentParser(description=f"Run the {name} security stage")
+    parser.add_argument("--timeout", type=float, help="Per-command timeout in seconds")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore the stage result cache and run every command")
+    args = parser.parse_args(argv)
+    return run_stage(name, title, timeout=args.timeout, use_cache=not args.no_cache)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the security gate stages in parallel")
+    parser.add_argument("--max-workers", type=int, help="Commands run at once across all stages")
+    parser.add_argument("--timeout", type=float, help="Per-command timeout in seconds")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore the stage result cache and run every command")
+    args = parser.parse_args()
+
+    config = load_config()
+    if args.no_cache:
+        config.pop("stage_cache", None)
+    pipeline_cfg = config.get("pipeline", {})
+    max_workers = args.max_workers or int(pipeline_cfg.get("max_workers", DEFAULT_MAX_WORKERS))
+    timeout = args.timeout or pipeline_cfg.get("command_timeout_seconds")
+
+    results = run_pipeline(load_stages(config), max_workers=max_workers, timeout=timeout)
+    summary = {name: {k: v for k, v in result.items() if k != "execution"} for name, result in results.items()}
+    print(json.dumps(summary, indent=2))
+
+    gate_failed = any(result["gate"] and result["status"] == "failed" for result in results.values())
+    raise SystemExit(1 if gate_failed else 0)
@@ -2,23 +2,82 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
+from typing import IO, Iterable, Iterator
 
+from security.stream import iter_records
+
+
+def _indented(value, prefix: str) -> str:
+    return json.dumps(value, indent=2).replace("\n", "\n" + prefix)
+
+
+def _write_report(handle: IO[str], target: str, issues: Iterable[dict], sections: dict) -> dict:
+    """Write the report one issue at a time, producing the same text as `json.dumps(report, indent=2)`."""
 
-def _severity_summary(issues: list[dict]) -> dict:
     summary = {"high": 0, "medium": 0, "low": 0}
+
+    handle.write('{\n  "target": ' + json.dumps(target) + ',\n  "issues": [')
+    count = 0
     for issue in issues:
+        handle.write(("," if count else "") + "\n    " + _indented(issue, "    "))
+        count += 1
         sev = issue.get("severity", "").lower()
         if sev in summary:
             summary[sev] += 1
-    return summary
+    handle.write("\n  ]" if count else "]")
+
+    trailer = {"summary": summary, **sections}
+    for key, value in trailer.items():
+        handle.write(",\n  " + json.dumps(key) + ": " + _indented(value, "  "))
+    handle.write("\n}")
+
+    return {"target": target, "issue_count": count, **trailer}
+
+
+def generate_report(
+    target: str,
+    issues: list[dict],
+    output_path: str = "security-report.json",
+    sections: dict | None = None,
+) -> dict:
+    """Write the scan report; `sections` adds extra top-level keys such as cache stats.
+
+    Issues are written one at a time and counted as they are written, so the
+    summary needs no second pass over them.
+    """
+
+    with Path(output_path).open("w", encoding="utf-8") as handle:
+        written = _write_report(handle, target, issues, sections or {})
+    return {"target": target, "issues": issues, "summary": written["summary"], **(sections or {})}
+
+
+def _stream_issues(stream_path: str | Path, check_order: list[str]) -> Iterator[dict]:
+    rank = {name: index for index, name in enumerate(check_order)}
+    latest: dict[tuple[str, str], int] = {}
+    for offset, record in iter_records(stream_path):
+        latest[(record["url"], record["check"])] = offset
+
+    ordered = sorted(latest.items(), key=lambda item: (item[0][0], rank.get(item[0][1], len(rank)), item[0][1]))
+    with Path(stream_path).open("rb") as handle:
+        for _, offset in ordered:
+            handle.seek(offset)
+            yield from json.loads(handle.readline())["findings"]
+
 
+def generate_report_from_stream(
+    target: str,
+    stream_path: str | Path,
+    check_order: list[str],
+    output_path: str = "security-report.json",
+    sections: dict | None = None,
+) -> dict:
+    """Build the report from a findings journal without loading every issue.
 
-def generate_report(target: str, issues: list[dict], output_path: str = "security-report.json") -> dict:
-    report = {
-        "target": target,
-        "issues": issues,
-        "summary": _severity_summary(issues),
-    }
+    Issues are written in URL then `check_order` order, matching
+    `run_security_tests`, regardless of the order checks finished in. The
+    returned dict carries the summary and an issue count instead of the
+    issue list.
+    """
 
-    Path(output_path).write_text(json.dumps(report, indent=2), encoding="utf-8")
-    return report
+    with Path(output_path).open("w", encoding="utf-8") as handle:
+        return _write_report(handle, target, _stream_issues(stream_path, check_order), sections or {})
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import re
+from urllib.parse import urlparse
+
+# Sampling is opt-in: 0 scans every URL.
+DEFAULT_SAMPLES_PER_TEMPLATE = 0
+# Hyphenated segments such as `two-factor-auth` are often distinct static
+# handlers, so a `{slug}` template only counts as one route once this many
+# URLs share it.
+MIN_SLUG_SIBLINGS = 10
+
+_NUMERIC = re.compile(r"^\d+$")
+_UUID = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE)
+_HASH = re.compile(r"^(?=[0-9a-f]*\d)(?=[0-9a-f]*[a-f])[0-9a-f]{16,}$", re.IGNORECASE)
+_SLUG = re.compile(r"^[a-z0-9]+(?:[-_][a-z0-9]+){2,}$")
+_EXTENSION = re.compile(r"^(?P<stem>.+)(?P<ext>\.[a-z0-9]{1,5})$", re.IGNORECASE)
+
+
+def _segment_template(segment: str, slugs: bool = True) -> str:
+    match = _EXTENSION.match(segment)
+    stem, ext = (match["stem"], match["ext"]) if match else (segment, "")
+
+    if _NUMERIC.match(stem):
+        return "{id}" + ext
+    if _UUID.match(stem):
+        return "{uuid}" + ext
+    if _HASH.match(stem):
+        return "{hash}" + ext
+    if slugs and _SLUG.match(stem):
+        return "{slug}" + ext
+    return segment
+
+
+def canonicalize_path(path: str, slugs: bool = True) -> str:
+    """Replace identifier-like path segments with placeholders.
+
+    `/users/42/posts/my-first-post` becomes `/users/{id}/posts/{slug}`.
+    Numeric IDs, UUIDs, hex hashes (16+ chars) and multi-word slugs are
+    recognised; a file extension on the segment is kept. With
+    `slugs=False`, hyphenated segments are kept literally.
+    """
+
+    return "/".join(_segment_template(segment, slugs) if segment else segment for segment in path.split("/"))
+
+
+def route_template(url: str, slugs: bool = True) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}{canonicalize_path(parsed.path, slugs)}"
+
+
+def _spread(urls: list[str], samples: int) -> list[str]:
+    if len(urls) <= samples:
+        return urls
+    if samples == 1:
+        return urls[:1]
+    step = (len(urls) - 1) / (samples - 1)
+    return [urls[round(i * step)] for i in range(samples)]
+
+
+def cluster_targets(urls, samples_per_template: int) -> dict[str, dict]:
+    """Group URLs by route template and pick evenly spaced samples of each.
+
+    Returns `{template: {"count": n, "sampled": [...]}}`; sampling is
+    deterministic so repeated or resumed scans choose the same URLs.
+    Templates with a `{slug}` placeholder shared by fewer than
+    `MIN_SLUG_SIBLINGS` URLs are split back into one group per URL.
+    """
+
+    groups: dict[str, list[str]] = {}
+    for url in sorted(set(urls)):
+        groups.setdefault(route_template(url), []).append(url)
+    for template in [t for t, members in groups.items() if "{slug}" in t and len(members) < MIN_SLUG_SIBLINGS]:
+        for url in groups.pop(template):
+            groups.setdefault(url, []).append(url)
+
+    samples = max(1, samples_per_template)
+    return {
+        template: {"count": len(members), "sampled": _spread(members, samples)}
+        for template, members in sorted(groups.items())
+    }
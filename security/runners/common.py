@@ -1,17 +1,26 @@
 from __future__ import annotations
 
+import itertools
 import json
+import os
 import shutil
+import signal
 import subprocess
+import sys
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator
 
 
 ROOT = Path(__file__).resolve().parents[2]
 SECURITY_DIR = ROOT / "security"
 REPORTS_DIR = SECURITY_DIR / "reports"
+LOGS_DIR = REPORTS_DIR / "logs"
 CONFIG_PATH = SECURITY_DIR / "config.json"
+TAIL_CHARS = 2000
+PROGRESS_INTERVAL_SECONDS = 30
 
 
 @dataclass
@@ -36,54 +45,214 @@ def command_exists(command: str) -> bool:
     return shutil.which(binary) is not None
 
 
-def run_commands(stage: str, commands: Iterable[str]) -> list[dict]:
-    """Run configured commands, recording execution status entries."""
-    ensure_reports_dir()
-    status_entries: list[dict] = []
-
-    for command in commands:
-        if not command_exists(command):
-            status_entries.append(
-                {
-                    "stage": stage,
-                    "status": "warning",
-                    "command": command,
-                    "message": "command not found; stage output may be incomplete",
-                }
-            )
-            continue
+def _tail(path: Path) -> str:
+    """Return the last TAIL_CHARS characters of a log file without reading all of it."""
+    with path.open("rb") as handle:
+        handle.seek(0, os.SEEK_END)
+        handle.seek(max(0, handle.tell() - TAIL_CHARS * 4))
+        return handle.read().decode("utf-8", errors="replace")[-TAIL_CHARS:]
+
+
+def _display_path(path: Path) -> str:
+    try:
+        return str(path.relative_to(ROOT))
+    except ValueError:
+        return str(path)
+
+
+def _kill(proc: subprocess.Popen) -> None:
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except ProcessLookupError:
+        pass
+
+
+def _peak_rss_kb(usage) -> int | None:
+    if usage is None:
+        return None
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere.
+    return usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+
 
-        result = subprocess.run(
+def _wait(proc: subprocess.Popen, timeout: float | None, on_tick, stop: threading.Event | None = None) -> tuple[bool, object]:
+    """Wait for `proc`, polling so progress can be reported; return (timed_out, rusage).
+
+    Raises KeyboardInterrupt once `stop` is set, which is how a pipeline
+    interrupted on its main thread stops commands on worker threads.
+    """
+    start = time.monotonic()
+    interval = 0.01
+    timed_out = False
+    while True:
+        if hasattr(os, "wait4"):
+            pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+            if pid:
+                proc.returncode = os.waitstatus_to_exitcode(status)
+                return timed_out, usage
+        elif proc.poll() is not None:
+            return timed_out, None
+
+        if stop is not None and stop.is_set():
+            raise KeyboardInterrupt(f"stopped while running {proc.args!r}")
+        elapsed = time.monotonic() - start
+        if timeout is not None and elapsed > timeout and not timed_out:
+            _kill(proc)
+            timed_out = True
+        on_tick(elapsed)
+        time.sleep(interval)
+        interval = min(interval * 2, 0.5)
+
+
+def run_command(stage: str, command: str, timeout: float | None = None, index: int = 0, stop: threading.Event | None = None) -> dict:
+    """Run one configured command and return its execution status entry.
+
+    stdout and stderr go straight to `security/reports/logs/<stage>-<index>.*.log`,
+    so memory stays flat however much a tool prints; only the last
+    TAIL_CHARS characters are read back for the entry. A progress line is
+    printed every PROGRESS_INTERVAL_SECONDS while the command runs. Setting
+    `stop` kills the command and raises KeyboardInterrupt.
+    """
+    if not command_exists(command):
+        return {
+            "stage": stage,
+            "status": "warning",
+            "command": command,
+            "message": "command not found; stage output may be incomplete",
+        }
+
+    LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    stdout_path = LOGS_DIR / f"{stage}-{index}.stdout.log"
+    stderr_path = LOGS_DIR / f"{stage}-{index}.stderr.log"
+    next_progress = PROGRESS_INTERVAL_SECONDS
+
+    def on_tick(elapsed: float) -> None:
+        nonlocal next_progress
+        if elapsed >= next_progress:
+            next_progress += PROGRESS_INTERVAL_SECONDS
+            written = (stdout_path.stat().st_size + stderr_path.stat().st_size) / (1024 * 1024)
+            print(f"[{stage}] {command!r} running for {int(elapsed)}s, {written:.1f} MB of output", flush=True)
+
+    start = time.monotonic()
+    with stdout_path.open("wb") as stdout, stderr_path.open("wb") as stderr:
+        proc = subprocess.Popen(
             command,
             shell=True,
             cwd=ROOT,
-            text=True,
-            capture_output=True,
-            check=False,
-        )
-        status_entries.append(
-            {
-                "stage": stage,
-                "status": "passed" if result.returncode == 0 else "failed",
-                "command": command,
-                "returncode": result.returncode,
-                "stdout": result.stdout[-2000:],
-                "stderr": result.stderr[-2000:],
-            }
+            stdout=stdout,
+            stderr=stderr,
+            start_new_session=os.name == "posix",
         )
+        try:
+            timed_out, usage = _wait(proc, timeout, on_tick, stop)
+        except BaseException:
+            # The child runs in its own session, so a terminal Ctrl-C never
+            # reaches it; take it down with the runner instead of orphaning it.
+            _kill(proc)
+            proc.wait()
+            raise
 
-    return status_entries
+    entry = {
+        "stage": stage,
+        "status": "passed" if proc.returncode == 0 and not timed_out else "failed",
+        "command": command,
+        "returncode": proc.returncode,
+        "stdout": _tail(stdout_path),
+        "stderr": _tail(stderr_path),
+        "stdout_log": _display_path(stdout_path),
+        "stderr_log": _display_path(stderr_path),
+        "stdout_bytes": stdout_path.stat().st_size,
+        "stderr_bytes": stderr_path.stat().st_size,
+        "wall_seconds": round(time.monotonic() - start, 3),
+        "peak_rss_kb": _peak_rss_kb(usage),
+    }
+    if timed_out:
+        entry["message"] = f"timed out after {timeout}s"
+    return entry
 
 
-def write_stage_report(stage: str, findings: list[Finding], status: list[dict]) -> Path:
+def run_commands(stage: str, commands: Iterable[str], timeout: float | None = None) -> list[dict]:
+    """Run configured commands, recording execution status entries."""
+    ensure_reports_dir()
+    return [run_command(stage, command, timeout=timeout, index=index) for index, command in enumerate(commands)]
+
+
+def command_failure_findings(stage: str, title: str, execution: list[dict]) -> list[Finding]:
+    """Turn each failed command into a high finding so the gate notices broken stages."""
+    return [
+        Finding(stage=stage, severity="high", title=title, details=entry.get("command", ""))
+        for entry in execution
+        if entry.get("status") == "failed"
+    ]
+
+
+def _raw_findings(
+    stage: str, raw_outputs: list[dict], started_at: float | None, status: list[dict], parsed: list[str]
+) -> Iterator[Finding]:
+    from security.runners.parsers import parse_raw_output
+
+    for output in raw_outputs:
+        path = ROOT / output["path"]
+        # Allow for coarse filesystem timestamps when deciding a file predates this run.
+        if not path.exists() or (started_at is not None and path.stat().st_mtime < started_at - 2):
+            status.append({"stage": stage, "status": "warning", "message": f"raw output {output['path']} missing or stale; not parsed"})
+            continue
+        try:
+            yield from parse_raw_output(stage, path, output["parser"])
+        except ValueError as exc:
+            status.append({"stage": stage, "status": "warning", "message": f"could not parse {output['path']}: {exc}"})
+        else:
+            parsed.append(output["path"])
+
+
+def finish_stage(
+    stage: str,
+    title: str,
+    execution: list[dict],
+    raw_outputs: list[dict] | None = None,
+    started_at: float | None = None,
+) -> Path:
+    """Write the stage report for commands that have already run.
+
+    Findings are every result parsed from `raw_outputs` (`{"path", "parser"}`
+    entries) followed by failed commands; raw files older than `started_at`
+    are left unparsed so stale results are not reported. Tools such as
+    pip-audit exit non-zero when they find something, so failed commands
+    only become findings when some raw output could not be parsed.
+    """
+    raw_outputs = raw_outputs or []
+    status = list(execution)
+    parsed: list[str] = []
+
+    def failures() -> Iterator[Finding]:
+        if not raw_outputs or len(parsed) < len(raw_outputs):
+            yield from command_failure_findings(stage, title, execution)
+
+    findings = itertools.chain(_raw_findings(stage, raw_outputs, started_at, status, parsed), failures())
+    return write_stage_report(stage, findings=findings, status=status)
+
+
+def write_stage_report(stage: str, findings: Iterable[Finding], status: list[dict]) -> Path:
+    """Write `<stage>.json`, streaming findings so large result sets are never held in memory.
+
+    The text matches `json.dumps(payload, indent=2)`. `status` is written
+    after the findings, so entries appended while they are consumed are kept.
+    """
     ensure_reports_dir()
     path = REPORTS_DIR / f"{stage}.json"
-    payload = {
-        "stage": stage,
-        "findings": [f.__dict__ for f in findings],
-        "execution": status,
-    }
-    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    partial = path.with_suffix(".json.partial")
+    with partial.open("w", encoding="utf-8") as handle:
+        handle.write('{\n  "stage": ' + json.dumps(stage) + ',\n  "findings": [')
+        count = 0
+        for finding in findings:
+            item = json.dumps(finding.__dict__, indent=2).replace("\n", "\n    ")
+            handle.write(("," if count else "") + "\n    " + item)
+            count += 1
+        handle.write("\n  ]" if count else "]")
+        handle.write(',\n  "execution": ' + json.dumps(status, indent=2).replace("\n", "\n  ") + "\n}")
+    partial.replace(path)
     return path
 
 
@@ -0,0 +1,243 @@
+"""Incremental parsers that turn raw tool output into normalized findings.
+
+Raw reports are read in fixed-size chunks and only one result is decoded
+at a time, so memory stays bounded by the largest single result rather
+than the size of the document. Parsers are registered by name and chosen
+per raw file through `raw_outputs` in `security/config.json`.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Callable, Iterator, TextIO
+
+from security.runners.common import Finding
+
+CHUNK_SIZE = 64 * 1024
+# Largest single result the tokenizer buffers before giving up on the document.
+MAX_VALUE_CHARS = 16 * 1024 * 1024
+
+SEVERITY_MAP = {
+    "critical": "critical",
+    "high": "high",
+    "error": "high",
+    "medium": "medium",
+    "moderate": "medium",
+    "warning": "medium",
+    "low": "low",
+    "info": "low",
+    "informational": "low",
+    "note": "low",
+}
+
+Parser = Callable[[str, Path], Iterator[Finding]]
+PARSERS: dict[str, Parser] = {}
+
+
+def register_parser(name: str) -> Callable[[Parser], Parser]:
+    def decorator(func: Parser) -> Parser:
+        PARSERS[name] = func
+        return func
+
+    return decorator
+
+
+def normalize_severity(value: str | None, default: str = "medium") -> str:
+    return SEVERITY_MAP.get(str(value or "").strip().lower(), default)
+
+
+class _JsonStream:
+    """Minimal pull tokenizer over a JSON text file, refilled in chunks."""
+
+    def __init__(self, handle: TextIO, chunk_size: int = CHUNK_SIZE, max_value_chars: int = MAX_VALUE_CHARS):
+        self._handle = handle
+        self._chunk_size = chunk_size
+        self._max_value_chars = max_value_chars
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int | None = None) -> bool:
+        if self._eof:
+            return False
+        if self._pos:
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+        data = self._handle.read(size or self._chunk_size)
+        if not data:
+            self._eof = True
+            return False
+        self._buf += data
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ("" at end of file)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"expected {char!r} in JSON stream, found {found!r}")
+        self._pos += 1
+
+    def value(self):
+        """Decode the next complete value, reading more input until it fits.
+
+        Raises ValueError at the end of input or once `max_value_chars` are
+        buffered without a complete value, so malformed input is never read
+        into memory whole.
+        """
+        self.peek()
+        read_size = self._chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if len(self._buf) - self._pos >= self._max_value_chars:
+                    raise ValueError(f"malformed JSON or a value over {self._max_value_chars} characters") from None
+                if not self._fill(min(read_size, self._max_value_chars)):
+                    raise
+                read_size *= 2
+                continue
+            # A number cut at the buffer edge decodes "successfully"; make sure it ended.
+            if end == len(self._buf) and not isinstance(value, (dict, list, str)) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def skip(self) -> None:
+        """Skip the next value without decoding containers into objects."""
+        if self.peek() not in "[{":
+            self.value()
+            return
+
+        depth = 0
+        in_string = escaped = False
+        while True:
+            if self._pos >= len(self._buf) and not self._fill():
+                raise ValueError("unexpected end of JSON stream")
+            char = self._buf[self._pos]
+            self._pos += 1
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in "[{":
+                depth += 1
+            elif char in "]}":
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def seek_key(self, key: str) -> bool:
+        """Advance into the top-level object until the value of `key`."""
+        self.expect("{")
+        while self.peek() not in ("}", ""):
+            name = self.value()
+            self.expect(":")
+            if name == key:
+                return True
+            self.skip()
+            if self.peek() == ",":
+                self._pos += 1
+        return False
+
+    def items(self) -> Iterator:
+        self.expect("[")
+        if self.peek() == "]":
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self._pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"expected ',' or ']' in JSON array, found {separator!r}")
+
+
+def iter_json_array(
+    path: str | Path, key: str | None = None, chunk_size: int = CHUNK_SIZE, max_value_chars: int = MAX_VALUE_CHARS
+) -> Iterator:
+    """Yield the items of the root array, or of the array under top-level `key`, one by one.
+
+    Raises ValueError when the document root is not an object (with `key`)
+    or an array (without).
+    """
+    with Path(path).open("r", encoding="utf-8") as handle:
+        stream = _JsonStream(handle, chunk_size, max_value_chars)
+        expected = "{" if key is not None else "["
+        if stream.peek() != expected:
+            raise ValueError(f"expected a JSON {'object' if key is not None else 'array'} at the top level")
+        if key is not None and (not stream.seek_key(key) or stream.peek() != "["):
+            return
+        yield from stream.items()
+
+
+@register_parser("semgrep")
+def parse_semgrep(stage: str, path: Path) -> Iterator[Finding]:
+    for result in iter_json_array(path, "results"):
+        extra = result.get("extra") or {}
+        location = f"{result.get('path', '')}:{(result.get('start') or {}).get('line', '')}"
+        yield Finding(
+            stage=stage,
+            severity=normalize_severity(extra.get("severity")),
+            title=result.get("check_id", "semgrep finding"),
+            details=f"{location} {extra.get('message', '')}".strip(),
+        )
+
+
+@register_parser("pip-audit")
+def parse_pip_audit(stage: str, path: Path) -> Iterator[Finding]:
+    # pip-audit reports carry no severity; a known-vulnerable dependency is treated as high.
+    for dependency in iter_json_array(path, "dependencies"):
+        for vuln in dependency.get("vulns") or []:
+            fixes = ", ".join(vuln.get("fix_versions") or []) or "none"
+            aliases = ", ".join(vuln.get("aliases") or [])
+            yield Finding(
+                stage=stage,
+                severity="high",
+                title=f"{vuln.get('id', 'vulnerability')} in {dependency.get('name')} {dependency.get('version')}",
+                details=f"fix versions: {fixes}" + (f"; aliases: {aliases}" if aliases else ""),
+            )
+
+
+@register_parser("findings")
+def parse_findings(stage: str, path: Path) -> Iterator[Finding]:
+    """Generic `{"findings": [{"severity", "title", "details"}]}` documents."""
+    for item in iter_json_array(path, "findings"):
+        yield Finding(
+            stage=stage,
+            severity=normalize_severity(item.get("severity")),
+            title=item.get("title") or item.get("name") or "finding",
+            details=item.get("details") or item.get("description") or "",
+        )
+
+
+def _well_formed(findings: Iterator[Finding]) -> Iterator[Finding]:
+    # Results of the wrong shape (a string where an object belongs) surface as
+    # AttributeError or TypeError inside the parsers; report them as bad input.
+    try:
+        yield from findings
+    except (AttributeError, TypeError) as exc:
+        raise ValueError(f"unexpected document structure: {exc}") from exc
+
+
+def parse_raw_output(stage: str, path: str | Path, parser: str) -> Iterator[Finding]:
+    """Yield the findings of a raw file; malformed documents raise ValueError."""
+    if parser not in PARSERS:
+        raise ValueError(f"unknown raw output parser: {parser!r}")
+    return _well_formed(PARSERS[parser](stage, Path(path)))
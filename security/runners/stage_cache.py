@@ -0,0 +1,234 @@
+"""Content-hash cache for stage results.
+
+A stage is keyed by the digests of its input files (globs from
+`stage_cache.stages.<stage>.inputs` in `security/config.json`), the output
+of its `tool_version` and `environment` commands, and its configured
+commands. When the key matches the last successful run, the cached
+`<stage>.json` is restored instead of running anything. `environment`
+covers what the tool inspects besides files, such as the installed
+packages `pip-audit` audits. Results older than `max_age_seconds` are
+never reused, so new advisories and rule updates are picked up.
+
+Stages with an `incremental` section (SAST) that changed only a few files
+since the cached run scan just those files and merge the new results into
+the cached raw output, dropping results for changed or deleted files.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from security.runners import common
+from security.runners.common import command_exists
+from security.runners.parsers import iter_json_array
+
+CACHE_DIR_NAME = ".security-cache"
+DEFAULT_EXCLUDE = [".git/*", ".venv/*", "venv/*", "node_modules/*", "security/reports/*", f"{CACHE_DIR_NAME}/*"]
+DEFAULT_MAX_INCREMENTAL_FILES = 200
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class CachePlan:
+    stage: str
+    key: str
+    setup_key: str
+    files: dict[str, list]
+    commands: list[str]
+    settings: dict = field(default_factory=dict)
+    hit: bool = False
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+    @property
+    def incremental(self) -> bool:
+        return bool(self.changed or self.removed)
+
+
+def _cache_dir(stage: str) -> Path:
+    return common.ROOT / CACHE_DIR_NAME / stage
+
+
+def _digest(payload) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _excluded(relative: str, exclude: list[str]) -> bool:
+    return any(fnmatch.fnmatch(relative, pattern) for pattern in exclude)
+
+
+def hash_inputs(patterns: list[str], exclude: list[str], previous: dict[str, list] | None = None) -> dict[str, list]:
+    """Return `{path: [size, mtime_ns, sha256]}` for files under ROOT matching `patterns`.
+
+    Files whose size and mtime match `previous` reuse its digest instead of
+    being read again.
+    """
+
+    previous = previous or {}
+    files: dict[str, list] = {}
+    for dirpath, dirnames, filenames in os.walk(common.ROOT):
+        relative_dir = Path(dirpath).relative_to(common.ROOT).as_posix()
+        prefix = "" if relative_dir == "." else relative_dir + "/"
+        dirnames[:] = sorted(d for d in dirnames if not _excluded(f"{prefix}{d}/", exclude))
+        for name in sorted(filenames):
+            relative = prefix + name
+            if _excluded(relative, exclude) or not any(fnmatch.fnmatch(relative, p) for p in patterns):
+                continue
+            stat = os.stat(os.path.join(dirpath, name))
+            cached = previous.get(relative)
+            if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+                files[relative] = cached
+            else:
+                files[relative] = [stat.st_size, stat.st_mtime_ns, _file_digest(Path(dirpath) / name)]
+    return files
+
+
+def _command_output(command: str | None) -> str:
+    if not command or not command_exists(command):
+        return ""
+    result = subprocess.run(command, shell=True, cwd=common.ROOT, capture_output=True, text=True, timeout=120)
+    return (result.stdout or result.stderr).strip()
+
+
+def _load_manifest(stage: str) -> dict:
+    try:
+        return json.loads((_cache_dir(stage) / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def plan_stage(stage: str, commands: list[str], raw_outputs: list[dict], settings: dict) -> CachePlan:
+    """Decide whether `stage` can be restored, scanned incrementally, or must run in full."""
+
+    manifest = _load_manifest(stage)
+    max_age = settings.get("max_age_seconds")
+    if max_age is not None and time.time() - manifest.get("saved_at", 0) > max_age:
+        # Too old to restore or merge into; file digests are still worth reusing.
+        manifest = {"files": manifest.get("files")}
+
+    files = hash_inputs(settings.get("inputs", []), settings.get("exclude", DEFAULT_EXCLUDE), manifest.get("files"))
+    setup_key = _digest(
+        {
+            "tool": _command_output(settings.get("tool_version")),
+            "environment": _command_output(settings.get("environment")),
+            "commands": commands,
+            "raw_outputs": raw_outputs,
+            "incremental": settings.get("incremental"),
+        }
+    )
+    key = _digest({"setup": setup_key, "files": {path: entry[2] for path, entry in files.items()}})
+    plan = CachePlan(stage, key, setup_key, files, list(commands), settings=settings)
+
+    cache_dir = _cache_dir(stage)
+    if manifest.get("key") == key and (cache_dir / "report.json").exists():
+        plan.hit = True
+        plan.commands = []
+        return plan
+
+    incremental = settings.get("incremental")
+    if not incremental or manifest.get("setup_key") != setup_key or not (cache_dir / "raw.json").exists():
+        return plan
+
+    old = manifest.get("files", {})
+    changed = sorted(path for path, entry in files.items() if path not in old or old[path][2] != entry[2])
+    removed = sorted(set(old) - set(files))
+    if len(changed) > incremental.get("max_files", DEFAULT_MAX_INCREMENTAL_FILES):
+        return plan
+
+    plan.changed, plan.removed = changed, removed
+    output = shlex.quote(str(_partial_output(stage)))
+    targets = " ".join(shlex.quote(path) for path in changed)
+    # Plain substitution rather than str.format so commands may contain literal braces.
+    command = incremental["command"].replace("{output}", output).replace("{files}", targets)
+    plan.commands = [command] if changed else []
+    return plan
+
+
+def _partial_output(stage: str) -> Path:
+    return common.REPORTS_DIR / f"{stage}.incremental.raw.json"
+
+
+def restore_report(plan: CachePlan) -> Path:
+    common.ensure_reports_dir()
+    path = common.REPORTS_DIR / f"{plan.stage}.json"
+    shutil.copyfile(_cache_dir(plan.stage) / "report.json", path)
+    return path
+
+
+def _write_results(path: Path, key: str, items) -> None:
+    partial = path.with_suffix(".partial")
+    with partial.open("w", encoding="utf-8") as handle:
+        handle.write("{" + json.dumps(key) + ": [")
+        for index, item in enumerate(items):
+            handle.write(("," if index else "") + "\n" + json.dumps(item))
+        handle.write("\n]}\n")
+    partial.replace(path)
+
+
+def apply_incremental(plan: CachePlan, execution: list[dict]) -> None:
+    """Merge the incremental scan into the stage's raw output, streaming both inputs.
+
+    Cached results for changed or removed files are dropped and replaced by
+    the results of the partial scan. Nothing is merged if a command failed.
+    """
+
+    if not plan.incremental or any(entry.get("status") != "passed" for entry in execution):
+        return
+
+    incremental = plan.settings["incremental"]
+    key = incremental.get("results_key", "results")
+    dropped = set(plan.changed) | set(plan.removed)
+    partial = _partial_output(plan.stage)
+
+    def merged():
+        for item in iter_json_array(_cache_dir(plan.stage) / "raw.json", key):
+            if item.get("path") not in dropped:
+                yield item
+        if plan.changed:
+            yield from iter_json_array(partial, key)
+
+    common.ensure_reports_dir()
+    _write_results(common.ROOT / incremental["raw_output"], key, merged())
+    partial.unlink(missing_ok=True)
+
+
+def save_stage(plan: CachePlan, report_path: Path, execution: list[dict]) -> bool:
+    """Store the stage report (and raw output for incremental stages) if every command passed."""
+
+    if any(entry.get("status") != "passed" for entry in execution):
+        return False
+
+    cache_dir = _cache_dir(plan.stage)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(report_path, cache_dir / "report.json")
+    incremental = plan.settings.get("incremental")
+    if incremental:
+        raw_output = common.ROOT / incremental["raw_output"]
+        if not raw_output.exists():
+            return False
+        shutil.copyfile(raw_output, cache_dir / "raw.json")
+
+    manifest = cache_dir / "manifest.json"
+    manifest.with_suffix(".partial").write_text(
+        json.dumps({"key": plan.key, "setup_key": plan.setup_key, "files": plan.files, "saved_at": time.time()}), encoding="utf-8"
+    )
+    manifest.with_suffix(".partial").replace(manifest)
+    return True
+
@@ -1,13 +1,25 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
 import importlib
 import sys
 from urllib.parse import urlparse
 
-from security.crawler import discover_targets
-from security.executor import run_security_tests
-from security.report import generate_report
+from security.cache import DEFAULT_MAX_BYTES, ResponseCache
+from security.client import DEFAULT_MAX_BODY_BYTES, DEFAULT_POOL_MAXSIZE, TIMEOUT_SECONDS, HttpClient
+from security.crawler import CRAWL_MODES, DEFAULT_PER_HOST, DEFAULT_WORKERS, discover_targets
+from security.discovery import DEFAULT_MAX_URLS, discover_sources, merge_targets
+from security.executor import DEFAULT_PER_HOST as DEFAULT_SCAN_PER_HOST
+from security.executor import DEFAULT_WORKERS as DEFAULT_SCAN_WORKERS
+from security.executor import ScanInterrupted, check_names, run_security_tests, select_scan_targets
+from security.frontier import SqliteFrontier
+from security.metrics import DEFAULT_METRICS_PATH, ProgressLine, ScanMetrics
+from security.page_state import PageStateStore
+from security.report import generate_report_from_stream
+from security.routes import DEFAULT_SAMPLES_PER_TEMPLATE, cluster_targets
+from security.stream import DEFAULT_STREAM_PATH, FindingStream
+from security.throttle import DEFAULT_MAX_RATE, DEFAULT_RATE, HostScheduler
 
 
 def normalize_target_url(target: str) -> str:
@@ -24,7 +36,7 @@ def normalize_target_url(target: str) -> str:
 
 def _check_dependencies() -> list[str]:
     missing: list[str] = []
-    for module_name in ("requests", "bs4"):
+    for module_name in ("requests",):
         try:
             importlib.import_module(module_name)
         except ModuleNotFoundError:
@@ -35,6 +47,50 @@ def _check_dependencies() -> list[str]:
 def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description="CLI website security scanner")
     parser.add_argument("url", help="Target base URL, e.g. https://example.com")
+    parser.add_argument("--findings-stream", default=DEFAULT_STREAM_PATH, help="JSONL journal findings are appended to as each check finishes")
+    parser.add_argument("--crawl-state", help="SQLite file that persists the crawl frontier so discovery can be resumed")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the crawl saved in --crawl-state and skip (URL, check) pairs already in --findings-stream",
+    )
+    parser.add_argument(
+        "--page-state",
+        help="SQLite file of per-URL validators, content hashes and findings; later scans re-run checks only where pages changed",
+    )
+    parser.add_argument("--sitemap", action="store_true", help="Seed discovery from robots.txt and sitemap.xml, following sitemap indexes")
+    parser.add_argument("--openapi", help="OpenAPI/Swagger document (file path or URL) listing endpoints, methods and parameters")
+    parser.add_argument("--no-crawl", action="store_true", help="Scan only what --sitemap and --openapi discovered, without crawling")
+    parser.add_argument("--max-sitemap-urls", type=int, default=DEFAULT_MAX_URLS, help="Stop reading sitemaps after this many URLs")
+    parser.add_argument("--crawl-mode", choices=CRAWL_MODES, default="sync", help="Crawl pages one at a time or level by level concurrently")
+    parser.add_argument("--crawl-workers", type=int, default=DEFAULT_WORKERS, help="Concurrent fetches in async crawl mode")
+    parser.add_argument("--crawl-per-host", type=int, default=DEFAULT_PER_HOST, help="Max in-flight requests per host in async crawl mode")
+    parser.add_argument("--scan-workers", type=int, default=DEFAULT_SCAN_WORKERS, help="Checks run concurrently during the scan phase")
+    parser.add_argument("--scan-per-host", type=int, default=DEFAULT_SCAN_PER_HOST, help="Max checks in flight per host during the scan phase")
+    parser.add_argument(
+        "--samples-per-template",
+        type=int,
+        default=DEFAULT_SAMPLES_PER_TEMPLATE,
+        help="URLs scanned per route template such as /users/{id}; 0 scans every URL",
+    )
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_MAXSIZE, help="Keep-alive connections kept open per host")
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=DEFAULT_MAX_BYTES / (1024 * 1024),
+        help="Memory cap for the per-scan response cache; 0 disables caching",
+    )
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Starting requests/second per host; 0 disables throttling")
+    parser.add_argument("--max-rate", type=float, default=DEFAULT_MAX_RATE, help="Ceiling the per-host rate may grow to")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT_SECONDS, help="Per-request timeout in seconds")
+    parser.add_argument(
+        "--max-body-mb",
+        type=float,
+        default=DEFAULT_MAX_BODY_BYTES / (1024 * 1024),
+        help="Response bodies are cut after this many MiB; 0 reads them whole",
+    )
+    parser.add_argument("--metrics-file", default=DEFAULT_METRICS_PATH, help="OpenMetrics text file with per-check and per-host request metrics")
+    parser.add_argument("--progress", action="store_true", help="Show a live request count and rate on stderr")
     args = parser.parse_args(argv)
 
     missing = _check_dependencies()
@@ -42,33 +98,142 @@ def main(argv: list[str] | None = None) -> int:
         print(
             "Missing required dependencies: "
             + ", ".join(missing)
-            + "\nInstall them with: pip install requests beautifulsoup4",
+            + "\nInstall them with: pip install requests",
             file=sys.stderr,
         )
         return 2
 
-    target = normalize_target_url(args.url)
+    if args.no_crawl and not (args.sitemap or args.openapi):
+        print("--no-crawl needs --sitemap or --openapi to discover targets", file=sys.stderr)
+        return 2
+    if args.no_crawl and args.page_state:
+        print("--page-state detects changes while crawling and cannot be combined with --no-crawl", file=sys.stderr)
+        return 2
 
-    try:
-        print(f"[1/5] Crawling target: {target}")
-        targets = discover_targets(target)
+    target = normalize_target_url(args.url)
 
-        print("[2/5] Discovery complete")
-        print(f"  pages={len(targets['pages'])}, forms={len(targets['forms'])}, params={len(targets['params'])}, endpoints={len(targets['endpoints'])}")
+    cache = ResponseCache(max_bytes=int(args.cache_max_mb * 1024 * 1024)) if args.cache_max_mb > 0 else None
+    metrics = ScanMetrics()
+    scheduler = HostScheduler(rate=args.rate, max_rate=max(args.rate, args.max_rate)) if args.rate > 0 else None
+    client_options = {
+        "timeout": args.timeout,
+        "pool_maxsize": max(args.pool_size, args.crawl_per_host, args.scan_per_host),
+        "cache": cache,
+        "scheduler": scheduler,
+        "metrics": metrics,
+        "max_body_bytes": int(args.max_body_mb * 1024 * 1024) or None,
+    }
+    state = PageStateStore(args.page_state) if args.page_state else None
+    carried = 0
 
-        print("[3/5] Running security tests")
-        issues = run_security_tests(targets)
+    try:
+        progress = ProgressLine(metrics) if args.progress else contextlib.nullcontext()
+        with HttpClient(**client_options) as client, progress:
+            print(f"[1/5] Crawling target: {target}")
+            discovered = None
+            if args.sitemap or args.openapi:
+                discovered = discover_sources(target, client, sitemaps=args.sitemap, openapi=args.openapi, max_urls=args.max_sitemap_urls)
+                print(f"  discovered pages={len(discovered.pages)} api_endpoints={len(discovered.endpoints)}")
+
+            if args.no_crawl:
+                targets = discovered.as_targets()
+            else:
+                frontier = SqliteFrontier(args.crawl_state, target, resume=args.resume) if args.crawl_state else None
+                try:
+                    if frontier is not None and frontier.resumed:
+                        print(f"  resuming crawl from {args.crawl_state}")
+                    targets = discover_targets(
+                        target,
+                        mode=args.crawl_mode,
+                        workers=args.crawl_workers,
+                        per_host=args.crawl_per_host,
+                        client=client,
+                        frontier=frontier,
+                        state=state,
+                        seeds=discovered.pages if discovered is not None else (),
+                    )
+                finally:
+                    if frontier is not None:
+                        frontier.close()
+                if discovered is not None:
+                    targets = merge_targets(targets, discovered)
+
+            print("[2/5] Discovery complete")
+            print(f"  pages={len(targets['pages'])}, forms={len(targets['forms'])}, params={len(targets['params'])}, endpoints={len(targets['endpoints'])}")
+
+            templates = {}
+            if args.samples_per_template > 0:
+                templates = cluster_targets(targets["endpoints"] + targets["pages"], args.samples_per_template)
+                sampled = sum(len(t["sampled"]) for t in templates.values())
+                print(f"  templates={len(templates)}, sampled_urls={sampled}")
+
+            print("[3/5] Running security tests")
+            interrupted = False
+            with FindingStream(args.findings_stream, resume=args.resume) as stream:
+                if args.resume:
+                    print(f"  resuming: {len(stream.completed)} checks already recorded")
+                if state is not None:
+                    scan_urls = select_scan_targets(targets, args.samples_per_template)
+                    carried = state.carry_forward(stream, scan_urls, check_names())
+                    print(f"  unchanged_pages={len(state.unchanged)} changed_pages={len(state.changed)} carried_checks={carried}")
+                try:
+                    run_security_tests(
+                        targets,
+                        client=client,
+                        workers=args.scan_workers,
+                        per_host=args.scan_per_host,
+                        stream=stream,
+                        samples_per_template=args.samples_per_template,
+                    )
+                except ScanInterrupted as exc:
+                    print(f"  {exc}; saving partial results", file=sys.stderr)
+                    interrupted = True
 
         print("[4/5] Saving report")
-        report = generate_report(target, issues, output_path="security-report.json")
+        sections = {}
+        if discovered is not None:
+            sections["discovery"] = discovered.stats()
+        if templates:
+            sections["templates"] = templates
+        if cache is not None:
+            sections["cache"] = cache.stats()
+        if scheduler is not None:
+            sections["throttle"] = scheduler.stats()
+        sections["metrics"] = metrics.stats()
+        metrics.write_openmetrics(args.metrics_file)
+        if state is not None:
+            sections["incremental"] = {**state.stats(), "carried_checks": carried}
+            if not interrupted:
+                state.save(args.findings_stream)
+        if interrupted:
+            sections["interrupted"] = True
+        report = generate_report_from_stream(
+            target,
+            args.findings_stream,
+            check_names(),
+            output_path="security-report.json",
+            sections=sections,
+        )
 
         print("[5/5] Summary")
         summary = report["summary"]
         print(f"  high={summary['high']} medium={summary['medium']} low={summary['low']}")
+        if scheduler is not None:
+            print(f"  throttled_seconds={sections['throttle']['throttled_seconds']} backoffs={sections['throttle']['backoffs']}")
+        if cache is not None:
+            print(f"  cache_hits={sum(cache.hits.values())} cache_misses={sum(cache.misses.values())}")
+        print(f"  requests={sections['metrics']['requests']} errors={sections['metrics']['errors']} rate={sections['metrics']['requests_per_second']}/s peak_rss_mb={sections['metrics']['peak_rss_mb']}")
         print("  report=security-report.json")
+        print(f"  metrics={args.metrics_file}")
+        print(f"  findings_stream={args.findings_stream}")
+        if interrupted:
+            return 130
     except Exception as exc:  # defensive CLI boundary
         print(f"Scan failed: {exc}", file=sys.stderr)
         return 1
+    finally:
+        if state is not None:
+            state.close()
 
     return 0
 
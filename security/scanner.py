@@ -1,8 +1,14 @@
 from __future__ import annotations
 
-from typing import Any
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Iterator
 from urllib.parse import urlencode, urlparse, urlunparse
 
+from security.signatures import SignatureRegistry
+
+if TYPE_CHECKING:
+    from security.client import HttpClient
+
 TIMEOUT_SECONDS = 10
 
 SQL_PAYLOAD = "' OR '1'='1"
@@ -10,6 +16,13 @@ XSS_PAYLOAD = "<script>alert('xss')</script>"
 TRAVERSAL_PAYLOAD = "../../../../etc/passwd"
 REDIRECT_PAYLOAD = "https://evil.example.com"
 
+SIGNATURES = SignatureRegistry()
+for _marker in ("sql syntax", "warning: mysql", "unclosed quotation mark", "psql", "sqlite", "odbc"):
+    SIGNATURES.register("sql_injection", f"sql_error:{_marker}", _marker, ignore_case=True)
+SIGNATURES.register("xss", "xss:reflected_payload", XSS_PAYLOAD)
+SIGNATURES.register("directory_traversal", "traversal:etc_passwd", "root:x:")
+SIGNATURES.register("directory_traversal", "traversal:boot_ini", "[boot loader]", ignore_case=True)
+
 
 def _build_param_map(params: list[str], payload: str) -> dict[str, str]:
     if not params:
@@ -17,6 +30,19 @@ def _build_param_map(params: list[str], payload: str) -> dict[str, str]:
     return {param: payload for param in params}
 
 
+@contextmanager
+def _client(client: HttpClient | None) -> Iterator[HttpClient]:
+    """Yield `client`, or a temporary one that is closed when the check ends."""
+
+    if client is not None:
+        yield client
+        return
+    from security.client import HttpClient
+
+    with HttpClient(timeout=TIMEOUT_SECONDS) as owned:
+        yield owned
+
+
 def _issue(name: str, severity: str, url: str, evidence: str) -> dict[str, Any]:
     return {
         "test": name,
@@ -26,42 +52,35 @@ def _issue(name: str, severity: str, url: str, evidence: str) -> dict[str, Any]:
     }
 
 
-def test_sql_injection(url: str, params: list[str]) -> list[dict]:
+def test_sql_injection(url: str, params: list[str], client: HttpClient | None = None) -> list[dict]:
     import requests
 
     issues: list[dict] = []
     try:
-        response = requests.get(url, params=_build_param_map(params, SQL_PAYLOAD), timeout=TIMEOUT_SECONDS)
-        body = response.text.lower()
-        sql_error_markers = [
-            "sql syntax",
-            "warning: mysql",
-            "unclosed quotation mark",
-            "psql",
-            "sqlite",
-            "odbc",
-        ]
-        if any(marker in body for marker in sql_error_markers):
+        with _client(client) as http:
+            response = http.get(url, params=_build_param_map(params, SQL_PAYLOAD), check="sql_injection")
+        if SIGNATURES.matches(response, "sql_injection"):
             issues.append(_issue("sql_injection", "high", response.url, "Database error signature detected"))
     except requests.RequestException as exc:
         issues.append(_issue("sql_injection", "low", url, f"Request failed: {exc}"))
     return issues
 
 
-def test_xss(url: str, params: list[str]) -> list[dict]:
+def test_xss(url: str, params: list[str], client: HttpClient | None = None) -> list[dict]:
     import requests
 
     issues: list[dict] = []
     try:
-        response = requests.get(url, params=_build_param_map(params, XSS_PAYLOAD), timeout=TIMEOUT_SECONDS)
-        if XSS_PAYLOAD in response.text:
+        with _client(client) as http:
+            response = http.get(url, params=_build_param_map(params, XSS_PAYLOAD), check="xss")
+        if SIGNATURES.matches(response, "xss"):
             issues.append(_issue("xss", "high", response.url, "Payload reflected in response"))
     except requests.RequestException as exc:
         issues.append(_issue("xss", "low", url, f"Request failed: {exc}"))
     return issues
 
 
-def test_open_redirect(url: str, params: list[str]) -> list[dict]:
+def test_open_redirect(url: str, params: list[str], client: HttpClient | None = None) -> list[dict]:
     import requests
 
     issues: list[dict] = []
@@ -71,7 +90,8 @@ def test_open_redirect(url: str, params: list[str]) -> list[dict]:
 
     try:
         crafted = {name: REDIRECT_PAYLOAD for name in redirect_params}
-        response = requests.get(url, params=crafted, timeout=TIMEOUT_SECONDS, allow_redirects=False)
+        with _client(client) as http:
+            response = http.get(url, params=crafted, allow_redirects=False, check="open_redirect")
         location = response.headers.get("Location", "")
         if response.status_code in {301, 302, 303, 307, 308} and "evil.example.com" in location:
             issues.append(_issue("open_redirect", "medium", response.url, f"Redirected to external location: {location}"))
@@ -80,7 +100,7 @@ def test_open_redirect(url: str, params: list[str]) -> list[dict]:
     return issues
 
 
-def test_security_headers(url: str) -> list[dict]:
+def test_security_headers(url: str, client: HttpClient | None = None) -> list[dict]:
     import requests
 
     issues: list[dict] = []
@@ -92,7 +112,8 @@ def test_security_headers(url: str) -> list[dict]:
     ]
 
     try:
-        response = requests.get(url, timeout=TIMEOUT_SECONDS)
+        with _client(client) as http:
+            response = http.get(url, check="security_headers")
         for header in required_headers:
             if header not in response.headers:
                 issues.append(_issue("security_headers", "medium", url, f"Missing header: {header}"))
@@ -102,7 +123,7 @@ def test_security_headers(url: str) -> list[dict]:
     return issues
 
 
-def test_directory_traversal(url: str, params: list[str]) -> list[dict]:
+def test_directory_traversal(url: str, params: list[str], client: HttpClient | None = None) -> list[dict]:
     import requests
 
     issues: list[dict] = []
@@ -111,8 +132,9 @@ def test_directory_traversal(url: str, params: list[str]) -> list[dict]:
         candidate_params = ["file"]
 
     try:
-        response = requests.get(url, params={p: TRAVERSAL_PAYLOAD for p in candidate_params}, timeout=TIMEOUT_SECONDS)
-        if "root:x:" in response.text or "[boot loader]" in response.text.lower():
+        with _client(client) as http:
+            response = http.get(url, params={p: TRAVERSAL_PAYLOAD for p in candidate_params}, check="directory_traversal")
+        if SIGNATURES.matches(response, "directory_traversal"):
             issues.append(_issue("directory_traversal", "high", response.url, "Sensitive file content signature detected"))
     except requests.RequestException as exc:
         issues.append(_issue("directory_traversal", "low", url, f"Request failed: {exc}"))
@@ -120,12 +142,13 @@ def test_directory_traversal(url: str, params: list[str]) -> list[dict]:
     return issues
 
 
-def test_auth_required_endpoint(url: str) -> list[dict]:
+def test_auth_required_endpoint(url: str, client: HttpClient | None = None) -> list[dict]:
     import requests
 
     issues: list[dict] = []
     try:
-        response = requests.get(url, timeout=TIMEOUT_SECONDS, allow_redirects=False)
+        with _client(client) as http:
+            response = http.get(url, allow_redirects=False, check="auth_required_endpoint")
         parsed = urlparse(url)
         path = parsed.path.lower()
         likely_protected = any(segment in path for segment in ["admin", "account", "profile", "settings", "billing", "dashboard"])
@@ -136,15 +159,17 @@ def test_auth_required_endpoint(url: str) -> list[dict]:
     return issues
 
 
-def test_rate_limit(url: str) -> list[dict]:
+def test_rate_limit(url: str, client: HttpClient | None = None) -> list[dict]:
     import requests
 
     issues: list[dict] = []
     status_codes = []
     try:
-        for _ in range(12):
-            response = requests.get(url, timeout=TIMEOUT_SECONDS)
-            status_codes.append(response.status_code)
+        with _client(client) as http:
+            for attempt in range(12):
+                # Only the first request may be served from cache; the burst must hit the server.
+                response = http.get(url, check="rate_limit", use_cache=attempt == 0)
+                status_codes.append(response.status_code)
 
         if 429 not in status_codes:
             issues.append(_issue("rate_limit", "medium", url, "No HTTP 429 observed during burst requests"))
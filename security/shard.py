@@ -0,0 +1,455 @@
+"""Sharded scanning across processes or machines that share a queue file.
+
+`plan` crawls the target (or loads a targets JSON file), splits the URLs to
+scan into shards by host or route template and stores them in a SQLite
+queue. Any number of `worker` processes, local or on other nodes that can
+reach the queue and its output directory, lease shards one at a time, run
+`run_security_tests` on them and journal findings to a per-shard JSONL
+file. While a shard runs, its worker renews the lease as long as checks keep
+finishing. A shard whose lease expires (its worker died, or finished no
+check for `--lease-seconds`) is handed to the next worker, which resumes
+its journal; the stale worker drops the shard at its next result and can
+no longer mark it done. `merge` combines the journals, dropping repeated (URL, check)
+records and duplicate findings, and writes the usual `security-report.json`.
+`run` does all three with local worker processes.
+
+Each worker paces its requests with its own `HostScheduler` (`--rate`,
+`--max-rate`); workers do not coordinate, so a host may see up to
+`--processes` times that rate. Shard by `host` to keep each host's load on
+as few workers as possible.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlparse
+
+from security.cache import ResponseCache
+from security.client import HttpClient
+from security.crawler import CRAWL_MODES, DEFAULT_WORKERS, discover_targets
+from security.executor import DEFAULT_PER_HOST, check_names, params_for, run_security_tests, select_scan_targets
+from security.fingerprint import fingerprint
+from security.report import generate_report_from_stream
+from security.routes import route_template
+from security.stream import FindingStream, iter_records
+from security.throttle import DEFAULT_MAX_RATE, DEFAULT_RATE, HostScheduler
+
+SHARD_BY = ("host", "template")
+DEFAULT_SHARD_SIZE = 50
+DEFAULT_LEASE_SECONDS = 1800.0
+DEFAULT_QUEUE_PATH = "security-shards.db"
+
+
+@dataclass
+class Shard:
+    id: int
+    key: str
+    targets: dict
+    attempts: int
+
+
+def shard_targets(targets: dict, by: str = "host", shard_size: int = DEFAULT_SHARD_SIZE, samples_per_template: int | None = None) -> list[tuple[str, dict]]:
+    """Split the URLs `run_security_tests` would scan into `(key, targets)` shards.
+
+    URLs are grouped by host or route template and each group is cut into
+    shards of at most `shard_size` URLs. Every shard carries its URLs'
+    indexed params, so scanning all shards probes exactly what one
+    unsharded run would.
+    """
+
+    if by not in SHARD_BY:
+        raise ValueError(f"Unknown shard key: {by!r} (expected one of {', '.join(SHARD_BY)})")
+
+    groups: dict[str, list[str]] = {}
+    for url in select_scan_targets(targets, samples_per_template):
+        key = urlparse(url).netloc if by == "host" else route_template(url)
+        groups.setdefault(key, []).append(url)
+
+    size = max(1, shard_size)
+    shards = []
+    for key in sorted(groups):
+        urls = groups[key]
+        for start in range(0, len(urls), size):
+            chunk = urls[start : start + size]
+            shards.append((key, {"endpoints": chunk, "pages": [], "endpoint_params": {url: params_for(targets, url) for url in chunk}}))
+    return shards
+
+
+class ShardQueue:
+    """SQLite work queue of shards with leases, safe to share between processes."""
+
+    _SCHEMA = """
+        PRAGMA journal_mode = WAL;
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS shards (
+            id INTEGER PRIMARY KEY,
+            key TEXT NOT NULL,
+            targets TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            worker TEXT,
+            leased_at REAL,
+            attempts INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS shards_status ON shards (status, id);
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_QUEUE_PATH, clock=time.time):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._clock = clock
+        self._conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None)
+        self._conn.executescript(self._SCHEMA)
+
+    def create(self, target: str, params: list[str], shards: list[tuple[str, dict]], out_dir: str | Path) -> None:
+        """Replace the queue contents with a new plan."""
+
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.execute("DELETE FROM shards")
+        self._conn.execute("DELETE FROM meta")
+        meta = {"target": target, "params": json.dumps(params), "out_dir": str(out_dir)}
+        self._conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", meta.items())
+        self._conn.executemany("INSERT INTO shards (key, targets) VALUES (?, ?)", [(key, json.dumps(t)) for key, t in shards])
+        self._conn.execute("COMMIT")
+
+    def meta(self, key: str) -> str:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise ValueError(f"{self.path} holds no shard plan")
+        return row[0]
+
+    def claim(self, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Shard | None:
+        """Lease the next pending shard, or one whose lease expired; None when nothing is left."""
+
+        now = self._clock()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute(
+                """
+                SELECT id, key, targets, attempts FROM shards
+                WHERE status = 'pending' OR (status = 'running' AND leased_at < ?)
+                ORDER BY id LIMIT 1
+                """,
+                (now - lease_seconds,),
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE shards SET status = 'running', worker = ?, leased_at = ?, attempts = attempts + 1 WHERE id = ?",
+                    (worker, now, row[0]),
+                )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        return Shard(id=row[0], key=row[1], targets=json.loads(row[2]), attempts=row[3] + 1)
+
+    def renew(self, shard_id: int, worker: str) -> bool:
+        """Extend `worker`'s lease on a running shard; False once the lease was lost."""
+
+        cursor = self._conn.execute(
+            "UPDATE shards SET leased_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (self._clock(), shard_id, worker),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, shard_id: int, worker: str) -> bool:
+        """Mark the shard done if `worker` still holds its lease; False otherwise."""
+
+        cursor = self._conn.execute(
+            "UPDATE shards SET status = 'done' WHERE id = ? AND worker = ? AND status = 'running'",
+            (shard_id, worker),
+        )
+        return cursor.rowcount == 1
+
+    def counts(self) -> dict[str, int]:
+        return dict(self._conn.execute("SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall())
+
+    def done(self) -> list[tuple[int, str]]:
+        return self._conn.execute("SELECT id, worker FROM shards WHERE status = 'done' ORDER BY id").fetchall()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> ShardQueue:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _journal_path(out_dir: str | Path, shard_id: int) -> Path:
+    return Path(out_dir) / f"shard-{shard_id:06d}.jsonl"
+
+
+class LeaseLost(RuntimeError):
+    """Raised inside a shard's scan once another worker has taken over its lease."""
+
+
+class _Heartbeat:
+    """Renew a shard lease every third of `lease_seconds` while checks keep finishing.
+
+    A worker stuck in one check stops renewing, so its shard expires and is
+    retried elsewhere instead of being held for as long as the process lives.
+    """
+
+    def __init__(self, queue_path: str | Path, shard_id: int, worker: str, lease_seconds: float):
+        self._args = (queue_path, shard_id, worker)
+        self._interval = max(lease_seconds / 3, 0.01)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{shard_id}", daemon=True)
+        self._progressed = False
+        self.lost = False
+
+    def progress(self) -> None:
+        self._progressed = True
+
+    def _run(self) -> None:
+        queue_path, shard_id, worker = self._args
+        # SQLite connections stay on the thread that opened them.
+        with ShardQueue(queue_path) as queue:
+            while not self._stop.wait(self._interval):
+                if not self._progressed:
+                    continue
+                self._progressed = False
+                if not queue.renew(shard_id, worker):
+                    self.lost = True
+                    return
+
+    def __enter__(self) -> _Heartbeat:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class _LeasedStream(FindingStream):
+    """Shard journal that reports progress to the heartbeat and stops the scan once the lease is lost."""
+
+    def __init__(self, path: str | Path, heartbeat: _Heartbeat, resume: bool = False):
+        super().__init__(path, resume=resume)
+        self._heartbeat = heartbeat
+
+    def record(self, url: str, check: str, findings: list[dict]) -> None:
+        if self._heartbeat.lost:
+            raise LeaseLost(f"lease on {self.path.name} was taken over by another worker")
+        super().record(url, check, findings)
+        self._heartbeat.progress()
+
+
+def plan(
+    target: str,
+    queue_path: str | Path,
+    targets: dict,
+    by: str = "host",
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    samples_per_template: int | None = None,
+    out_dir: str | Path | None = None,
+) -> int:
+    """Store the shards of `targets` in the queue; return how many were created."""
+
+    shards = shard_targets(targets, by, shard_size, samples_per_template)
+    out_dir = Path(out_dir) if out_dir else Path(queue_path).with_suffix(".shards")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for stale in out_dir.glob("shard-*.jsonl"):
+        stale.unlink()
+    with ShardQueue(queue_path) as queue:
+        queue.create(target, targets.get("params", []), shards, out_dir)
+    return len(shards)
+
+
+def run_worker(
+    queue_path: str | Path,
+    worker_id: str | None = None,
+    client: HttpClient | None = None,
+    workers: int = 1,
+    per_host: int = DEFAULT_PER_HOST,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    rate: float = DEFAULT_RATE,
+    max_rate: float = DEFAULT_MAX_RATE,
+) -> int:
+    """Scan shards until the queue is drained; return how many this worker finished.
+
+    `rate` and `max_rate` configure the `HostScheduler` of the client this
+    worker creates (0 disables throttling); they are ignored when `client`
+    is given. A shard whose lease was lost to another worker is not counted.
+    """
+
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    owns_client = client is None
+    if client is None:
+        scheduler = HostScheduler(rate=rate, max_rate=max(rate, max_rate)) if rate > 0 else None
+        client = HttpClient(pool_maxsize=max(workers, per_host), cache=ResponseCache(), scheduler=scheduler)
+
+    finished = 0
+    try:
+        with ShardQueue(queue_path) as queue:
+            out_dir = queue.meta("out_dir")
+            params = json.loads(queue.meta("params"))
+            while (shard := queue.claim(worker_id, lease_seconds)) is not None:
+                # A retried shard resumes the journal its previous worker left behind.
+                try:
+                    with _Heartbeat(queue_path, shard.id, worker_id, lease_seconds) as heartbeat:
+                        with _LeasedStream(_journal_path(out_dir, shard.id), heartbeat, resume=shard.attempts > 1) as stream:
+                            run_security_tests({**shard.targets, "params": params}, client=client, workers=workers, per_host=per_host, stream=stream)
+                except LeaseLost as exc:
+                    print(str(exc), file=sys.stderr)
+                    continue
+                if queue.complete(shard.id, worker_id):
+                    finished += 1
+                else:
+                    print(f"lease on shard {shard.id} was lost to another worker", file=sys.stderr)
+    finally:
+        if owns_client:
+            client.close()
+    return finished
+
+
+def merge(queue_path: str | Path, output_path: str = "security-report.json") -> dict:
+    """Combine finished shard journals into one report, dropping duplicates.
+
+    Only the first record of each (URL, check) is kept, so a shard that ran
+    twice counts once, and findings repeated at the same URL with the same
+    fingerprint are dropped. The report is then written exactly like an
+    unsharded streaming scan.
+    """
+
+    with ShardQueue(queue_path) as queue:
+        target = queue.meta("target")
+        out_dir = Path(queue.meta("out_dir"))
+        counts = queue.counts()
+        done = queue.done()
+
+    merged = out_dir / "merged.jsonl"
+    seen_pairs: set[tuple[str, str]] = set()
+    seen_findings: set[tuple[str, str]] = set()
+    dropped = 0
+    workers: dict[str, int] = {}
+    with merged.open("w", encoding="utf-8") as handle:
+        for shard_id, worker in done:
+            workers[worker] = workers.get(worker, 0) + 1
+            journal = _journal_path(out_dir, shard_id)
+            if not journal.exists():
+                continue
+            for _, record in iter_records(journal):
+                pair = (record["url"], record["check"])
+                if pair in seen_pairs:
+                    dropped += len(record["findings"])
+                    continue
+                seen_pairs.add(pair)
+                findings = []
+                for finding in record["findings"]:
+                    key = (finding.get("url", ""), fingerprint(finding))
+                    if key in seen_findings:
+                        dropped += 1
+                        continue
+                    seen_findings.add(key)
+                    findings.append(finding)
+                handle.write(json.dumps({**record, "findings": findings}) + "\n")
+
+    pending = sum(count for status, count in counts.items() if status != "done")
+    sections = {"shards": {"total": sum(counts.values()), "done": len(done), "workers": workers, "duplicates_dropped": dropped}}
+    if pending:
+        sections["interrupted"] = True
+    return generate_report_from_stream(target, merged, check_names(), output_path=output_path, sections=sections)
+
+
+def _spawn_workers(queue_path: str, processes: int, scan_workers: int, scan_per_host: int, lease_seconds: float, rate: float, max_rate: float) -> int:
+    command = [
+        sys.executable, "-m", "security.shard", "worker",
+        "--queue", str(queue_path),
+        "--scan-workers", str(scan_workers),
+        "--scan-per-host", str(scan_per_host),
+        "--lease-seconds", str(lease_seconds),
+        "--rate", str(rate),
+        "--max-rate", str(max_rate),
+    ]  # fmt: skip
+    children = [subprocess.Popen(command) for _ in range(max(1, processes))]
+    return max(child.wait() for child in children)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Sharded multi-process security scanning")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_plan_args(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument("url", help="Target base URL")
+        sub.add_argument("--targets", help="JSON file of discovered targets to shard instead of crawling")
+        sub.add_argument("--by", choices=SHARD_BY, default="host", help="Group URLs into shards by host or route template")
+        sub.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, help="Max URLs per shard")
+        sub.add_argument("--samples-per-template", type=int, default=0, help="URLs scanned per route template; 0 scans every URL")
+        sub.add_argument("--crawl-mode", choices=CRAWL_MODES, default="async")
+        sub.add_argument("--crawl-workers", type=int, default=DEFAULT_WORKERS)
+        sub.add_argument("--out-dir", help="Directory for shard journals (default: <queue>.shards)")
+
+    def add_worker_args(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument("--scan-workers", type=int, default=4, help="Checks run concurrently in each worker process")
+        sub.add_argument("--scan-per-host", type=int, default=DEFAULT_PER_HOST)
+        sub.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS, help="Retry a shard whose worker finished no check for this long")
+        sub.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Starting requests/second per host in each worker; 0 disables throttling")
+        sub.add_argument("--max-rate", type=float, default=DEFAULT_MAX_RATE, help="Ceiling the per-host rate may grow to")
+
+    for name in ("plan", "worker", "merge", "run"):
+        sub = subparsers.add_parser(name)
+        sub.add_argument("--queue", default=DEFAULT_QUEUE_PATH, help="SQLite shard queue shared by all workers")
+        if name in ("plan", "run"):
+            add_plan_args(sub)
+        if name in ("worker", "run"):
+            add_worker_args(sub)
+        if name == "worker":
+            sub.add_argument("--worker-id", help="Name recorded for leased shards (default: host-pid)")
+        if name in ("merge", "run"):
+            sub.add_argument("--output", default="security-report.json")
+        if name == "run":
+            sub.add_argument("--processes", type=int, default=os.cpu_count() or 2, help="Local worker processes")
+    args = parser.parse_args(argv)
+
+    if args.command in ("plan", "run"):
+        if args.targets:
+            targets = json.loads(Path(args.targets).read_text(encoding="utf-8"))
+        else:
+            targets = discover_targets(args.url, mode=args.crawl_mode, workers=args.crawl_workers)
+        count = plan(args.url, args.queue, targets, args.by, args.shard_size, args.samples_per_template, args.out_dir)
+        print(f"planned {count} shards in {args.queue}")
+
+    status = 0
+    if args.command == "worker":
+        finished = run_worker(
+            args.queue,
+            args.worker_id,
+            workers=args.scan_workers,
+            per_host=args.scan_per_host,
+            lease_seconds=args.lease_seconds,
+            rate=args.rate,
+            max_rate=args.max_rate,
+        )
+        print(f"worker finished {finished} shards")
+    elif args.command == "run":
+        status = _spawn_workers(args.queue, args.processes, args.scan_workers, args.scan_per_host, args.lease_seconds, args.rate, args.max_rate)
+        if status:
+            print(f"a worker exited with status {status}", file=sys.stderr)
+
+    if args.command in ("merge", "run"):
+        report = merge(args.queue, args.output)
+        print(f"high={report['summary']['high']} medium={report['summary']['medium']} low={report['summary']['low']}")
+        print(f"report={args.output}")
+        if report.get("interrupted"):
+            print("shards are still pending; the report is incomplete", file=sys.stderr)
+            status = status or 1
+    return 1 if status else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
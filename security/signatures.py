@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass
+
+DEFAULT_MAX_BODY_BYTES = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class Signature:
+    check: str
+    id: str
+    pattern: str
+    ignore_case: bool = False
+    regex: bool = False
+
+
+def _body_view(body, max_bytes: int) -> memoryview:
+    """Return at most `max_bytes` of a response or body as a zero-copy view."""
+
+    if not isinstance(body, (bytes, bytearray, memoryview, str)):
+        content = getattr(body, "content", None)
+        body = content if isinstance(content, (bytes, bytearray)) else getattr(body, "text", "") or ""
+    if isinstance(body, str):
+        body = body.encode("utf-8", errors="replace")
+    return memoryview(body)[:max_bytes]
+
+
+def _lowered(view: memoryview) -> bytes:
+    """ASCII-lower-case `view` with a single copy when it spans a whole bytes object."""
+
+    source = view.obj
+    if isinstance(source, (bytes, bytearray)) and len(source) == view.nbytes:
+        return source.lower()
+    return view.tobytes().lower()
+
+
+def _trie_pattern(words) -> bytes:
+    """Build a regex that matches any of `words` with shared prefixes factored out.
+
+    `re` tries alternatives one by one at every position, so a flat
+    alternation costs O(signatures) per byte; a prefix trie rejects most
+    positions after a single branch test.
+    """
+
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for byte in word:
+            node = node.setdefault(byte, {})
+        node[None] = {}
+
+    def render(node: dict) -> bytes:
+        branches = [re.escape(bytes([byte])) + render(child) for byte, child in sorted((k, v) for k, v in node.items() if k is not None)]
+        if not branches:
+            return b""
+        if None in node:
+            return b"(?:" + b"|".join(branches) + b")?"
+        if len(branches) == 1:
+            return branches[0]
+        return b"(?:" + b"|".join(branches) + b")"
+
+    return render(trie)
+
+
+@dataclass(frozen=True)
+class _Compiled:
+    literal_pattern: re.Pattern[bytes] | None
+    literals: dict[bytes, list[int]]
+    literal_lengths: tuple[int, ...]
+    regexes: tuple[tuple[int, re.Pattern[bytes]], ...]
+
+
+def _compile(signatures: list[Signature]) -> _Compiled:
+    """Compile literals into one lower-cased prefix trie and regex signatures one by one."""
+
+    literals: dict[bytes, list[int]] = {}
+    regexes: list[tuple[int, re.Pattern[bytes]]] = []
+    for index, signature in enumerate(signatures):
+        if signature.regex:
+            regexes.append((index, re.compile(signature.pattern.encode("utf-8"), re.IGNORECASE if signature.ignore_case else 0)))
+        else:
+            literals.setdefault(signature.pattern.encode("utf-8").lower(), []).append(index)
+
+    literal_pattern = re.compile(_trie_pattern(literals)) if literals else None
+    return _Compiled(literal_pattern, literals, tuple(sorted({len(word) for word in literals})), tuple(regexes))
+
+
+class SignatureRegistry:
+    """Response signatures compiled once for single-pass body matching.
+
+    Literal signatures are folded into a single prefix trie, so a response
+    body is scanned once for all checks however many literals exist. The
+    body is capped at `max_body_bytes` and never decoded; the trie runs
+    over one ASCII-lower-cased byte copy, which `re` scans several times
+    faster than a case-insensitive pattern. The scan tries every offset,
+    and a literal that is a prefix of a longer match is reported too, so
+    overlapping signatures of different checks never hide each other.
+    Regex signatures are searched one by one, only when any are registered.
+    """
+
+    def __init__(self, max_body_bytes: int = DEFAULT_MAX_BODY_BYTES):
+        self.max_body_bytes = max_body_bytes
+        self._signatures: list[Signature] = []
+        self._compiled: _Compiled | None = None
+        self._lock = threading.Lock()
+
+    def register(self, check: str, id: str, pattern: str, ignore_case: bool = False, regex: bool = False) -> Signature:
+        signature = Signature(check=check, id=id, pattern=pattern, ignore_case=ignore_case, regex=regex)
+        with self._lock:
+            if any(existing.id == id for existing in self._signatures):
+                raise ValueError(f"Duplicate signature id: {id}")
+            self._signatures.append(signature)
+            self._compiled = None
+        return signature
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _matcher(self):
+        with self._lock:
+            if self._compiled is None:
+                self._compiled = _compile(self._signatures)
+            return self._compiled, list(self._signatures)
+
+    def scan(self, body) -> list[Signature]:
+        """Return every registered signature found in `body`, in registration order.
+
+        `body` may be a response object, bytes or str.
+        """
+
+        compiled, signatures = self._matcher()
+        view = _body_view(body, self.max_body_bytes)
+        found: set[int] = set()
+
+        if compiled.literal_pattern is not None:
+            # ASCII lower-casing keeps byte offsets, so case-sensitive hits are
+            # confirmed against the original bytes at the same span.
+            lowered = _lowered(view)
+            # Resuming one byte after each match start, rather than after its
+            # end, finds literals that begin inside another's match.
+            match = compiled.literal_pattern.search(lowered)
+            while match is not None:
+                word, start = match.group(), match.start()
+                for length in compiled.literal_lengths:
+                    if length > len(word):
+                        break
+                    for index in compiled.literals.get(word[:length], ()):
+                        signature = signatures[index]
+                        if signature.ignore_case or view[start : start + length] == signature.pattern.encode("utf-8"):
+                            found.add(index)
+                if len(found) == len(signatures) - len(compiled.regexes):
+                    break
+                match = compiled.literal_pattern.search(lowered, start + 1)
+
+        for index, pattern in compiled.regexes:
+            if index not in found and pattern.search(view):
+                found.add(index)
+
+        return [signatures[index] for index in sorted(found)]
+
+    def matches(self, body, check: str) -> list[Signature]:
+        """Return the signatures of `check` found in `body`."""
+
+        return [signature for signature in self.scan(body) if signature.check == check]
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from typing import Iterator
+
+DEFAULT_STREAM_PATH = "security-findings.jsonl"
+
+
+class FindingStream:
+    """Append-only JSONL journal of completed (URL, check) pairs.
+
+    Each line is `{"url", "check", "findings"}` and is written as soon as
+    the check finishes, so the journal doubles as the resume checkpoint: a
+    pair is done exactly when its line is on disk. A line torn by a crash is
+    dropped when the journal is reopened with `resume=True`.
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_STREAM_PATH, resume: bool = False):
+        self.path = Path(path)
+        self._completed: set[tuple[str, str]] = set()
+        self._lock = threading.Lock()
+
+        if resume and self.path.exists():
+            self._load()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text("", encoding="utf-8")
+
+        self._handle = self.path.open("a", encoding="utf-8")
+
+    def _load(self) -> None:
+        good_bytes = 0
+        with self.path.open("rb") as handle:
+            for raw in handle:
+                if not raw.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    break
+                self._completed.add((record["url"], record["check"]))
+                good_bytes += len(raw)
+
+        with self.path.open("r+b") as handle:
+            handle.truncate(good_bytes)
+
+    @property
+    def completed(self) -> set[tuple[str, str]]:
+        return self._completed
+
+    def record(self, url: str, check: str, findings: list[dict]) -> None:
+        line = json.dumps({"url": url, "check": check, "findings": findings}) + "\n"
+        with self._lock:
+            self._handle.write(line)
+            self._handle.flush()
+            self._completed.add((url, check))
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def __enter__(self) -> FindingStream:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def iter_records(path: str | Path) -> Iterator[tuple[int, dict]]:
+    """Yield `(byte_offset, record)` for every complete line of a journal."""
+
+    offset = 0
+    with Path(path).open("rb") as handle:
+        for raw in handle:
+            if raw.endswith(b"\n"):
+                try:
+                    yield offset, json.loads(raw)
+                except ValueError:
+                    pass
+            offset += len(raw)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable
+from urllib.parse import urlparse
+
+DEFAULT_RATE = 10.0
+DEFAULT_MIN_RATE = 0.5
+DEFAULT_MAX_RATE = 50.0
+DEFAULT_BURST = 5.0
+DEFAULT_INCREASE = 1.0
+DEFAULT_DECREASE = 0.5
+MAX_RETRY_AFTER_SECONDS = 300.0
+BACKOFF_STATUSES = frozenset({429, 503})
+# Checks whose requests bypass pacing: the rate-limit probe must send a real
+# burst, and the 429s it provokes must not slow down the other checks.
+UNPACED_CHECKS = frozenset({"rate_limit"})
+
+
+@dataclass
+class _HostState:
+    rate: float
+    tokens: float
+    updated: float
+    blocked_until: float = 0.0
+    requests: int = 0
+    backoffs: int = 0
+    throttled_seconds: float = 0.0
+
+
+def _retry_after_seconds(value: str | None, now_epoch: float) -> float | None:
+    """Parse a Retry-After header given as delta-seconds or an HTTP date."""
+
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - now_epoch)
+
+
+class HostScheduler:
+    """Per-host politeness scheduler every outgoing request goes through.
+
+    Each host gets a token bucket refilled at its current rate. Successful
+    responses raise the rate additively (by about `increase` req/s for each
+    second of clean traffic) up to `max_rate`; 429 and 503 responses cut it
+    multiplicatively by `decrease` down to `min_rate`, empty the bucket and
+    pause the host for any `Retry-After` interval. Time spent waiting is
+    recorded per host for the report.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        min_rate: float = DEFAULT_MIN_RATE,
+        max_rate: float = DEFAULT_MAX_RATE,
+        burst: float = DEFAULT_BURST,
+        increase: float = DEFAULT_INCREASE,
+        decrease: float = DEFAULT_DECREASE,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.initial_rate = max(min_rate, min(rate, max_rate))
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = max(1.0, burst)
+        self.increase = increase
+        self.decrease = decrease
+        self._clock = clock
+        self._sleep = sleep
+        self._hosts: dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host: str, now: float) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(rate=self.initial_rate, tokens=self.burst, updated=now)
+            self._hosts[host] = state
+        return state
+
+    def acquire(self, url: str) -> float:
+        """Block until the host of `url` may receive a request; return seconds waited."""
+
+        host = urlparse(url).netloc
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                state = self._state(host, now)
+                state.tokens = min(self.burst, state.tokens + (now - state.updated) * state.rate)
+                state.updated = now
+
+                if now < state.blocked_until:
+                    delay = state.blocked_until - now
+                elif state.tokens >= 1.0:
+                    state.tokens -= 1.0
+                    state.requests += 1
+                    state.throttled_seconds += waited
+                    return waited
+                else:
+                    delay = (1.0 - state.tokens) / state.rate
+
+            self._sleep(delay)
+            waited += delay
+
+    def observe(self, url: str, status_code: int, headers=None) -> None:
+        """Adapt the host's rate to a response it returned."""
+
+        host = urlparse(url).netloc
+        with self._lock:
+            now = self._clock()
+            state = self._state(host, now)
+            if status_code in BACKOFF_STATUSES:
+                state.rate = max(self.min_rate, state.rate * self.decrease)
+                state.tokens = 0.0
+                state.backoffs += 1
+                retry_after = _retry_after_seconds((headers or {}).get("Retry-After"), time.time())
+                if retry_after is not None:
+                    state.blocked_until = max(state.blocked_until, now + min(retry_after, MAX_RETRY_AFTER_SECONDS))
+            else:
+                state.rate = min(self.max_rate, state.rate + self.increase / state.rate)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hosts = {
+                host: {
+                    "rate": round(state.rate, 3),
+                    "requests": state.requests,
+                    "backoffs": state.backoffs,
+                    "throttled_seconds": round(state.throttled_seconds, 3),
+                }
+                for host, state in sorted(self._hosts.items())
+            }
+        return {
+            "throttled_seconds": round(sum(h["throttled_seconds"] for h in hosts.values()), 3),
+            "backoffs": sum(h["backoffs"] for h in hosts.values()),
+            "hosts": hosts,
+        }
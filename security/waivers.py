@@ -0,0 +1,161 @@
+"""Waivers for known findings, loaded from `security/exceptions.yaml`.
+
+Each entry under `exceptions` needs an `id` and an `expires` date and names
+either a `fingerprint` (see `security.fingerprint`) or a `test`, optionally
+narrowed by `stage` and a `url` regex:
+
+    exceptions:
+      - id: EX-12
+        stage: scan
+        test: auth_required_endpoint
+        url: "https://app.example.com/internal/.*"
+        expires: 2026-12-31
+        reason: internal status pages, behind the VPN until Q1
+
+Waivers are compiled into dict lookups by fingerprint and by (stage, test),
+with the URL patterns of each (stage, test) pair joined into one regex, so
+matching a finding costs a couple of hash lookups however many waivers
+exist. Expired waivers are skipped, and only high findings can be waived:
+critical findings must be fixed, and lower severities never fail the gate.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from security.fingerprint import fingerprint, normalize_test
+
+DEFAULT_EXCEPTIONS_PATH = "security/exceptions.yaml"
+WAIVABLE_SEVERITIES = frozenset({"high"})
+ANY = "*"
+
+
+@dataclass
+class Waiver:
+    id: str
+    expires: dt.date
+    stage: str = ANY
+    test: str = ""
+    url: str | None = None
+    fingerprint: str | None = None
+    reason: str = ""
+
+
+@dataclass
+class _Bucket:
+    """Waivers sharing one (stage, test) key: those without a URL match any URL."""
+
+    any_url: Waiver | None = None
+    patterned: list[Waiver] = field(default_factory=list)
+    regex: re.Pattern | None = None
+
+
+def _parse_date(value) -> dt.date:
+    if isinstance(value, dt.datetime):
+        return value.date()
+    if isinstance(value, dt.date):
+        return value
+    return dt.date.fromisoformat(str(value))
+
+
+def parse_waiver(entry: dict) -> Waiver:
+    waiver_id = str(entry.get("id") or "").strip()
+    if not waiver_id:
+        raise ValueError(f"waiver without an id: {entry!r}")
+    if "expires" not in entry:
+        raise ValueError(f"waiver {waiver_id} has no expires date")
+    if not entry.get("fingerprint") and not entry.get("test"):
+        raise ValueError(f"waiver {waiver_id} needs a fingerprint or a test")
+    return Waiver(
+        id=waiver_id,
+        expires=_parse_date(entry["expires"]),
+        stage=str(entry.get("stage") or ANY),
+        test=normalize_test({"test": entry.get("test")}),
+        url=entry.get("url"),
+        fingerprint=entry.get("fingerprint"),
+        reason=str(entry.get("reason") or ""),
+    )
+
+
+class WaiverIndex:
+    """Compiled waivers; `match` returns the waiver covering a finding, if any."""
+
+    def __init__(self, waivers: list[Waiver], today: dt.date | None = None):
+        today = today or dt.date.today()
+        self.expired = sorted(waiver.id for waiver in waivers if waiver.expires < today)
+        self.active = 0
+        self._by_fingerprint: dict[str, Waiver] = {}
+        self._by_test: dict[tuple[str, str], _Bucket] = {}
+
+        for waiver in waivers:
+            if waiver.expires < today:
+                continue
+            self.active += 1
+            if waiver.fingerprint:
+                self._by_fingerprint.setdefault(waiver.fingerprint, waiver)
+                continue
+            bucket = self._by_test.setdefault((waiver.stage, waiver.test), _Bucket())
+            if waiver.url:
+                bucket.patterned.append(waiver)
+            elif bucket.any_url is None:
+                bucket.any_url = waiver
+
+        for key, bucket in self._by_test.items():
+            if bucket.patterned:
+                try:
+                    bucket.regex = re.compile("|".join(f"(?P<w{i}>{w.url})" for i, w in enumerate(bucket.patterned)))
+                except re.error as exc:
+                    raise ValueError(f"invalid url pattern in waivers for {key}: {exc}") from exc
+
+    def __len__(self) -> int:
+        return self.active
+
+    def summary(self, waived: Counter | None = None, waived_by: Counter | None = None) -> dict:
+        """The report's `waivers` section, given the waived counts by severity and by waiver id."""
+
+        return {
+            "active": self.active,
+            "expired": self.expired,
+            "waived_severity_summary": dict(waived or {}),
+            "waived_by_id": dict(waived_by or {}),
+        }
+
+    def match(self, finding: dict, finding_fingerprint: str | None = None) -> Waiver | None:
+        if (finding.get("severity") or "").lower() not in WAIVABLE_SEVERITIES:
+            return None
+
+        if self._by_fingerprint:
+            waiver = self._by_fingerprint.get(finding_fingerprint or finding.get("fingerprint") or fingerprint(finding))
+            if waiver is not None:
+                return waiver
+
+        if not self._by_test:
+            return None
+        test = normalize_test(finding)
+        url = str(finding.get("url") or "")
+        for key in ((str(finding.get("stage") or ANY), test), (ANY, test)):
+            bucket = self._by_test.get(key)
+            if bucket is None:
+                continue
+            if bucket.any_url is not None:
+                return bucket.any_url
+            if bucket.regex is not None and (matched := bucket.regex.fullmatch(url)):
+                return bucket.patterned[int(matched.lastgroup[1:])]
+        return None
+
+
+def load_waivers(path: str | Path = DEFAULT_EXCEPTIONS_PATH, today: dt.date | None = None) -> WaiverIndex:
+    """Compile the waivers in `path`; a missing file means no waivers."""
+
+    path = Path(path)
+    if not path.exists():
+        return WaiverIndex([], today)
+
+    import yaml
+
+    document = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    return WaiverIndex([parse_waiver(entry) for entry in document.get("exceptions") or []], today)
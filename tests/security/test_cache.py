@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import pytest
+
+from security.cache import ResponseCache
+
+
+class CountingResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.content = text.encode()
+        self.headers = {}
+        self.status_code = 200
+
+
+class CountingSession:
+    def __init__(self):
+        self.calls = 0
+
+    def mount(self, prefix: str, adapter) -> None:
+        pass
+
+    def get(self, url: str, **kwargs):
+        self.calls += 1
+        return CountingResponse(url)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_bytes=10)
+    cache.put(("GET", "a", (), True), CountingResponse("aaaa"))
+    cache.put(("GET", "b", (), True), CountingResponse("bbbb"))
+    assert cache.get(("GET", "a", (), True), "x") is not None
+
+    cache.put(("GET", "c", (), True), CountingResponse("cccc"))
+
+    assert cache.get(("GET", "b", (), True), "x") is None
+    assert cache.get(("GET", "a", (), True), "x") is not None
+    assert cache.bytes <= 10
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_key_distinguishes_params_and_redirects():
+    base = ResponseCache.key("get", "https://example.com", None, True)
+    assert base == ResponseCache.key("GET", "https://example.com", {}, True)
+    assert base != ResponseCache.key("GET", "https://example.com", {"q": "1"}, True)
+    assert base != ResponseCache.key("GET", "https://example.com", None, False)
+
+
+def test_client_serves_repeat_gets_from_cache_and_counts_per_check():
+    pytest.importorskip("requests")
+
+    from security.client import HttpClient
+
+    session = CountingSession()
+    cache = ResponseCache()
+    client = HttpClient(session=session, cache=cache)
+
+    client.get("https://example.com", check="crawl")
+    client.get("https://example.com", check="security_headers")
+    client.get("https://example.com", check="rate_limit", use_cache=False)
+
+    assert session.calls == 2
+    assert cache.stats()["hits"] == {"security_headers": 1}
+    assert cache.stats()["requests_saved"] == 1
@@ -18,13 +18,18 @@ class DummySession:
     def __init__(self, fixtures: dict[str, DummyResponse]):
         self.fixtures = fixtures
 
-    def get(self, url: str, timeout: int = 10):
+    def mount(self, prefix: str, adapter) -> None:
+        pass
+
+    def get(self, url: str, timeout: int = 10, **kwargs):
         return self.fixtures[url]
 
+    def close(self) -> None:
+        pass
+
 
 def test_discover_targets_internal_links_and_depth(monkeypatch):
     pytest.importorskip("requests")
-    pytest.importorskip("bs4")
 
     from security.crawler import discover_targets
 
@@ -48,6 +53,84 @@ def test_discover_targets_internal_links_and_depth(monkeypatch):
     assert "username" in targets["params"]
     assert "x" in targets["params"]
     assert any(f["action"] == "https://example.com/login" for f in targets["forms"])
+    assert targets["endpoint_params"]["https://example.com/a"] == ["x"]
+    assert targets["endpoint_params"]["https://example.com/login"] == ["username"]
+    assert targets["endpoint_params"]["https://example.com/b"] == []
+
+
+def test_discover_targets_async_mode_matches_sync(monkeypatch):
+    pytest.importorskip("requests")
+
+    from security.crawler import discover_targets
+
+    fixtures = {
+        "https://example.com": DummyResponse('<a href="/a?x=1">A</a><a href="/b">B</a><form action="/search"><input name="q"/></form>'),
+        "https://example.com/a": DummyResponse('<a href="/b">B</a><a href="/c">C</a>'),
+        "https://example.com/b": DummyResponse('<a href="/d">D</a>'),
+        "https://example.com/c": DummyResponse("{}", headers={"Content-Type": "application/json"}),
+        "https://example.com/d": DummyResponse('<a href="/e">E</a>'),
+    }
+
+    import requests
+
+    monkeypatch.setattr(requests, "Session", lambda: DummySession(fixtures))
+    sync_targets = discover_targets("https://example.com")
+    async_targets = discover_targets("https://example.com", mode="async", workers=3, per_host=2)
+
+    assert async_targets == sync_targets
+    assert "https://example.com/c" in async_targets["pages"]
+    assert "https://example.com/d" in async_targets["pages"]
+    assert "https://example.com/e" not in async_targets["pages"]  # depth limit 2
+
+
+def test_discover_targets_resumes_from_sqlite_frontier(monkeypatch, tmp_path: Path):
+    pytest.importorskip("requests")
+
+    from security.crawler import discover_targets
+    from security.frontier import SqliteFrontier
+
+    fixtures = {
+        "https://example.com": DummyResponse('<a href="/a?x=1">A</a><a href="/b">B</a>'),
+        "https://example.com/a": DummyResponse('<form action="/login"><input name="user"/></form><a href="/c">C</a>'),
+        "https://example.com/b": DummyResponse('<a href="/d">D</a>'),
+        "https://example.com/c": DummyResponse("ok"),
+        "https://example.com/d": DummyResponse("ok"),
+    }
+
+    class CrashingSession(DummySession):
+        def get(self, url: str, timeout: int = 10, **kwargs):
+            if url.endswith("/b"):
+                raise KeyboardInterrupt
+            return super().get(url, timeout, **kwargs)
+
+    import requests
+
+    monkeypatch.setattr(requests, "Session", lambda: DummySession(fixtures))
+    expected = discover_targets("https://example.com")
+
+    state = tmp_path / "crawl.sqlite"
+    monkeypatch.setattr(requests, "Session", lambda: CrashingSession(fixtures))
+    frontier = SqliteFrontier(state, "https://example.com", checkpoint_every=1)
+    with pytest.raises(KeyboardInterrupt):
+        discover_targets("https://example.com", frontier=frontier)
+    frontier.close()
+
+    fetched = []
+
+    class RecordingSession(DummySession):
+        def get(self, url: str, timeout: int = 10, **kwargs):
+            fetched.append(url)
+            return super().get(url, timeout, **kwargs)
+
+    monkeypatch.setattr(requests, "Session", lambda: RecordingSession(fixtures))
+    frontier = SqliteFrontier(state, "https://example.com", resume=True)
+    assert frontier.resumed
+    resumed = discover_targets("https://example.com", frontier=frontier)
+    frontier.close()
+
+    assert resumed == expected
+    assert "https://example.com" not in fetched
+    assert "https://example.com/a" not in fetched
 
 
 def test_generate_report_counts(tmp_path: Path):
@@ -71,17 +154,81 @@ def test_run_security_tests_with_stubbed_scanner(monkeypatch):
 
     import security.executor as executor
 
-    monkeypatch.setattr(executor, "test_sql_injection", lambda u, p: [{"severity": "high", "url": u, "test": "sql", "evidence": "x"}])
-    monkeypatch.setattr(executor, "test_xss", lambda u, p: [])
-    monkeypatch.setattr(executor, "test_open_redirect", lambda u, p: [])
-    monkeypatch.setattr(executor, "test_security_headers", lambda u: [])
-    monkeypatch.setattr(executor, "test_directory_traversal", lambda u, p: [])
-    monkeypatch.setattr(executor, "test_auth_required_endpoint", lambda u: [])
-    monkeypatch.setattr(executor, "test_rate_limit", lambda u: [])
+    monkeypatch.setattr(executor, "test_sql_injection", lambda u, p, client=None: [{"severity": "high", "url": u, "test": "sql", "evidence": "x"}])
+    monkeypatch.setattr(executor, "test_xss", lambda u, p, client=None: [])
+    monkeypatch.setattr(executor, "test_open_redirect", lambda u, p, client=None: [])
+    monkeypatch.setattr(executor, "test_security_headers", lambda u, client=None: [])
+    monkeypatch.setattr(executor, "test_directory_traversal", lambda u, p, client=None: [])
+    monkeypatch.setattr(executor, "test_auth_required_endpoint", lambda u, client=None: [])
+    monkeypatch.setattr(executor, "test_rate_limit", lambda u, client=None: [])
 
     findings = executor.run_security_tests({"endpoints": ["https://example.com/api"], "pages": [], "params": ["id"]})
-    assert len(findings) == 1
+    assert isinstance(findings, list) and len(findings) == 1
     assert findings[0]["test"] == "sql"
+    findings[0]["severity"] = "low"
+    assert findings[0]["severity"] == "low"
+
+
+def test_run_security_tests_shares_one_client(monkeypatch):
+    pytest.importorskip("requests")
+
+    import security.executor as executor
+
+    seen = []
+    for name in (
+        "test_sql_injection",
+        "test_xss",
+        "test_open_redirect",
+        "test_directory_traversal",
+    ):
+        monkeypatch.setattr(executor, name, lambda u, p, client=None: seen.append(client) or [])
+    for name in ("test_security_headers", "test_auth_required_endpoint", "test_rate_limit"):
+        monkeypatch.setattr(executor, name, lambda u, client=None: seen.append(client) or [])
+
+    client = executor.HttpClient(session=DummySession({}))
+    executor.run_security_tests({"endpoints": ["https://example.com/a", "https://example.com/b"], "pages": []}, client=client)
+
+    assert len(seen) == 14
+    assert all(c is client for c in seen)
+
+
+def test_standalone_check_closes_its_own_client(monkeypatch):
+    pytest.importorskip("requests")
+
+    import requests
+
+    from security.scanner import test_security_headers
+
+    closed = []
+
+    class ClosingSession(DummySession):
+        def close(self) -> None:
+            closed.append(True)
+
+    monkeypatch.setattr(requests, "Session", lambda: ClosingSession({"https://example.com": DummyResponse("")}))
+    assert len(test_security_headers("https://example.com")) == 4
+    assert closed == [True]
+
+
+def test_run_security_tests_uses_endpoint_params_with_global_fallback(monkeypatch):
+    pytest.importorskip("requests")
+
+    import security.executor as executor
+
+    seen = {}
+    monkeypatch.setattr(executor, "_checks", lambda: [("sql_injection", lambda u, p, client=None: seen.setdefault(u, p) and [], True)])
+
+    targets = {
+        "endpoints": ["https://example.com/login", "https://example.com/static", "https://example.com/unknown"],
+        "pages": [],
+        "params": ["id", "next", "password", "username"],
+        "endpoint_params": {"https://example.com/login": ["password", "username"], "https://example.com/static": []},
+    }
+    executor.run_security_tests(targets, client=executor.HttpClient(session=DummySession({})))
+
+    assert seen["https://example.com/login"] == ["password", "username"]
+    assert seen["https://example.com/static"] == []
+    assert seen["https://example.com/unknown"] == ["id", "next", "password", "username"]
 
 
 def test_normalize_target_url():
@@ -89,3 +236,101 @@ def test_normalize_target_url():
 
     assert normalize_target_url("example.com") == "https://example.com"
     assert normalize_target_url("http://example.com") == "http://example.com"
+
+
+def test_run_security_tests_parallel_order_is_deterministic(monkeypatch):
+    pytest.importorskip("requests")
+
+    import random
+    import time
+
+    import security.executor as executor
+
+    def slow(name):
+        def check(u, *args, client=None):
+            time.sleep(random.random() / 200)
+            return [{"severity": "low", "url": u, "test": name, "evidence": ""}]
+
+        return check
+
+    for name in (
+        "test_sql_injection",
+        "test_xss",
+        "test_open_redirect",
+        "test_security_headers",
+        "test_directory_traversal",
+        "test_auth_required_endpoint",
+        "test_rate_limit",
+    ):
+        monkeypatch.setattr(executor, name, slow(name))
+
+    targets = {"endpoints": [f"https://h{i % 3}.example.com/p{i}" for i in range(12)], "pages": []}
+    client = executor.HttpClient(session=DummySession({}))
+    serial = executor.run_security_tests(targets, client=client)
+    parallel = executor.run_security_tests(targets, client=client, workers=8, per_host=2)
+
+    assert parallel == serial
+    assert len(parallel) == 12 * 7
+
+
+def test_run_security_tests_interrupt_returns_partial_findings(monkeypatch):
+    pytest.importorskip("requests")
+
+    import security.executor as executor
+
+    def interrupt(u, client=None):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(executor, "test_sql_injection", lambda u, p, client=None: [{"severity": "high", "url": u, "test": "sql", "evidence": "x"}])
+    monkeypatch.setattr(executor, "test_xss", lambda u, p, client=None: [])
+    monkeypatch.setattr(executor, "test_open_redirect", lambda u, p, client=None: [])
+    monkeypatch.setattr(executor, "test_security_headers", interrupt)
+
+    client = executor.HttpClient(session=DummySession({}))
+    with pytest.raises(executor.ScanInterrupted) as excinfo:
+        executor.run_security_tests({"endpoints": ["https://example.com/a"], "pages": []}, client=client)
+
+    assert excinfo.value.completed == 3
+    assert [f["test"] for f in excinfo.value.findings] == ["sql"]
+
+
+def test_streamed_report_matches_in_memory_report_and_resume_skips_done(monkeypatch, tmp_path: Path):
+    pytest.importorskip("requests")
+
+    import security.executor as executor
+    from security.report import generate_report, generate_report_from_stream
+    from security.stream import FindingStream
+
+    calls = []
+
+    def finding(name):
+        def check(u, *args, client=None):
+            calls.append((u, name))
+            return [{"test": name, "severity": "medium", "url": u, "evidence": "e"}]
+
+        return check
+
+    for name, _, _ in executor._checks():
+        monkeypatch.setattr(executor, f"test_{name}", finding(name))
+
+    targets = {"endpoints": ["https://example.com/b", "https://example.com/a"], "pages": []}
+    client = executor.HttpClient(session=DummySession({}))
+    expected = executor.run_security_tests(targets, client=client)
+
+    journal = tmp_path / "findings.jsonl"
+    with FindingStream(journal) as stream:
+        stream.record("https://example.com/a", "xss", expected[1:2])
+    with journal.open("a", encoding="utf-8") as handle:
+        handle.write('{"url": "https://example.com/a", "che')  # torn line from a crash
+
+    calls.clear()
+    with FindingStream(journal, resume=True) as stream:
+        assert executor.run_security_tests(targets, client=client, workers=4, stream=stream) == []
+    assert ("https://example.com/a", "xss") not in calls
+    assert len(calls) == 13
+
+    streamed_out = tmp_path / "streamed.json"
+    memory_out = tmp_path / "memory.json"
+    generate_report_from_stream("https://example.com", journal, executor.check_names(), str(streamed_out), {"cache": {"hits": {}}})
+    generate_report("https://example.com", expected, str(memory_out), {"cache": {"hits": {}}})
+    assert streamed_out.read_text(encoding="utf-8") == memory_out.read_text(encoding="utf-8")
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import pytest
+
+
+class StreamedResponse:
+    def __init__(self, url: str, body: bytes, content_type: str):
+        self.url = url
+        self.status_code = 200
+        self.headers = {"Content-Type": content_type}
+        self.encoding = "utf-8"
+        self.body = body
+        self.read = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size: int):
+        for start in range(0, len(self.body), chunk_size):
+            self.read += min(chunk_size, len(self.body) - start)
+            yield self.body[start : start + chunk_size]
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class Session:
+    def __init__(self, responses: dict[str, StreamedResponse]):
+        self.responses = responses
+        self.calls = []
+
+    def mount(self, prefix: str, adapter) -> None:
+        pass
+
+    def get(self, url: str, **kwargs):
+        self.calls.append((url, kwargs))
+        return self.responses[url]
+
+
+def test_client_streams_and_caps_bodies():
+    pytest.importorskip("requests")
+
+    from security.client import READ_CHUNK_BYTES, FetchedResponse, HttpClient
+
+    endless = StreamedResponse("https://a.test/big", b"<p>" + b"x" * (10 * READ_CHUNK_BYTES), "text/html; charset=utf-8")
+    session = Session({endless.url: endless})
+    client = HttpClient(session=session, max_body_bytes=1000)
+
+    response = client.get(endless.url)
+    assert isinstance(response, FetchedResponse)
+    assert session.calls[0][1]["stream"] is True
+    assert response.truncated and len(response.content) == 1000
+    assert response.text.startswith("<p>xx")
+    assert endless.read == READ_CHUNK_BYTES and endless.closed
+    assert not hasattr(response, "__dict__")
+
+
+def test_content_type_filter_skips_body_and_is_not_cached():
+    pytest.importorskip("requests")
+
+    from security.cache import ResponseCache
+    from security.client import HttpClient
+
+    image = StreamedResponse("https://a.test/logo.png", b"\x89PNG" * 1000, "image/png")
+    client = HttpClient(session=Session({image.url: image}), cache=ResponseCache())
+
+    skipped = client.get(image.url, check="crawl", content_types=("text/html",))
+    assert skipped.skipped and skipped.content == b"" and image.read == 0 and image.closed
+
+    full = client.get(image.url, check="xss")
+    assert not full.skipped and full.content == image.body
+    assert client.cache.stats()["misses"] == {"crawl": 1, "xss": 1}
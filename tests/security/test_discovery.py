@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import gzip
+import json
+
+import pytest
+
+from security.discovery import DiscoveredTargets, load_openapi, merge_targets, parse_sitemap
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def _urlset(*urls: str) -> bytes:
+    return f"<?xml version='1.0'?><urlset {NS}>{''.join(f'<url><loc> {u} </loc><lastmod>2026-01-01</lastmod></url>' for u in urls)}</urlset>".encode()
+
+
+def _index(*sitemaps: str) -> bytes:
+    return f"<sitemapindex {NS}>{''.join(f'<sitemap><loc>{s}</loc></sitemap>' for s in sitemaps)}</sitemapindex>".encode()
+
+
+class Response:
+    def __init__(self, url: str, body: bytes, status_code: int = 200):
+        self.url = url
+        self.content = body
+        self.text = body.decode("utf-8", errors="replace")
+        self.status_code = status_code
+        self.headers = {"Content-Type": "text/plain"}
+
+
+class Session:
+    def __init__(self, documents: dict[str, bytes]):
+        self.documents = documents
+        self.fetched: list[str] = []
+
+    def mount(self, prefix: str, adapter) -> None:
+        pass
+
+    def get(self, url: str, **kwargs):
+        self.fetched.append(url)
+        if url not in self.documents:
+            return Response(url, b"missing", 404)
+        return Response(url, self.documents[url])
+
+    def close(self) -> None:
+        pass
+
+
+def test_parse_sitemap_streams_plain_and_gzip_chunks():
+    body = _urlset("https://a.test/1", "https://a.test/2")
+    chunks = [body[i : i + 7] for i in range(0, len(body), 7)]
+    assert list(parse_sitemap(chunks)) == [("url", "https://a.test/1"), ("url", "https://a.test/2")]
+
+    packed = gzip.compress(_index("https://a.test/s1.xml"))
+    assert list(parse_sitemap([packed[:5], packed[5:]])) == [("sitemap", "https://a.test/s1.xml")]
+
+
+def test_discover_sources_follows_robots_and_sitemap_indexes():
+    pytest.importorskip("requests")
+
+    from security.client import HttpClient
+    from security.discovery import discover_sources
+
+    session = Session(
+        {
+            "https://a.test/robots.txt": b"User-agent: *\nDisallow: /admin/\nDisallow: /*.pdf$\nSitemap: https://a.test/index.xml\n",
+            "https://a.test/index.xml": _index("https://a.test/pages.xml.gz", "https://a.test/gone.xml", "https://a.test/index.xml"),
+            "https://a.test/pages.xml.gz": gzip.compress(_urlset("https://a.test/", "https://a.test/p?id=3", "https://other.test/x")),
+        }
+    )
+    discovered = discover_sources("https://a.test", HttpClient(session=session))
+
+    assert discovered.pages == ["https://a.test/admin/", "https://a.test/", "https://a.test/p?id=3"]
+    assert discovered.sources == {"robots": 1, "sitemap": 2}
+    assert session.fetched.count("https://a.test/index.xml") == 1
+
+    targets = discovered.as_targets()
+    assert targets["endpoint_params"]["https://a.test/p?id=3"] == ["id"]
+
+
+def test_corrupt_sitemaps_and_oversized_specs_do_not_abort_discovery():
+    pytest.importorskip("requests")
+
+    from security.client import HttpClient
+    from security.discovery import discover_sources, iter_sitemap_urls
+
+    session = Session(
+        {
+            "https://a.test/broken.xml.gz": b"\x1f\x8b" + b"\x00" * 32,
+            "https://a.test/pages.xml": _urlset("https://a.test/ok"),
+            "https://a.test/openapi.json": json.dumps(SPEC).encode(),
+        }
+    )
+    client = HttpClient(session=session, max_body_bytes=64)
+    sitemaps = ["https://a.test/broken.xml.gz", "https://a.test/pages.xml"]
+    assert list(iter_sitemap_urls(client, sitemaps, "a.test")) == ["https://a.test/ok"]
+
+    with pytest.raises(ValueError, match="body limit"):
+        discover_sources("https://a.test", client, sitemaps=False, openapi="https://a.test/openapi.json")
+
+
+SPEC = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "https://prod.example.com/{version}", "variables": {"version": {"default": "v2"}}}],
+    "components": {
+        "parameters": {"Page": {"name": "page", "in": "query", "schema": {"type": "integer"}}},
+        "schemas": {"User": {"type": "object", "properties": {"email": {}, "role": {}}}},
+    },
+    "paths": {
+        "/users/{id}": {
+            "parameters": [{"name": "id", "in": "path", "schema": {"type": "integer", "example": 42}}],
+            "get": {"parameters": [{"$ref": "#/components/parameters/Page"}, {"name": "X-Trace", "in": "header"}]},
+            "put": {"requestBody": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/User"}}}}},
+        },
+        "/search": {"get": {"parameters": [{"name": "q", "in": "query"}]}},
+    },
+}
+
+
+def test_openapi_endpoints_are_rebased_with_exact_params(tmp_path):
+    spec = tmp_path / "openapi.json"
+    spec.write_text(json.dumps(SPEC), encoding="utf-8")
+    discovered = load_openapi(str(spec), "https://staging.test")
+
+    assert discovered.endpoints == {"https://staging.test/v2/users/42": {"page", "email", "role"}, "https://staging.test/v2/search": {"q"}}
+
+    from security.executor import params_for
+
+    crawled = {"pages": ["https://staging.test/"], "endpoints": [], "params": ["x"], "endpoint_params": {"https://staging.test/": ["x"]}, "forms": []}
+    targets = merge_targets(crawled, discovered)
+    assert params_for(targets, "https://staging.test/v2/search") == ["q"]
+    assert targets["params"] == ["email", "page", "q", "role", "x"]
+    assert targets["pages"] == crawled["pages"]
+
+
+def test_openapi_yaml_swagger2(tmp_path):
+    pytest.importorskip("yaml")
+
+    spec = tmp_path / "swagger.yaml"
+    spec.write_text(
+        "swagger: '2.0'\nbasePath: /api\npaths:\n  /login:\n    post:\n      parameters:\n        - {name: user, in: formData}\n        - {name: body, in: body}\n",
+        encoding="utf-8",
+    )
+    discovered = load_openapi(str(spec), "https://a.test/")
+    assert discovered.endpoints == {"https://a.test/api/login": {"user"}}
+    assert DiscoveredTargets().stats() == {"pages": 0, "endpoints": 0, "sources": {}}
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import json
+
+from security.findings_store import FindingsStore
+
+
+def _stage_report(path, stage, findings):
+    path.write_text(json.dumps({"stage": stage, "findings": findings, "execution": []}), encoding="utf-8")
+    return path
+
+
+def test_store_summarizes_runs_and_finds_new_findings(tmp_path):
+    old = _stage_report(tmp_path / "sast-old.json", "sast", [{"stage": "sast", "severity": "HIGH", "title": "rule.a", "details": "a.py:1"}])
+    new = _stage_report(
+        tmp_path / "sast.json",
+        "sast",
+        [
+            {"stage": "sast", "severity": "high", "title": "rule.a", "details": "a.py:3"},
+            {"stage": "sast", "severity": "medium", "title": "rule.b", "details": "b.py:1"},
+        ],
+    )
+    sca = _stage_report(tmp_path / "sca.json", "sca", [{"stage": "sca", "severity": "high", "title": "PYSEC-1 in lib 1.0"}])
+    scan = tmp_path / "security-report.json"
+    scan.write_text(
+        json.dumps({"target": "http://t", "issues": [{"test": "xss", "severity": "medium", "url": "http://t/a", "evidence": "e"}]}),
+        encoding="utf-8",
+    )
+
+    with FindingsStore(tmp_path / "findings.db") as store:
+        release = store.start_run("v1.0")
+        assert store.ingest_stage_reports(release, [old]) == 1
+        run = store.start_run("pr-42")
+        assert store.ingest_stage_reports(run, [new, sca]) == 3
+        assert store.ingest_scan_report(run, scan) == 1
+
+        assert store.severity_summary(run) == {"high": 2, "medium": 2}
+        assert store.stage_summary(run)["sast"] == {"high": 1, "medium": 1}
+        assert [f["title"] for f in store.new_since(run, release, stage="sast")] == ["rule.b"]
+        assert len(list(store.new_since(run, release))) == 3
+
+        assert store.start_run("pr-42") == run
+        assert store.severity_summary(run) == {}
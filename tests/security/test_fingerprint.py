@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from security.aggregate_report import gate_summary
+from security.fingerprint import fingerprint, load_baseline, normalize_evidence, url_template, write_baseline
+
+
+def test_fingerprint_ignores_ids_and_line_numbers_but_not_what_was_found():
+    first = {"test": "SQL Injection", "severity": "high", "url": "https://t/users/42?id=1", "evidence": "error at row 17"}
+    same = {"test": "sql  injection", "severity": "high", "url": "https://t/users/7?id=99", "evidence": "Error at row 3"}
+
+    assert url_template(first["url"]) == "https://t/users/{id}?id"
+    assert fingerprint(first) == fingerprint(same)
+    assert fingerprint(first) != fingerprint({**first, "url": "https://t/users/42?q=1"})
+    assert fingerprint(first) != fingerprint({**first, "test": "xss"})
+
+    stage = {"stage": "sast", "severity": "high", "title": "python.sqli", "details": "app.py:12 tainted query"}
+    assert fingerprint(stage) == fingerprint({**stage, "details": "app.py:40 tainted query"})
+    assert fingerprint(stage) != fingerprint({**stage, "details": "db.py:12 tainted query"})
+
+
+def test_fingerprint_keeps_hyphenated_handlers_apart():
+    exposed = {"stage": "scan", "test": "auth_required_endpoint", "severity": "high", "url": "https://t/admin/audit-log-export"}
+    newly_exposed = {**exposed, "url": "https://t/admin/delete-all-users"}
+
+    assert url_template(newly_exposed["url"]) == "https://t/admin/delete-all-users"
+    assert fingerprint(exposed) != fingerprint(newly_exposed)
+    assert url_template("https://t/files/0123456789abcdef0123/delete-all-users") == "https://t/files/{hash}/delete-all-users"
+
+
+def test_normalize_evidence_keeps_digits_that_name_things():
+    assert normalize_evidence("app.py:12 row 7 at /users/42?id=9 on 2026-01-02T03:04:05Z") == "app.py:# row # at /users/#?id=# on {timestamp}"
+    assert normalize_evidence("file1.py") != normalize_evidence("file2.py")
+    assert normalize_evidence("CVE-2023-1234 in lib 2.0") != normalize_evidence("CVE-2023-5678 in lib 2.0")
+    assert normalize_evidence("fix versions: 2.1") != normalize_evidence("fix versions: 2.2")
+
+
+def test_baseline_round_trip_and_new_only_summary(tmp_path):
+    known = {"stage": "sast", "severity": "high", "title": "rule.a", "details": "a.py:1"}
+    fresh = {"stage": "sast", "severity": "critical", "title": "rule.b", "details": "b.py:1"}
+    path = tmp_path / "baseline.txt"
+
+    assert load_baseline(path) == set()
+    assert write_baseline(path, [fingerprint(known), fingerprint(known)]) == 1
+    baseline = load_baseline(path)
+
+    new, sections = gate_summary([known, fresh, {**known, "details": "a.py:9"}], baseline)
+    assert new == {"critical": 1}
+    assert sections["baseline"]["known_severity_summary"] == {"high": 2}
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import pytest
+
+from security.html_extract import extract_links_and_forms
+
+PAGES = [
+    '<a href="/a?x=1">A</a><a href="https://external.com/out">ext</a><form action="/login" method="post"><input name="username"/></form>',
+    '<div><form action="/s"><input name="q"><input type="submit"></div><input name="outside"><a href>self</a><a>none</a>',
+    '<form><p><input name="a"><form action="/inner" method="get"><input name="b"></form><input name="c"></form><input name="d">',
+    '<script>var s = "<a href=/js>";</script><A HREF="/upper">U</A><form ACTION="/x" METHOD="Post"><INPUT NAME="Up"/></form>',
+    '<form action="/unclosed"><table><tr><td><input name="t1"></td></tr></table><input name="t2">',
+    '<a href="/e?a=1&amp;b=2">entity</a><a href="/dup" href="/dup2">dup</a><form action=""><input name=""><input name="keep"></form>',
+]
+
+
+@pytest.mark.parametrize("html", PAGES)
+def test_extractor_matches_beautifulsoup(html: str):
+    bs4 = pytest.importorskip("bs4")
+
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    expected_links = [a["href"] for a in soup.find_all("a", href=True)]
+    expected_forms = [
+        (form.get("action") or "", form.get("method") or "", [i.get("name") for i in form.find_all("input") if i.get("name")])
+        for form in soup.find_all("form")
+    ]
+
+    links, forms = extract_links_and_forms(html)
+
+    assert links == expected_links
+    assert [(f.action, f.method, f.inputs) for f in forms] == expected_forms
+
+
+def test_extractor_without_beautifulsoup():
+    links, forms = extract_links_and_forms('<a href="/a">A</a><form action="/f" method="post"><input name="n"></form>')
+
+    assert links == ["/a"]
+    assert len(forms) == 1
+    assert (forms[0].action, forms[0].method, forms[0].inputs) == ("/f", "post", ["n"])
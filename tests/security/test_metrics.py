@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import pytest
+
+from security.metrics import ScanMetrics
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Retries:
+    history = ("first",)
+
+
+class Raw:
+    retries = Retries()
+
+
+class Response:
+    def __init__(self, status_code: int, body: bytes):
+        self.status_code = status_code
+        self.content = body
+        self.headers = {}
+        self.raw = Raw()
+
+
+class Session:
+    def mount(self, prefix: str, adapter) -> None:
+        pass
+
+    def get(self, url: str, **kwargs):
+        if "down" in url:
+            raise ConnectionError("refused")
+        return Response(404 if "missing" in url else 200, b"x" * 10)
+
+
+def test_metrics_group_by_check_and_host_and_export_openmetrics(tmp_path):
+    clock = FakeClock()
+    metrics = ScanMetrics(buckets=(0.1, 1.0), clock=clock)
+    for seconds in (0.05, 0.05, 0.5, 2.0):
+        metrics.observe("https://a.test/x?q=1", "xss", seconds, status=200, size=100)
+    metrics.observe("https://b.test/y", "crawl", 0.01, error="ConnectTimeout")
+    clock.now = 2.0
+
+    stats = metrics.stats()
+    assert stats["requests"] == 5 and stats["errors"] == 1
+    assert stats["checks"]["xss"]["statuses"] == {"200": 4}
+    assert stats["checks"]["xss"]["latency_seconds"]["p50"] == pytest.approx(0.1)
+    assert stats["hosts"]["b.test"]["errors"] == {"ConnectTimeout": 1}
+    assert stats["slowest"][0] == {"seconds": 2.0, "check": "xss", "url": "https://a.test/x"}
+    assert metrics.rate() == pytest.approx(2.5)
+
+    path = tmp_path / "metrics.txt"
+    metrics.write_openmetrics(path)
+    text = path.read_text(encoding="utf-8")
+    assert 'security_scan_request_duration_seconds_bucket{check="xss",host="a.test",le="0.1"} 2' in text
+    assert 'security_scan_request_duration_seconds_bucket{check="xss",host="a.test",le="+Inf"} 4' in text
+    assert 'security_scan_responses_total{check="xss",host="a.test",status="200"} 4' in text
+    assert 'security_scan_errors_total{check="crawl",host="b.test",error="ConnectTimeout"} 1' in text
+    assert text.endswith("# EOF\n")
+
+
+def test_client_records_status_bytes_retries_and_errors():
+    pytest.importorskip("requests")
+
+    from security.client import HttpClient
+
+    metrics = ScanMetrics()
+    client = HttpClient(session=Session(), metrics=metrics)
+    client.get("https://a.test/", check="crawl")
+    client.get("https://a.test/missing", check="xss")
+    with pytest.raises(ConnectionError):
+        client.get("https://down.test/", check="xss")
+
+    checks = metrics.stats()["checks"]
+    assert checks["crawl"]["bytes"] == 10 and checks["crawl"]["retries"] == 1
+    assert checks["xss"]["statuses"] == {"404": 1}
+    assert checks["xss"]["errors"] == {"ConnectionError": 1}
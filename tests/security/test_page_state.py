@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import pytest
+
+
+class Response:
+    def __init__(self, url: str, status_code: int, text: str = "", headers: dict | None = None):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+class Site:
+    """Session serving HTML pages with ETags and answering matching If-None-Match with 304."""
+
+    def __init__(self, pages: dict[str, str], etags: bool = True):
+        self.pages = pages
+        self.etags = etags
+        self.requests: list[tuple[str, dict]] = []
+
+    def mount(self, prefix: str, adapter) -> None:
+        pass
+
+    def get(self, url: str, headers=None, **kwargs):
+        headers = headers or {}
+        self.requests.append((url, headers))
+        etag = f'"{hash(self.pages[url])}"'
+        if self.etags and headers.get("If-None-Match") == etag:
+            return Response(url, 304, headers={"ETag": etag})
+        response_headers = {"Content-Type": "text/html"}
+        if self.etags:
+            response_headers["ETag"] = etag
+        return Response(url, 200, self.pages[url], response_headers)
+
+    def close(self) -> None:
+        pass
+
+
+PAGES = {
+    "https://example.com": '<a href="/a">A</a><a href="/b">B</a>',
+    "https://example.com/a": '<form action="/search"><input name="q"></form>',
+    "https://example.com/b": "<p>static</p>",
+}
+
+
+def _crawl(site: Site, state):
+    from security.client import HttpClient
+    from security.crawler import discover_targets
+
+    return discover_targets("https://example.com", client=HttpClient(session=site), state=state)
+
+
+@pytest.mark.parametrize("etags", [True, False])
+def test_unchanged_pages_replay_stored_documents(tmp_path, monkeypatch, etags):
+    pytest.importorskip("requests")
+
+    import security.crawler as crawler
+    from security.page_state import PageStateStore
+
+    site = Site(dict(PAGES), etags=etags)
+    with PageStateStore(tmp_path / "state.db") as state:
+        first = _crawl(site, state)
+        assert state.changed == set(PAGES) and not state.unchanged
+        (tmp_path / "empty.jsonl").touch()
+        state.save(tmp_path / "empty.jsonl")
+
+    parsed = []
+    original = crawler._parse_page
+    monkeypatch.setattr(crawler, "_parse_page", lambda url, html: parsed.append(url) or original(url, html))
+    site.requests.clear()
+    with PageStateStore(tmp_path / "state.db") as state:
+        second = _crawl(site, state)
+        assert second == first
+        assert parsed == [] and state.unchanged == set(PAGES)
+        sent = dict(site.requests)
+        assert ("If-None-Match" in sent["https://example.com/a"]) is etags
+
+
+def test_changed_page_marks_its_targets_dirty_and_clean_findings_carry_forward(tmp_path):
+    pytest.importorskip("requests")
+
+    from security.page_state import PageStateStore
+    from security.stream import FindingStream
+
+    site = Site(dict(PAGES))
+    journal = tmp_path / "findings.jsonl"
+    finding = {"test": "xss", "severity": "high", "url": "u", "evidence": "e"}
+    with PageStateStore(tmp_path / "state.db") as state:
+        targets = _crawl(site, state)
+        with FindingStream(journal) as stream:
+            for url in targets["endpoints"] + targets["pages"]:
+                stream.record(url, "xss", [dict(finding, url=url)])
+                stream.record(url, "security_headers", [dict(finding, url=url, test="security_headers")])
+        state.save(journal)
+
+    site.pages["https://example.com/a"] = '<form action="/search"><input name="q"><input name="page"></form>'
+    with PageStateStore(tmp_path / "state.db") as state:
+        targets = _crawl(site, state)
+        assert state.changed == {"https://example.com/a"}
+        assert state.is_dirty("https://example.com/search")
+        assert not state.is_dirty("https://example.com/b")
+
+        with FindingStream(journal) as stream:
+            # Header findings are re-checked even on clean pages.
+            carried = state.carry_forward(stream, sorted(set(targets["endpoints"] + targets["pages"])), ["xss", "sql_injection", "security_headers"])
+            assert carried == 2
+            assert stream.completed == {("https://example.com", "xss"), ("https://example.com/b", "xss")}
+
+
+def test_skipped_bodies_are_compared_by_entity_headers(tmp_path):
+    from security.client import FetchedResponse
+    from security.page_state import PageStateStore, content_hash
+
+    def pdf(headers):
+        return FetchedResponse("https://t/a.pdf", 200, {"Content-Type": "application/pdf", **headers}, b"", None, skipped=True)
+
+    assert content_hash(pdf({})) is None
+    assert content_hash(pdf({"Content-Length": "10"})) != content_hash(pdf({"Content-Length": "11"}))
+
+    page = FetchedResponse("https://t/", 200, {}, b"<p>x</p>", None)
+    assert content_hash(page) != content_hash(FetchedResponse("https://t/", 403, {}, b"<p>x</p>", None))
+
+    with PageStateStore(tmp_path / "state.db") as state:
+        state.record("https://t/a.pdf", pdf({"ETag": '"v1"'}), None)
+        assert state.is_unchanged("https://t/a.pdf", pdf({"ETag": '"v1"'}))
+        assert not state.is_unchanged("https://t/a.pdf", pdf({"ETag": '"v2"'}))
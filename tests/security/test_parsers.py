@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+
+import pytest
+
+from security.runners import common
+from security.runners.parsers import iter_json_array, parse_raw_output
+
+
+def test_iter_json_array_reads_keyed_array_in_small_chunks(tmp_path):
+    path = tmp_path / "raw.json"
+    document = {
+        "version": "1.0",
+        "errors": [{"nested": ["]", "}", "\\\"x"]}],
+        "results": [{"n": i, "text": "a, ] } \" b" * 3} for i in range(50)] + [12345, -0.5e3],
+        "paths": {"scanned": []},
+    }
+    path.write_text(json.dumps(document), encoding="utf-8")
+
+    assert list(iter_json_array(path, "results", chunk_size=7)) == document["results"]
+    assert list(iter_json_array(path, "missing", chunk_size=7)) == []
+
+
+def test_malformed_documents_raise_value_error_with_bounded_lookahead(tmp_path):
+    truncated = tmp_path / "truncated.json"
+    truncated.write_text('{"results": [{"n": 1}, {"n": "' + "x" * 5000, encoding="utf-8")
+    with pytest.raises(ValueError, match="over 256 characters"):
+        list(iter_json_array(truncated, "results", chunk_size=16, max_value_chars=256))
+
+    for body in ('[{"results": []}]', '"text"', '{"results": ["not an object"]}'):
+        path = tmp_path / "odd.json"
+        path.write_text(body, encoding="utf-8")
+        with pytest.raises(ValueError):
+            list(parse_raw_output("sast", path, "semgrep"))
+
+
+def test_semgrep_and_pip_audit_parsers_normalize_findings(tmp_path):
+    semgrep = tmp_path / "semgrep.raw.json"
+    semgrep.write_text(
+        json.dumps(
+            {
+                "results": [
+                    {
+                        "check_id": "python.sqli",
+                        "path": "app.py",
+                        "start": {"line": 12},
+                        "extra": {"severity": "ERROR", "message": "tainted query"},
+                    }
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+    audit = tmp_path / "pip-audit.raw.json"
+    audit.write_text(
+        json.dumps(
+            {
+                "dependencies": [
+                    {"name": "ok", "version": "1.0", "vulns": []},
+                    {"name": "lib", "version": "2.0", "vulns": [{"id": "PYSEC-1", "fix_versions": ["2.1"], "aliases": ["CVE-1"]}]},
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    [sast] = parse_raw_output("sast", semgrep, "semgrep")
+    assert (sast.severity, sast.title, sast.details) == ("high", "python.sqli", "app.py:12 tainted query")
+
+    [sca] = parse_raw_output("sca", audit, "pip-audit")
+    assert sca.title == "PYSEC-1 in lib 2.0"
+    assert sca.details == "fix versions: 2.1; aliases: CVE-1"
+
+
+def test_finish_stage_streams_raw_findings_and_ignores_stale_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(common, "REPORTS_DIR", tmp_path)
+    monkeypatch.setattr(common, "ROOT", tmp_path)
+    fresh = tmp_path / "fresh.raw.json"
+    fresh.write_text(json.dumps({"findings": [{"severity": "low", "title": "t"}]}), encoding="utf-8")
+    stale = tmp_path / "stale.raw.json"
+    stale.write_text(json.dumps({"findings": [{"severity": "high", "title": "old"}]}), encoding="utf-8")
+    os.utime(stale, (time.time() - 3600, time.time() - 3600))
+
+    execution = [{"stage": "dast", "status": "failed", "command": "zap"}]
+    raw_outputs = [{"path": "fresh.raw.json", "parser": "findings"}, {"path": "stale.raw.json", "parser": "findings"}]
+    path = common.finish_stage("dast", "DAST failed", execution, raw_outputs=raw_outputs, started_at=time.time())
+
+    text = path.read_text(encoding="utf-8")
+    payload = json.loads(text)
+    assert text == json.dumps(payload, indent=2)
+    assert [finding["title"] for finding in payload["findings"]] == ["t", "DAST failed"]
+    assert "stale.raw.json missing or stale" in payload["execution"][-1]["message"]
+
+
+def test_failed_command_is_not_a_finding_when_its_raw_output_parsed(tmp_path, monkeypatch):
+    monkeypatch.setattr(common, "REPORTS_DIR", tmp_path)
+    monkeypatch.setattr(common, "ROOT", tmp_path)
+    audit = tmp_path / "pip-audit.raw.json"
+    audit.write_text(json.dumps({"dependencies": [{"name": "lib", "version": "2.0", "vulns": [{"id": "PYSEC-1"}]}]}), encoding="utf-8")
+
+    execution = [{"stage": "sca", "status": "failed", "command": "pip-audit", "returncode": 1}]
+    raw_outputs = [{"path": "pip-audit.raw.json", "parser": "pip-audit"}]
+    payload = json.loads(common.finish_stage("sca", "SCA command failed", execution, raw_outputs=raw_outputs).read_text(encoding="utf-8"))
+    assert [finding["title"] for finding in payload["findings"]] == ["PYSEC-1 in lib 2.0"]
+
+    audit.write_text("[]", encoding="utf-8")
+    payload = json.loads(common.finish_stage("sca", "SCA command failed", execution, raw_outputs=raw_outputs).read_text(encoding="utf-8"))
+    assert [finding["title"] for finding in payload["findings"]] == ["SCA command failed"]
+    assert "could not parse" in payload["execution"][-1]["message"]
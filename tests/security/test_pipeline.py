@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from security.pipeline import Stage, load_stages, run_pipeline
+from security.runners import common
+
+
+@pytest.fixture(autouse=True)
+def _logs_in_tmp(monkeypatch, tmp_path):
+    monkeypatch.setattr(common, "LOGS_DIR", tmp_path / "logs")
+
+
+def test_load_stages_uses_runner_commands_and_rejects_cycles():
+    config = {
+        "commands": {"sast": ["semgrep ."]},
+        "pipeline": {"stages": {"sast": {"runner": "security.runners.run_sast"}, "aggregate": {"commands": ["true"], "depends_on": ["sast"]}}},
+    }
+    stages = load_stages(config)
+    assert [(s.name, s.commands, s.depends_on) for s in stages] == [("sast", ["semgrep ."], []), ("aggregate", ["true"], ["sast"])]
+
+    config["pipeline"]["stages"]["sast"]["depends_on"] = ["aggregate"]
+    with pytest.raises(ValueError):
+        load_stages(config)
+
+
+def test_run_pipeline_overlaps_independent_stages_and_waits_for_dependencies():
+    stages = [
+        Stage("a", ["sleep 0.4"]),
+        Stage("b", ["sleep 0.4", "false"]),
+        Stage("final", ["true"], depends_on=["a", "b"], gate=True),
+    ]
+
+    start = time.monotonic()
+    results = run_pipeline(stages, max_workers=3)
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.75
+    assert results["b"]["status"] == "failed"
+    assert [entry["returncode"] for entry in results["b"]["execution"]] == [0, 1]
+    assert results["final"]["status"] == "passed"
+
+
+@pytest.mark.parametrize("depends_on", [["missing"], ["loop"]])
+def test_run_pipeline_rejects_unresolvable_stages(depends_on):
+    with pytest.raises(ValueError):
+        run_pipeline([Stage("loop", ["true"], depends_on=depends_on)])
+
+
+def test_run_pipeline_times_out_commands():
+    results = run_pipeline([Stage("slow", ["sleep 5"])], timeout=0.2)
+
+    assert results["slow"]["status"] == "failed"
+    assert "timed out" in results["slow"]["execution"][0]["message"]
+
+
+def test_run_command_streams_output_to_logs_and_keeps_tail(tmp_path):
+    entry = common.run_command("sast", "python -c \"import sys; sys.stdout.write('x' * 300000 + 'END')\"", index=2)
+
+    assert entry["status"] == "passed"
+    assert entry["stdout_bytes"] == 300003
+    assert len(entry["stdout"]) == common.TAIL_CHARS
+    assert entry["stdout"].endswith("END")
+    assert entry["stdout_log"].endswith("sast-2.stdout.log")
+    assert entry["wall_seconds"] >= 0
+    assert entry["peak_rss_kb"] is None or entry["peak_rss_kb"] > 0
+
+
+def test_run_command_kills_child_when_interrupted(monkeypatch, tmp_path):
+    import os
+
+    pid_file = tmp_path / "pid"
+    sleep = time.sleep
+
+    def interrupt(seconds):
+        if pid_file.exists() and pid_file.read_text().strip():
+            raise KeyboardInterrupt
+        sleep(seconds)
+
+    monkeypatch.setattr(common.time, "sleep", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        common.run_command("sast", f"echo $$ > {pid_file}; exec sleep 30")
+
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
+
+
+def test_run_pipeline_kills_commands_when_interrupted(tmp_path):
+    import os
+    import signal
+    import threading
+
+    pid_file = tmp_path / "pid"
+
+    def interrupt() -> None:
+        while not (pid_file.exists() and pid_file.read_text().strip()):
+            time.sleep(0.01)
+        os.kill(os.getpid(), signal.SIGINT)
+
+    threading.Thread(target=interrupt, daemon=True).start()
+    start = time.monotonic()
+    with pytest.raises(KeyboardInterrupt):
+        run_pipeline([Stage("slow", [f"echo $$ > {pid_file}; exec sleep 30"]), Stage("queued", ["sleep 30"], depends_on=["slow"])])
+
+    assert time.monotonic() - start < 5
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
@@ -0,0 +1,32 @@
+from security.routes import canonicalize_path, cluster_targets
+
+
+def test_canonicalize_path_detects_identifier_segments():
+    assert canonicalize_path("/users/42") == "/users/{id}"
+    assert canonicalize_path("/orders/550e8400-e29b-41d4-a716-446655440000/items") == "/orders/{uuid}/items"
+    assert canonicalize_path("/blobs/5d41402abc4b2a76b9719d911017c592.json") == "/blobs/{hash}.json"
+    assert canonicalize_path("/blog/how-we-scan-fast") == "/blog/{slug}"
+    assert canonicalize_path("/account/settings") == "/account/settings"
+    assert canonicalize_path("/api/v2/user-settings/") == "/api/v2/user-settings/"
+
+
+def test_cluster_targets_samples_each_template_deterministically():
+    urls = [f"https://example.com/users/{i}" for i in range(1, 101)] + ["https://example.com/about"]
+
+    clusters = cluster_targets(urls, samples_per_template=3)
+
+    assert clusters["https://example.com/users/{id}"]["count"] == 100
+    assert len(clusters["https://example.com/users/{id}"]["sampled"]) == 3
+    assert clusters["https://example.com/about"]["sampled"] == ["https://example.com/about"]
+    assert cluster_targets(list(reversed(urls)), samples_per_template=3) == clusters
+
+
+def test_few_slug_siblings_stay_distinct_routes():
+    handlers = ["two-factor-auth", "change-email-address", "delete-my-account", "export-all-data"]
+    urls = [f"https://example.com/account/{h}" for h in handlers]
+    posts = [f"https://example.com/blog/post-number-{i}" for i in range(12)]
+
+    clusters = cluster_targets(urls + posts, samples_per_template=3)
+
+    assert all(clusters[url]["sampled"] == [url] for url in urls)
+    assert clusters["https://example.com/blog/{slug}"]["count"] == 12
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+
+class DummySession:
+    def mount(self, prefix: str, adapter) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _targets() -> dict:
+    urls = [f"https://h{i % 2}.example.com/users/{i}" for i in range(6)] + ["https://h0.example.com/login"]
+    return {
+        "endpoints": urls,
+        "pages": [],
+        "params": ["id", "q"],
+        "endpoint_params": {"https://h0.example.com/login": ["username"]},
+    }
+
+
+def test_shard_targets_groups_by_host_and_template():
+    from security.shard import shard_targets
+
+    by_host = shard_targets(_targets(), by="host", shard_size=2)
+    assert [key for key, _ in by_host] == ["h0.example.com"] * 2 + ["h1.example.com"] * 2
+    assert sorted(url for _, shard in by_host for url in shard["endpoints"]) == sorted(_targets()["endpoints"])
+    login = next(shard for _, shard in by_host if "https://h0.example.com/login" in shard["endpoints"])
+    assert login["endpoint_params"]["https://h0.example.com/login"] == ["username"]
+    assert login["endpoint_params"]["https://h0.example.com/users/0"] == ["id", "q"]
+
+    by_template = shard_targets(_targets(), by="template", shard_size=50)
+    assert sorted(key for key, _ in by_template) == [
+        "https://h0.example.com/login",
+        "https://h0.example.com/users/{id}",
+        "https://h1.example.com/users/{id}",
+    ]
+
+    with pytest.raises(ValueError):
+        shard_targets(_targets(), by="path")
+
+
+def test_claim_reclaims_expired_lease(tmp_path):
+    from security.shard import ShardQueue
+
+    now = [1000.0]
+    with ShardQueue(tmp_path / "q.db", clock=lambda: now[0]) as queue:
+        queue.create("https://example.com", [], [("a", {"endpoints": ["u1"]}), ("b", {"endpoints": ["u2"]})], tmp_path)
+        first = queue.claim("w1", lease_seconds=60)
+        second = queue.claim("w2", lease_seconds=60)
+        assert (first.key, second.key) == ("a", "b")
+        assert queue.claim("w3", lease_seconds=60) is None
+
+        queue.complete(second.id, "w2")
+        now[0] += 61
+        retried = queue.claim("w3", lease_seconds=60)
+        assert retried.id == first.id and retried.attempts == 2
+        assert queue.counts() == {"running": 1, "done": 1}
+
+        # The worker that lost the lease can neither renew nor finish the shard.
+        assert not queue.renew(first.id, "w1")
+        assert not queue.complete(first.id, "w1")
+        assert queue.renew(first.id, "w3")
+        assert queue.complete(first.id, "w3")
+        assert queue.counts() == {"done": 2}
+
+
+def test_renewed_lease_is_not_reclaimed(tmp_path):
+    from security.shard import ShardQueue
+
+    now = [1000.0]
+    with ShardQueue(tmp_path / "q.db", clock=lambda: now[0]) as queue:
+        queue.create("https://example.com", [], [("a", {"endpoints": ["u1"]})], tmp_path)
+        shard = queue.claim("w1", lease_seconds=60)
+        now[0] += 50
+        assert queue.renew(shard.id, "w1")
+        now[0] += 50
+        assert queue.claim("w2", lease_seconds=60) is None
+
+
+def test_heartbeat_renews_only_on_progress_and_stops_a_lost_shard(tmp_path):
+    import time
+
+    from security.shard import LeaseLost, ShardQueue, _Heartbeat, _LeasedStream
+
+    def leased_at(queue):
+        return queue._conn.execute("SELECT leased_at FROM shards").fetchone()[0]
+
+    with ShardQueue(tmp_path / "q.db") as queue:
+        queue.create("https://example.com", [], [("a", {"endpoints": ["u1"]})], tmp_path)
+        shard = queue.claim("w1", lease_seconds=0.6)
+        claimed = leased_at(queue)
+        with _Heartbeat(tmp_path / "q.db", shard.id, "w1", 0.6) as heartbeat:
+            with _LeasedStream(tmp_path / "shard.jsonl", heartbeat) as stream:
+                time.sleep(0.5)
+                assert leased_at(queue) == claimed
+
+                stream.record("u1", "xss", [])
+                time.sleep(0.3)
+                assert leased_at(queue) > claimed
+
+                time.sleep(0.7)
+                assert queue.claim("w2", lease_seconds=0.6).id == shard.id
+                stream.record("u1", "sql_injection", [])
+                time.sleep(0.3)
+                with pytest.raises(LeaseLost):
+                    stream.record("u1", "rate_limit", [])
+
+
+def test_workers_and_merge_write_deduplicated_report(tmp_path, monkeypatch):
+    pytest.importorskip("requests")
+
+    import security.executor as executor
+    from security.client import HttpClient
+    from security.shard import merge, plan, run_worker
+
+    def sql(url, params, client=None):
+        # Every URL reports the same issue twice; merge keeps one per URL.
+        finding = {"severity": "high", "url": url, "test": "sql_injection", "evidence": f"params={params}"}
+        return [finding, dict(finding)]
+
+    monkeypatch.setattr(executor, "_checks", lambda: [("sql_injection", sql, True)])
+
+    queue_path = tmp_path / "shards.db"
+    assert plan("https://example.com", queue_path, _targets(), by="host", shard_size=3) == 3
+
+    client = HttpClient(session=DummySession())
+    assert run_worker(queue_path, "w1", client=client) == 3
+    assert run_worker(queue_path, "w2", client=client) == 0
+
+    output = tmp_path / "security-report.json"
+    report = merge(queue_path, str(output))
+    written = json.loads(output.read_text(encoding="utf-8"))
+
+    assert report["summary"]["high"] == 7
+    assert [issue["url"] for issue in written["issues"]] == sorted(_targets()["endpoints"])
+    assert written["shards"] == {"total": 3, "done": 3, "workers": {"w1": 3}, "duplicates_dropped": 7}
+    assert "interrupted" not in written
+
+
+def test_main_fails_while_shards_are_pending(tmp_path, capsys):
+    from security.shard import main, plan
+
+    queue_path = tmp_path / "shards.db"
+    plan("https://example.com", queue_path, _targets(), by="host", shard_size=3)
+    assert main(["merge", "--queue", str(queue_path), "--output", str(tmp_path / "report.json")]) == 1
+    assert "still pending" in capsys.readouterr().err
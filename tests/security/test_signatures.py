@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import pytest
+
+from security.signatures import SignatureRegistry
+
+
+class StubResponse:
+    def __init__(self, body: bytes, url: str = "https://example.com/?q=x"):
+        self.content = body
+        self.text = body.decode("utf-8")
+        self.url = url
+        self.headers = {}
+        self.status_code = 200
+
+
+class StubClient:
+    def __init__(self, response: StubResponse):
+        self.response = response
+
+    def get(self, url: str, **kwargs):
+        return self.response
+
+
+def test_registry_matches_all_checks_in_one_scan():
+    registry = SignatureRegistry()
+    registry.register("sql", "mysql", "Warning: MySQL", ignore_case=True)
+    registry.register("trav", "passwd", "root:x:")
+    registry.register("trav", "ini", r"\[boot loader\]", ignore_case=True, regex=True)
+
+    found = registry.scan(b"warning: mysql ... ROOT:X: ... [Boot Loader]")
+
+    assert [s.id for s in found] == ["mysql", "ini"]
+    assert [s.id for s in registry.matches("prefix root:x:0:0", "trav")] == ["passwd"]
+    assert registry.matches("nothing here", "sql") == []
+
+
+def test_overlapping_signatures_of_different_checks_are_all_found():
+    registry = SignatureRegistry()
+    registry.register("a", "long", "sql syntax error", ignore_case=True)
+    registry.register("b", "prefix", "sql", ignore_case=True)
+    registry.register("c", "inner", "syntax")
+    registry.register("d", "regex", r"syntax\s+error", regex=True)
+
+    assert [s.id for s in registry.scan(b"near: SQL syntax error")] == ["long", "prefix", "inner", "regex"]
+    assert [s.id for s in registry.scan(memoryview(b"xx sql SYNTAX")[3:])] == ["prefix"]
+
+
+def test_registry_caps_inspected_bytes():
+    registry = SignatureRegistry(max_body_bytes=1024)
+    registry.register("sql", "sqlite", "sqlite", ignore_case=True)
+
+    assert registry.scan(b"x" * 1020 + b"SQLite error") == []
+    assert registry.scan(b"x" * 10 + b"SQLite error")
+
+
+def test_registry_rejects_duplicate_ids():
+    registry = SignatureRegistry()
+    registry.register("sql", "odbc", "odbc")
+    with pytest.raises(ValueError):
+        registry.register("sql", "odbc", "ODBC")
+
+
+def test_scanner_checks_use_signature_registry():
+    pytest.importorskip("requests")
+
+    from security.scanner import XSS_PAYLOAD, test_directory_traversal, test_sql_injection, test_xss
+
+    sql = test_sql_injection("https://example.com", ["q"], client=StubClient(StubResponse(b"You have an error in your SQL syntax")))
+    xss = test_xss("https://example.com", ["q"], client=StubClient(StubResponse(XSS_PAYLOAD.encode())))
+    clean = test_directory_traversal("https://example.com", ["file"], client=StubClient(StubResponse(b"<html>ok</html>")))
+
+    assert [i["test"] for i in sql] == ["sql_injection"]
+    assert [i["test"] for i in xss] == ["xss"]
+    assert clean == []
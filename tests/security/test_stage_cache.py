@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from security.pipeline import run_stage
+from security.runners import common, stage_cache
+
+
+@pytest.fixture
+def tree(monkeypatch, tmp_path):
+    monkeypatch.setattr(common, "ROOT", tmp_path)
+    monkeypatch.setattr(common, "REPORTS_DIR", tmp_path / "security" / "reports")
+    monkeypatch.setattr(common, "LOGS_DIR", tmp_path / "logs")
+    (tmp_path / "a.py").write_text("a = 1\n", encoding="utf-8")
+    (tmp_path / "b.py").write_text("b = 1\n", encoding="utf-8")
+    (tmp_path / "README.md").write_text("docs\n", encoding="utf-8")
+    return tmp_path
+
+
+# Stands in for semgrep: one result per scanned file, written to the requested output.
+SCAN = (
+    "python -c \"import json, sys; "
+    "json.dump({'results': [{'path': p, 'check_id': 'rule', 'extra': {'severity': 'ERROR'}} for p in sys.argv[2:]]}, "
+    "open(sys.argv[1], 'w'))\""
+)
+
+
+def _config(command: str, incremental: bool = False) -> dict:
+    settings = {"inputs": ["*.py"]}
+    if incremental:
+        settings["incremental"] = {"command": SCAN + " {output} {files}", "raw_output": "raw.json"}
+    return {
+        "commands": {"sast": [command]},
+        "raw_outputs": {"sast": [{"path": "raw.json", "parser": "semgrep"}]},
+        "stage_cache": {"stages": {"sast": settings}},
+    }
+
+
+def test_unchanged_inputs_restore_cached_report(tree, capsys):
+    config = _config(SCAN + " raw.json a.py b.py")
+    first = json.loads(run_stage("sast", "SAST failed", config).read_text(encoding="utf-8"))
+    assert len(first["findings"]) == 2
+
+    (tree / "README.md").write_text("only docs changed\n", encoding="utf-8")
+    (tree / "raw.json").unlink()
+    path = run_stage("sast", "SAST failed", config)
+    assert "inputs unchanged" in capsys.readouterr().out
+    assert json.loads(path.read_text(encoding="utf-8")) == first
+
+    (tree / "a.py").write_text("a = 2\n", encoding="utf-8")
+    assert not stage_cache.plan_stage("sast", config["commands"]["sast"], [], config["stage_cache"]["stages"]["sast"]).hit
+    config["commands"]["sast"] = [SCAN + " raw.json a.py"]
+    assert not stage_cache.plan_stage("sast", config["commands"]["sast"], [], config["stage_cache"]["stages"]["sast"]).hit
+
+
+def test_incremental_run_scans_changed_files_and_merges_results(tree):
+    config = _config(SCAN + " raw.json a.py b.py", incremental=True)
+    run_stage("sast", "SAST failed", config)
+
+    (tree / "b.py").write_text("b = 2\n", encoding="utf-8")
+    (tree / "c.py").write_text("c = 1\n", encoding="utf-8")
+    (tree / "a.py").unlink()
+    settings = config["stage_cache"]["stages"]["sast"]
+    plan = stage_cache.plan_stage("sast", config["commands"]["sast"], config["raw_outputs"]["sast"], settings)
+    assert (plan.changed, plan.removed) == (["b.py", "c.py"], ["a.py"])
+    assert plan.commands[0].endswith(" b.py c.py")
+
+    path = run_stage("sast", "SAST failed", config)
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    assert sorted(finding["details"].split(":")[0] for finding in payload["findings"]) == ["b.py", "c.py"]
+    assert [entry["command"] for entry in payload["execution"]] == plan.commands
+    assert stage_cache.plan_stage("sast", config["commands"]["sast"], config["raw_outputs"]["sast"], settings).hit
+
+
+def test_environment_changes_max_age_and_no_cache_force_full_runs(tree, monkeypatch, capsys):
+    config = _config(SCAN + " raw.json a.py b.py")
+    settings = config["stage_cache"]["stages"]["sast"]
+    settings["environment"] = "cat env.txt"
+    (tree / "env.txt").write_text("lib==1.0\n", encoding="utf-8")
+    run_stage("sast", "SAST failed", config)
+    assert stage_cache.plan_stage("sast", config["commands"]["sast"], config["raw_outputs"]["sast"], settings).hit
+
+    (tree / "env.txt").write_text("lib==1.1\n", encoding="utf-8")
+    assert not stage_cache.plan_stage("sast", config["commands"]["sast"], config["raw_outputs"]["sast"], settings).hit
+    run_stage("sast", "SAST failed", config)
+
+    settings["max_age_seconds"] = 60
+    assert stage_cache.plan_stage("sast", config["commands"]["sast"], config["raw_outputs"]["sast"], settings).hit
+    real_time = stage_cache.time.time
+    with monkeypatch.context() as patch:
+        patch.setattr(stage_cache.time, "time", lambda: real_time() + 120)
+        assert not stage_cache.plan_stage("sast", config["commands"]["sast"], config["raw_outputs"]["sast"], settings).hit
+
+    capsys.readouterr()
+    run_stage("sast", "SAST failed", config, use_cache=False)
+    assert "inputs unchanged" not in capsys.readouterr().out
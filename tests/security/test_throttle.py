@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import pytest
+
+from security.throttle import HostScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_bucket_paces_requests_per_host():
+    clock = FakeClock()
+    scheduler = HostScheduler(rate=2.0, burst=1.0, clock=clock, sleep=clock.sleep)
+
+    assert scheduler.acquire("https://a.example.com/x") == 0.0
+    assert scheduler.acquire("https://a.example.com/y") == 0.5
+    assert scheduler.acquire("https://b.example.com/") == 0.0
+
+    assert scheduler.stats()["hosts"]["a.example.com"]["throttled_seconds"] == 0.5
+
+
+def test_429_halves_rate_and_honors_retry_after():
+    clock = FakeClock()
+    scheduler = HostScheduler(rate=8.0, burst=1.0, clock=clock, sleep=clock.sleep)
+
+    scheduler.acquire("https://a.example.com/")
+    scheduler.observe("https://a.example.com/", 429, {"Retry-After": "3"})
+
+    assert scheduler.stats()["hosts"]["a.example.com"]["rate"] == 4.0
+    assert scheduler.acquire("https://a.example.com/") >= 3.0
+    assert scheduler.stats()["backoffs"] == 1
+
+
+def test_success_increases_rate_up_to_ceiling():
+    clock = FakeClock()
+    scheduler = HostScheduler(rate=1.0, max_rate=2.0, clock=clock, sleep=clock.sleep)
+
+    for _ in range(10):
+        scheduler.observe("https://a.example.com/", 200)
+
+    assert scheduler.stats()["hosts"]["a.example.com"]["rate"] == 2.0
+
+
+def test_rate_limit_probe_bypasses_pacing_and_backoff():
+    pytest.importorskip("requests")
+
+    from security.client import HttpClient
+
+    class Response:
+        url = "https://a.example.com/"
+        status_code = 429
+        headers = {"Retry-After": "60"}
+
+    class Session:
+        def mount(self, prefix, adapter):
+            pass
+
+        def get(self, url, **kwargs):
+            return Response()
+
+    clock = FakeClock()
+    scheduler = HostScheduler(rate=1.0, burst=1.0, clock=clock, sleep=clock.sleep)
+    client = HttpClient(session=Session(), scheduler=scheduler)
+    for _ in range(12):
+        client.get("https://a.example.com/", check="rate_limit", use_cache=False)
+
+    assert clock.now == 0.0
+    assert scheduler.stats()["backoffs"] == 0
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import datetime as dt
+import textwrap
+from pathlib import Path
+
+import pytest
+
+import security.waivers
+from security.aggregate_report import gate_summary
+from security.fingerprint import fingerprint
+from security.waivers import DEFAULT_EXCEPTIONS_PATH, load_waivers
+
+TODAY = dt.date(2026, 6, 1)
+
+
+def test_waivers_match_by_fingerprint_test_and_url_for_high_findings_only(tmp_path):
+    pinned = {"stage": "sast", "severity": "high", "title": "rule.a", "details": "a.py:1"}
+    path = tmp_path / "exceptions.yaml"
+    path.write_text(
+        f"""
+exceptions:
+  - id: FP
+    fingerprint: {fingerprint(pinned)}
+    expires: 2026-12-31
+  - id: LEGACY
+    stage: scan
+    test: open_redirect
+    url: "https://t/legacy/.*"
+    expires: 2026-12-31
+  - id: ADMIN
+    stage: scan
+    test: open_redirect
+    url: "https://t/admin"
+    expires: "2026-07-01"
+  - id: OLD
+    test: xss
+    expires: 2026-01-01
+  - id: HEADERS
+    test: security_headers
+    expires: 2026-12-31
+""",
+        encoding="utf-8",
+    )
+    waivers = load_waivers(path, today=TODAY)
+    assert len(waivers) == 4
+    assert waivers.expired == ["OLD"]
+
+    redirect = {"stage": "scan", "test": "open_redirect", "severity": "high"}
+    findings = [
+        pinned,
+        {**redirect, "url": "https://t/legacy/login?next=x"},
+        {**redirect, "url": "https://t/admin"},
+        {**redirect, "url": "https://t/admin/users"},
+        {**redirect, "url": "https://t/legacy/x", "severity": "critical"},
+        {"stage": "scan", "test": "xss", "severity": "medium", "url": "https://t/"},
+        {"stage": "scan", "test": "security_headers", "severity": "medium", "url": "https://t/"},
+    ]
+    assert [getattr(waivers.match(f), "id", None) for f in findings] == ["FP", "LEGACY", "ADMIN", None, None, None, None]
+
+    summary, sections = gate_summary(findings, waivers=waivers)
+    assert summary == {"high": 1, "critical": 1, "medium": 2}
+    assert sections["waivers"]["waived_severity_summary"] == {"high": 3}
+    assert sections["waivers"]["waived_by_id"] == {"FP": 1, "LEGACY": 1, "ADMIN": 1}
+
+
+def test_waiver_without_expiry_is_rejected(tmp_path):
+    path = tmp_path / "exceptions.yaml"
+    path.write_text("exceptions:\n  - id: EX\n    test: xss\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_waivers(path)
+
+
+@pytest.mark.parametrize("source", ["exceptions.yaml", "docstring"])
+def test_documented_example_waives_a_scanner_finding(tmp_path, source):
+    if source == "docstring":
+        example = textwrap.dedent(security.waivers.__doc__.split("\n\n")[2])
+    else:
+        shipped = Path(__file__).resolve().parents[2] / DEFAULT_EXCEPTIONS_PATH
+        assert load_waivers(shipped, today=TODAY).match({"test": "xss", "severity": "high"}) is None
+        example = "exceptions:\n" + "\n".join(line[1:] for line in shipped.read_text(encoding="utf-8").splitlines() if line.startswith("#   "))
+    path = tmp_path / "exceptions.yaml"
+    path.write_text(example, encoding="utf-8")
+
+    from security.scanner import _issue
+
+    finding = {"stage": "scan", **_issue("auth_required_endpoint", "high", "https://app.example.com/internal/status", "Potentially sensitive path accessible without auth")}
+    assert load_waivers(path, today=TODAY).match(finding) is not None